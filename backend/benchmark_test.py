@@ -0,0 +1,151 @@
+import pytest
+
+from common.api_client import ApiClient
+from common.benchmark_plugin import p95_budget, record_benchmark, record_scaling, run_benchmark
+from common.patch_stress import concurrency_levels, run_stress
+from common.rest_bench import BenchResult, Operation
+from common.scale_bench import run_scale
+from test_api import duty_values, freq_values_pin_2, freq_values_pin_3, invalid_report_ids, report_codes
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(scope="module")
+def bench_api(request, platform_url):
+    """
+        Отдельный клиент без повторов запросов (повторы исказили бы задержку)
+        и с пулом под выбранную конкурентность.
+    """
+    config = request.config
+    pool_size = max(config.getoption('--bench-concurrency'), int(config.getoption('--bench-rate')))
+    client = ApiClient(platform_url, pool_size=pool_size, retries=0)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="module")
+def fleet(bench_api):
+    """
+        Состояние устройств до замера. PATCH-нагрузка меняет duty и freq,
+        поэтому после модуля возвращаем исходные значения.
+    """
+    devices = bench_api.get_devices()
+    yield devices
+    for device in devices:
+        bench_api.patch_device(device['address'],
+                               duty1=device['pin_1_pwm_d'], freq1=device['pin_1_pwm_f'],
+                               duty2=device['pin_2_pwm_d'], freq2=device['pin_2_pwm_f'])
+
+
+def devices_operations(api, fleet):
+    return [Operation('devices', api.get_devices_response, 200)]
+
+
+def patch_operations(api, fleet):
+    """
+        Те же значения, что в test_changing_duty_pin_2/3 и test_changing_freq_pin_2/3.
+    """
+    operations = []
+    for device in fleet:
+        address = device['address']
+        for duty, _ in duty_values:
+            operations.append(Operation('patch', lambda a=address, d=duty, f=device['pin_1_pwm_f']:
+                                        api.patch_device(a, duty1=d, freq1=f), 200))
+            operations.append(Operation('patch', lambda a=address, d=duty, f=device['pin_2_pwm_f']:
+                                        api.patch_device(a, duty2=d, freq2=f), 200))
+        for freq in freq_values_pin_2:
+            operations.append(Operation('patch', lambda a=address, f=freq, d=device['pin_1_pwm_d']:
+                                        api.patch_device(a, duty1=d, freq1=f), 200))
+        for freq in freq_values_pin_3:
+            operations.append(Operation('patch', lambda a=address, f=freq, d=device['pin_2_pwm_d']:
+                                        api.patch_device(a, duty2=d, freq2=f), 200))
+    return operations
+
+
+def report_operations(api, fleet):
+    """
+        Те же отчеты, что в test_reports и test_reports_invalid_id.
+    """
+    operations = []
+    for device in fleet:
+        for report, code in report_codes:
+            operations.append(Operation('report', lambda a=device['address'], r=report: api.get_report(a, r), code))
+        for report in invalid_report_ids:
+            operations.append(Operation('report', lambda a=device['address'], r=report: api.get_report(a, r)))
+    return operations
+
+
+operations_by_endpoint = {'devices': devices_operations, 'patch': patch_operations, 'report': report_operations}
+
+
+@pytest.mark.parametrize('endpoint', operations_by_endpoint)
+def test_latency_budget(request, bench_api, fleet, endpoint):
+    """
+        Нагружаем endpoint запросами из функциональных тестов (--bench-mode closed/rate)
+        и проверяем, что p95 задержки не превышает бюджет --p95-budget.
+        Ответы сверяем с ожидаемыми кодами - ошибки тоже роняют тест.
+    """
+    result = run_benchmark(request.config, operations_by_endpoint[endpoint](bench_api, fleet))
+    record_benchmark(request.config, request.node.name, result)
+
+    histogram = result.histograms[endpoint]
+    errors = result.errors.get(endpoint, 0)
+    assert errors == 0, f'{endpoint}: {errors} ошибок из {histogram.count} запросов: {result.error_samples[:5]}'
+
+    p95 = histogram.percentile(95) * 1000
+    budget = p95_budget(request.config, endpoint)
+    assert p95 <= budget, f'{endpoint}: p95 = {p95:.1f} мс, бюджет {budget:.1f} мс'
+
+
+@pytest.mark.parametrize('mode', ['one', 'many'])
+def test_patch_contention(request, platform_url, fleet, mode):
+    """
+        Асинхронные писатели одновременно отправляют PATCH с разными duty1/freq1/duty2/freq2
+        в одно устройство (one) или во все по кругу (many). Число писателей растет ступенями
+        1, 2, 4, ... до --bench-concurrency, пока нет ошибок и p95 укладывается в бюджет patch.
+        Проверяем, что ни на одной ступени нет разорванных записей (поля из разных запросов)
+        и потерянных записей, а хотя бы первая ступень прошла чисто.
+        В сводку попадает устойчивая скорость записи - лучшая чистая ступень.
+    """
+    config = request.config
+    addresses = [device['address'] for device in fleet]
+    if mode == 'one':
+        addresses = addresses[:1]
+    budget = p95_budget(config, 'patch')
+    levels = []
+    stress = run_stress(platform_url, addresses, concurrency_levels(config.getoption('--bench-concurrency')),
+                        config.getoption('--bench-duration'), budget, on_level=levels.append)
+    summaries = stress['levels']
+    last = levels[-1]
+    record_benchmark(config, request.node.name,
+                     BenchResult('stress', last.duration, histograms={'patch': last.latency_histogram()},
+                                 errors={'patch': summaries[-1]['errors']},
+                                 metrics={'sustained_writes_per_second': stress['sustained_writes_per_second'],
+                                          'sustained_concurrency': stress['sustained_concurrency'] or 0}))
+
+    for summary in summaries:
+        concurrency = summary['concurrency']
+        assert summary['torn'] == 0, \
+            f"{concurrency} писателей: разорванные записи {summary['torn']}, например {summary['torn_samples']}"
+        assert summary['lost'] == 0, \
+            f"{concurrency} писателей: потерянные записи {summary['lost']}, например {summary['lost_samples']}"
+    first = summaries[0]
+    assert first['errors'] == 0, f"1 писатель: {first['errors']} ошибок: {first['error_samples']}"
+    p95 = first['latency'].get('p95_ms', 0)
+    assert p95 <= budget, f'patch: p95 = {p95:.1f} мс при 1 писателе, бюджет {budget:.1f} мс'
+
+
+def test_fleet_scale(request):
+    """
+        GET /devices и установка подписок мониторинга на синтетических парках размеров --scale-sizes.
+        Каждый размер - отдельный симулятор, а не --platform-url: на реальной платформе парк не выбрать.
+        Кривые попадают в сводку "fleet scaling"; тест падает только на ошибках подписки.
+    """
+    config = request.config
+    result = run_scale(config.getoption('--scale-sizes'), samples=5, ws_concurrency=config.getoption('--ws-concurrency'),
+                       frame_interval=config.getoption('--sim-frame-interval'))
+    for point in result['points']:
+        for stage in ('devices', 'ws_setup'):
+            record_scaling(config, stage, point['size'], point[stage])
+        assert point['devices_count'] == point['size']
+        assert point['ws_errors'] == 0, f"{point['ws_errors']} подписок из {point['size']} не получили кадр"
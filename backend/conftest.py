@@ -0,0 +1,14 @@
+import pytest
+
+from common.device_state import DeviceStateModel
+from common.sharding_plugin import is_xdist_worker
+
+
+@pytest.fixture(scope="session")
+def device_state(request, api):
+    """
+        Модель ожидаемого состояния устройств для PATCH-тестов: парк загружается один раз за сессию.
+        При параллельном запуске другие устройства меняют соседние процессы,
+        поэтому сверяются только устройства этого процесса.
+    """
+    return DeviceStateModel(api, shared=is_xdist_worker(request.config))
@@ -1,35 +1,18 @@
-import requests
 import pytest
 
-api_url = "http://0.0.0.0:5585"
 all_devices = ['Engine', 'Power', 'Transmission', 'Brake', 'Control']
 valid_freqs = [1, 2, 5, 10, 20, 50, 100, 200, 500]
 
+duty_values = [[100, True], [50, True], [0, True], [-1, False],
+               [101, False], [2.5, False], ['aa', False], ['-', False]]
+freq_values_pin_2 = [1, 2, 5, 10, 20, 50, 100, 200, 500, 0, 'a', '-1', '2.5', '-']
+freq_values_pin_3 = [1, 2, 5, 10, 20, 50, 100, 200, 500, 0, 3, 300, 5000, 'a', '-1', '2.5', '-']
+report_codes = [[100, 200], [200, 200], [300, 200], [400, 200],
+                [500, 404], [600, 404], [0, 404], [1, 404]]
+invalid_report_ids = ['-100', '-200', 'abc', '1.5']
 
-def get_devices_names():
-    """
-        По GET запросу получает имена доступных устройств.
-        Возвращает в виде списка.
-    """
-    response = requests.get(api_url + '/devices').json()
-    devices = []
-    for device in response:
-        devices.append(device['name'])
-    return devices
-
-def get_devices_addresses():
-    """
-        По GET запросу получает имена и адреса доступных устройств.
-        Возвращает в виде словаря.
-    """
-    response = requests.get(api_url + '/devices').json()
-    addresses = {}
-    for device in response:
-        addresses[device['name']] = device['address']
-    return addresses
 
-
-def test_devices_names():
+def test_devices_names(api):
     """
         По GET запросу получаем имена доступных устройств.
         Сравниваем список с ожидаемым.
@@ -38,10 +21,10 @@ def test_devices_names():
         В реальности это должен быть список заведомо подключенных устройств.
     """
 
-    response = requests.get(api_url + '/devices')
+    response = api.get_devices_response()
     assert response.status_code == 200, "Ресурс '/devices' недоступен"
 
-    devices = get_devices_names()
+    devices = api.get_devices_names()
 
     missing_devices = []
     for device in all_devices:
@@ -63,10 +46,10 @@ def test_devices_names():
             raise AssertionError(f'В списке устройств, полученных по API, есть лишние устройства: {extra}')
 
 
+@pytest.mark.mutates_device
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize(['duty', 'positive'], [[100, True], [50, True], [0, True], [-1, False],
-                                                [101, False], [2.5, False], ['aa', False], ['-', False]])
-def test_changing_duty_pin_2(device, duty, positive):
+@pytest.mark.parametrize(['duty', 'positive'], duty_values)
+def test_changing_duty_pin_2(device_state, device, duty, positive):
     """
         Проверяем возможность изменить duty для pin 2 каждого устройства.
 
@@ -77,30 +60,25 @@ def test_changing_duty_pin_2(device, duty, positive):
         Параметр duty должен измениться в случае, если значение является целым числом в диапазоне (0; 100).
         Значение freq сохраняется предыдущее.
     """
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            previous_duty = row['pin_1_pwm_d']
-            previous_freq = row['pin_1_pwm_f']
-    device_addresses = get_devices_addresses()
+    previous = device_state.expected_state(device, fresh=not positive)
+    previous_duty = previous['pin_1_pwm_d']
+    previous_freq = previous['pin_1_pwm_f']
 
-    patch = requests.patch(api_url + f"/devices?address={device_addresses[device]}&duty1={duty}&freq1={previous_freq})")
+    patch = device_state.patch(device, duty1=duty, freq1=previous_freq)
     assert patch.status_code == 200
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            if positive:
-                assert row['pin_1_pwm_d'] == duty, f"Предыдущее значение: {previous_duty}, " \
-                                                   f"внесённое: {duty} (ПРАВИЛЬНОЕ), текущее : {row['pin_1_pwm_d']}"
-            else:
-                assert row['pin_1_pwm_d'] == previous_duty, f"Предыдущее значение: {previous_duty} (ПРАВИЛЬНОЕ), " \
-                                                            f"внесённое: {duty}, текущее : {row['pin_1_pwm_d']}"
+    row = device_state.read(device)
+    if positive:
+        assert row['pin_1_pwm_d'] == duty, f"Предыдущее значение: {previous_duty}, " \
+                                           f"внесённое: {duty} (ПРАВИЛЬНОЕ), текущее : {row['pin_1_pwm_d']}"
+    else:
+        assert row['pin_1_pwm_d'] == previous_duty, f"Предыдущее значение: {previous_duty} (ПРАВИЛЬНОЕ), " \
+                                                    f"внесённое: {duty}, текущее : {row['pin_1_pwm_d']}"
 
 
+@pytest.mark.mutates_device
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize(['duty', 'positive'], [[100, True], [50, True], [0, True], [-1, False],
-                                               [101, False], [2.5, False], ['aa', False], ['-', False]])
-def test_changing_duty_pin_3(device, duty, positive):
+@pytest.mark.parametrize(['duty', 'positive'], duty_values)
+def test_changing_duty_pin_3(device_state, device, duty, positive):
     """
         Проверяем возможность изменить duty для pin 3 каждого устройства.
 
@@ -111,29 +89,25 @@ def test_changing_duty_pin_3(device, duty, positive):
         Параметр duty должен измениться в случае, если значение является целым числом в диапазоне (0; 100).
         Значение freq сохраняется предыдущее.
     """
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            previous_duty = row['pin_2_pwm_d']
-            previous_freq = row['pin_2_pwm_f']
-    device_addresses = get_devices_addresses()
+    previous = device_state.expected_state(device, fresh=not positive)
+    previous_duty = previous['pin_2_pwm_d']
+    previous_freq = previous['pin_2_pwm_f']
 
-    patch = requests.patch(api_url + f"/devices?address={device_addresses[device]}&duty2={duty}&freq2={previous_freq})")
+    patch = device_state.patch(device, duty2=duty, freq2=previous_freq)
     assert patch.status_code == 200
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            if positive:
-                assert row['pin_2_pwm_d'] == duty, f"Предыдущее значение: {previous_duty}, " \
-                                                   f"внесённое: {duty} (ПРАВИЛЬНОЕ), текущее : {row['pin_2_pwm_d']}"
-            else:
-                assert row['pin_2_pwm_d'] == previous_duty, f"Предыдущее значение: {previous_duty} (ПРАВИЛЬНОЕ), " \
-                                                            f"внесённое: {duty}, текущее : {row['pin_2_pwm_d']}"
+    row = device_state.read(device)
+    if positive:
+        assert row['pin_2_pwm_d'] == duty, f"Предыдущее значение: {previous_duty}, " \
+                                           f"внесённое: {duty} (ПРАВИЛЬНОЕ), текущее : {row['pin_2_pwm_d']}"
+    else:
+        assert row['pin_2_pwm_d'] == previous_duty, f"Предыдущее значение: {previous_duty} (ПРАВИЛЬНОЕ), " \
+                                                    f"внесённое: {duty}, текущее : {row['pin_2_pwm_d']}"
 
 
+@pytest.mark.mutates_device
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize('freq', [1, 2, 5, 10, 20, 50, 100, 200, 500, 0, 'a', '-1', '2.5', '-'])
-def test_changing_freq_pin_2(device, freq):
+@pytest.mark.parametrize('freq', freq_values_pin_2)
+def test_changing_freq_pin_2(device_state, device, freq):
     """
         Проверяем возможность изменить freq для pin 2 каждого устройства.
 
@@ -146,30 +120,25 @@ def test_changing_freq_pin_2(device, freq):
         Значение duty сохраняется предыдущее.
     """
 
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            previous_freq = row['pin_1_pwm_f']
-            previous_duty = row['pin_1_pwm_d']
-
-    device_addresses = get_devices_addresses()
+    previous = device_state.expected_state(device, fresh=freq not in valid_freqs)
+    previous_freq = previous['pin_1_pwm_f']
+    previous_duty = previous['pin_1_pwm_d']
 
-    patch = requests.patch(api_url + f"/devices?address={device_addresses[device]}&duty1={previous_duty}&freq1={freq}")
+    patch = device_state.patch(device, duty1=previous_duty, freq1=freq)
     assert patch.status_code == 200
-    response1 = requests.get(api_url + '/devices').json()
-    for row in response1:
-        if row['name'] == device:
-            if freq in valid_freqs:
-                assert row['pin_1_pwm_f'] == freq, f"Предыдущее значение: {previous_freq}, " \
-                                                   f"внесённое: {freq} (ПРАВИЛЬНОЕ), текущее : {row['pin_1_pwm_f']}"
-            else:
-                assert row['pin_1_pwm_f'] == previous_freq, f"Предыдущее значение: {previous_freq} (ПРАВИЛЬНОЕ), " \
-                                                            f"внесённое: {freq}, текущее : {row['pin_1_pwm_f']}"
+    row = device_state.read(device)
+    if freq in valid_freqs:
+        assert row['pin_1_pwm_f'] == freq, f"Предыдущее значение: {previous_freq}, " \
+                                           f"внесённое: {freq} (ПРАВИЛЬНОЕ), текущее : {row['pin_1_pwm_f']}"
+    else:
+        assert row['pin_1_pwm_f'] == previous_freq, f"Предыдущее значение: {previous_freq} (ПРАВИЛЬНОЕ), " \
+                                                    f"внесённое: {freq}, текущее : {row['pin_1_pwm_f']}"
 
 
+@pytest.mark.mutates_device
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize('freq', [1, 2, 5, 10, 20, 50, 100, 200, 500, 0, 3, 300, 5000, 'a', '-1', '2.5', '-'])
-def test_changing_freq_pin_3(device, freq):
+@pytest.mark.parametrize('freq', freq_values_pin_3)
+def test_changing_freq_pin_3(device_state, device, freq):
     """
         Проверяем возможность изменить freq для pin 3 каждого устройства.
 
@@ -181,50 +150,77 @@ def test_changing_freq_pin_3(device, freq):
         valid_freqs = [1, 2, 5, 10, 20, 50, 100, 200, 500]
         Значение duty сохраняется предыдущее.
     """
-    response = requests.get(api_url + '/devices').json()
-    for row in response:
-        if row['name'] == device:
-            previous_freq = row['pin_2_pwm_f']
-            previous_duty = row['pin_2_pwm_d']
-    device_addresses = get_devices_addresses()
+    previous = device_state.expected_state(device, fresh=freq not in valid_freqs)
+    previous_freq = previous['pin_2_pwm_f']
+    previous_duty = previous['pin_2_pwm_d']
 
-    patch = requests.patch(api_url + f"/devices?address={device_addresses[device]}&duty2={previous_duty}&freq2={freq}")
+    patch = device_state.patch(device, duty2=previous_duty, freq2=freq)
     assert patch.status_code == 200
-    response1 = requests.get(api_url + '/devices').json()
-    for row in response1:
-        if row['name'] == device:
-            if freq in valid_freqs:
-                assert row['pin_2_pwm_f'] == freq, f"Предыдущее значение: {previous_freq}, " \
-                                                   f"внесённое: {freq} (ПРАВИЛЬНОЕ), текущее : {row['pin_2_pwm_f']}"
-            else:
-                assert row['pin_2_pwm_f'] == previous_freq, f"Предыдущее значение: {previous_freq} (ПРАВИЛЬНОЕ), " \
-                                                            f"внесённое: {freq}, текущее : {row['pin_2_pwm_f']}"
+    row = device_state.read(device)
+    if freq in valid_freqs:
+        assert row['pin_2_pwm_f'] == freq, f"Предыдущее значение: {previous_freq}, " \
+                                           f"внесённое: {freq} (ПРАВИЛЬНОЕ), текущее : {row['pin_2_pwm_f']}"
+    else:
+        assert row['pin_2_pwm_f'] == previous_freq, f"Предыдущее значение: {previous_freq} (ПРАВИЛЬНОЕ), " \
+                                                    f"внесённое: {freq}, текущее : {row['pin_2_pwm_f']}"
 
 
+@pytest.mark.mutates_device
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize(['report', 'code'], [[100, 200], [200, 200], [300, 200], [400, 200],
-                                              [500, 404], [600, 404], [0, 404], [1, 404]])
-def test_reports(device, report, code):
+def test_patch_isolation(device_state, device):
+    """
+        PATCH одного устройства меняет только его: меняем duty на pin 1 и сверяем весь парк
+        с моделью ожидаемого состояния (у измененного устройства - значение, предсказанное
+        по правилам валидации). Парк перечитывается перед изменением, чтобы сверять только то,
+        что изменилось за время теста. При параллельном запуске сверяются только устройства этого процесса.
+    """
+    device_state.load()
+    previous = device_state.expected_state(device)
+    duty = 0 if previous['pin_1_pwm_d'] else 100
+    patch = device_state.patch(device, duty1=duty, freq1=previous['pin_1_pwm_f'])
+    assert patch.status_code == 200
+    device_state.read()
+    diff = device_state.fleet_diff()
+    assert len(diff) == 0, f'После изменения {device} состояние парка отличается от ожидаемого: {diff}'
+
+
+@pytest.fixture(scope="module")
+def reports(api, report_cache):
+    """
+        Все отчеты из report_codes и invalid_report_ids для всех устройств запрашиваются одновременно
+        (не более --report-concurrency запросов за раз) и кладутся в кэш отчетов для тестов UI.
+        Индекс кэша с прошлых запусков (--platform-build) здесь не используется: проверяется сама платформа.
+        Возвращает словарь: (имя устройства, id отчета) -> результат.
+    """
+    addresses = api.get_devices_addresses()
+    rep_ids = [report for report, _ in report_codes] + invalid_report_ids
+    results = report_cache.get_reports(addresses.values(), rep_ids, fresh=True)
+    return {(name, rep_id): results[(address, rep_id)] for name, address in addresses.items() for rep_id in rep_ids}
+
+
+@pytest.mark.parametrize('device', all_devices)
+@pytest.mark.parametrize(['report', 'code'], report_codes)
+def test_reports(reports, device, report, code):
     """
         Проверяем доступность отчетов (100, 200, 300, 400) - код ответа 200
         Для недоступных отчетов ожидаемый код ответа - 404
         Повторяем для всех устройств.
     """
-    device_addresses = get_devices_addresses()
-    response = requests.get(api_url + f'/report?address={device_addresses[device]}&repId={report}')
-    assert response.status_code == code, f'Отчет {report}, ожидаемый код ответа {code}, ' \
-                                         f'фактический {response.status_code}'
+    assert (device, report) in reports, f'Нет данных об устройстве {device}'
+    response = reports[(device, report)]
+    assert response.error is None, f'Отчет {report}: ошибка запроса {response.error}'
+    assert response.status == code, f'Отчет {report}, ожидаемый код ответа {code}, ' \
+                                    f'фактический {response.status}'
 
 
 @pytest.mark.parametrize('device', all_devices)
-@pytest.mark.parametrize('report', ['-100', '-200', 'abc', '1.5'])
-def test_reports_invalid_id(device, report):
+@pytest.mark.parametrize('report', invalid_report_ids)
+def test_reports_invalid_id(reports, device, report):
     """
         Проверяем ответ сервера при запроса отчета с невалидным Id.
         Повторяем для всех устройств.
     """
-    device_addresses = get_devices_addresses()
-    response = requests.get(api_url + f'/report?address={device_addresses[device]}&repId={report}')
+    assert (device, report) in reports, f'Нет данных об устройстве {device}'
+    response = reports[(device, report)]
+    assert response.error is None, f'Отчет {report}: ошибка запроса {response.error}'
     assert response.text == "Invalid type of 'repId' value"
-
-
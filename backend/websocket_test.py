@@ -1,43 +1,106 @@
-import requests
-import asyncio
-import websockets
+import pytest
+
+from common.perf_history_plugin import record_metric
+from common.ws_monitor import run_monitoring
+from common.ws_recorder import MonitoringRecorder, check_recording, load_recording
 
-url = "http://0.0.0.0:5585"
 all_devices = ['Engine', 'Power', 'Transmission', 'Brake', 'Control']
+valid_freqs = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+
+@pytest.fixture(scope="module")
+def recording_dir(request, tmp_path_factory):
+    return request.config.getoption('--ws-record') or tmp_path_factory.mktemp('ws_recording')
+
+
+@pytest.fixture(scope="module")
+def pwm_params(request, api, platform_url, recording_dir):
+    """
+        Одновременно подписывается на мониторинг всех доступных устройств
+        и читает --ws-frames кадров (или --ws-duration секунд) с каждого.
+        Все кадры по ходу записываются в колонки NumPy в recording_dir.
+        Возвращает словарь: имя устройства -> результат мониторинга.
+    """
+    frames = request.config.getoption('--ws-frames') or None
+    duration = request.config.getoption('--ws-duration')
+    if frames is None and duration is None:
+        frames = 1
+    addresses = api.get_devices_addresses()
+    recorder = MonitoringRecorder(recording_dir)
+    try:
+        results = run_monitoring(platform_url, addresses.values(), frames=frames, duration=duration,
+                                 concurrency=request.config.getoption('--ws-concurrency'),
+                                 on_frame=recorder.append_frame)
+    finally:
+        recorder.close()
+    record_metric(request.config, 'ws.connect', [r.connect_time for r in results.values() if r.error is None])
+    record_metric(request.config, 'ws.frame_interval',
+                  [b.received - a.received for r in results.values() for a, b in zip(r.frames, r.frames[1:])])
+    return {name: results[address] for name, address in addresses.items()}
 
 
-def get_devices_addresses():
+@pytest.mark.parametrize('device', all_devices)
+def test_monitoring_connection(pwm_params, device):
     """
-        По GET запросу получает адреса доступных устройств.
-        Возвращает в виде списка.
+        Проверяем, что для каждого устройства устанавливается соединение
+        /start_monitoring/{address} и сервер присылает данные.
     """
-    response = requests.get(url + '/devices').json()
-    addresses = []
-    for r in response:
-        addresses.append(r['address'])
-    return addresses
+    assert device in pwm_params, f'Нет данных об устройстве {device}'
+    result = pwm_params[device]
+    assert result.error is None, f"При получении информации об устройстве {device} ({result.address}) " \
+                                 f"произошла ошибка: {result.error}"
+    assert len(result.frames) > 0, f'Сервер не прислал данные об устройстве {device} ({result.address})'
+
 
+@pytest.mark.parametrize('device', all_devices)
+def test_monitoring_pwm_params(pwm_params, device):
+    """
+        Проверяем, что каждый полученный кадр содержит параметры обоих пинов:
+        duty в диапазоне (0; 100) и freq из списка valid_freqs.
+    """
+    result = pwm_params.get(device)
+    if result is None or not result.frames:
+        pytest.skip(f'Нет данных мониторинга для устройства {device}')
 
-device_addresses = get_devices_addresses()
+    wrong_frames = []
+    for frame in result.frames:
+        data = frame.data
+        if data is None:
+            wrong_frames.append(frame.text)
+            continue
+        for pin in (1, 2):
+            duty = data.get(f'pin_{pin}_pwm_d')
+            freq = data.get(f'pin_{pin}_pwm_f')
+            if not isinstance(duty, int) or duty not in range(0, 101) or freq not in valid_freqs:
+                wrong_frames.append(frame.text)
+                break
+    assert len(wrong_frames) == 0, f'Информация от сервера об устройстве {device} ({result.address}) ' \
+                                   f'некорректна: {wrong_frames}'
 
 
-async def get_pwm_params():
-    for address in device_addresses:
+def expected_frame_interval(config):
+    interval = config.getoption('--ws-interval')
+    if interval is None and config.getoption('--simulator'):
+        interval = config.getoption('--sim-frame-interval')
+    return interval
 
-        url = f"ws://0.0.0.0:5585/start_monitoring/{address}"
 
-        async with websockets.connect(url) as ws:
+def test_monitoring_recording(request, pwm_params, recording_dir):
+    """
+        Проверяем всю запись мониторинга разом: значения вне диапазона, паузы между кадрами
+        одного устройства больше --ws-max-gap секунд и отклонение среднего интервала между кадрами
+        от --ws-interval (для него нужно больше одного кадра с устройства: --ws-frames или --ws-duration).
+    """
+    interval = expected_frame_interval(request.config)
+    result = check_recording(load_recording(recording_dir), max_gap=request.config.getoption('--ws-max-gap'),
+                             interval=interval)
+    assert result['out_of_range'] == 0, f"Кадров со значениями вне диапазона: {result['out_of_range']}, " \
+                                        f"например {result['out_of_range_samples']}"
+    assert result['gaps'] == 0, f"Пауз между кадрами больше {request.config.getoption('--ws-max-gap')} с: " \
+                                f"{result['gaps']}, например {result['gap_samples']}"
+    assert not result['drift'], f"Средний интервал между кадрами отличается от {interval} с: {result['drift']}"
 
-            if ws.open is True:
-                try:
-                    data = await ws.recv()
-                    print(f"Информация от сервера об устройстве {address}: {data}")
-                except Exception as ex:
-                    print(f"При получени информации об устройстве {address} произошла ошибка: {ex.args}")
-            else:
-                print(f"Соединение не установлено. url: {url}")
 
-asyncio.get_event_loop().run_until_complete(get_pwm_params())
 #   При чтении данных об устройствах, адрес которых содержит только цифры, мы получаем ответ "Not found"
 #   Если адрес устройства содержит буквы, то происходит неизвестная ошибка.
 #   Вероятно, здесь где-то здесь закрался баг:)
@@ -0,0 +1,4 @@
+"""
+    Общие инструменты тестов платформы: клиенты API и вспомогательные модули,
+    которые используются и в backend/, и в frontend/.
+"""
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from typing import Dict, List, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_PLATFORM_URL = "http://0.0.0.0:5585"
+
+
+@dataclass
+class ConnectionStats:
+    """
+        Счётчики пула соединений: сколько запросов отправлено,
+        сколько TCP-соединений открыто и сколько раз соединение было переиспользовано.
+    """
+    requests: int = 0
+    opened: int = 0
+
+    @property
+    def reused(self) -> int:
+        return self.requests - self.opened
+
+
+class ApiClient:
+    """
+        Клиент REST API платформы (/devices, PATCH /devices, /report).
+
+        Все запросы идут через один requests.Session с пулом keep-alive соединений,
+        поэтому соединение с платформой открывается один раз и переиспользуется
+        между тестами. Сетевые ошибки и ответы 502/503/504 повторяются retries раз.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_PLATFORM_URL, pool_size: int = 10,
+                 retries: int = 3, backoff_factor: float = 0.1, timeout: float = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset(['GET', 'PATCH']),
+                      raise_on_status=False)
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                    max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+    def get_devices_response(self) -> requests.Response:
+        return self.session.get(self.base_url + '/devices', timeout=self.timeout)
+
+    def get_devices(self) -> List[dict]:
+        """
+            По GET запросу получает список доступных устройств со всеми параметрами.
+        """
+        return self.get_devices_response().json()
+
+    def get_devices_names(self) -> List[str]:
+        """
+            По GET запросу получает имена доступных устройств.
+            Возвращает в виде списка.
+        """
+        return [device['name'] for device in self.get_devices()]
+
+    def get_devices_addresses(self) -> Dict[str, str]:
+        """
+            По GET запросу получает имена и адреса доступных устройств.
+            Возвращает в виде словаря.
+        """
+        return {device['name']: device['address'] for device in self.get_devices()}
+
+    def patch_device(self, address: str, **values: Union[int, float, str]) -> requests.Response:
+        """
+            PATCH запрос на изменение параметров устройства.
+            values - любые из duty1, freq1, duty2, freq2; значения передаются как есть,
+            чтобы можно было отправлять и заведомо невалидные данные.
+        """
+        params = {'address': address}
+        params.update(values)
+        return self.session.patch(self.base_url + '/devices', params=params, timeout=self.timeout)
+
+    def get_report(self, address: str, rep_id: Union[int, str], stream: bool = False) -> requests.Response:
+        return self.session.get(self.base_url + '/report', params={'address': address, 'repId': rep_id},
+                                timeout=self.timeout, stream=stream)
+
+    def connection_stats(self) -> ConnectionStats:
+        """
+            Собирает счётчики со всех пулов urllib3, созданных адаптером сессии.
+        """
+        stats = ConnectionStats()
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats.requests += pool.num_requests
+            stats.opened += pool.num_connections
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,123 @@
+"""
+    pytest-плагин режима бенчмарков: опции запуска, пропуск тестов с маркером benchmark
+    без --benchmark, сводка гистограмм в конце сессии и выгрузка в JSON.
+"""
+
+import json
+
+import pytest
+
+from common.rest_bench import run_closed_loop, run_fixed_rate
+from common.scale_bench import default_sizes, first_superlinear, growth, parse_sizes, scaling_lines
+from common.simulator import parse_endpoint_values
+
+benchmark_results_key = pytest.StashKey[dict]()
+scaling_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'Бенчмарки REST API')
+    group.addoption('--benchmark', action='store_true', help='Запустить тесты с маркером benchmark')
+    group.addoption('--bench-mode', choices=['closed', 'rate'], default='closed',
+                    help='closed - фиксированная конкурентность, rate - фиксированная частота запросов')
+    group.addoption('--bench-concurrency', type=int, default=8, help='Потоков в режиме closed')
+    group.addoption('--bench-rate', type=float, default=50, help='Запросов в секунду в режиме rate')
+    group.addoption('--bench-duration', type=float, default=10, help='Длительность замера каждого endpoint, секунды')
+    group.addoption('--p95-budget', action='append', default=[],
+                    help='Допустимый p95 в миллисекундах: 500 для всех или endpoint=500 (devices, patch, report)')
+    group.addoption('--bench-json', help='Файл для сохранения гистограмм в JSON')
+    group.addoption('--e2e-samples', type=int, default=10,
+                    help='Сколько изменений duty на устройство в тесте задержки PATCH -> WS -> страница')
+    group.addoption('--consistency-samples', type=int, default=20,
+                    help='Сколько выборок API / WebSocket / таблица делает тест согласованности каналов')
+    group.addoption('--consistency-interval', type=float, default=0.5, help='Период выборок, секунды')
+    group.addoption('--max-staleness', type=float, default=2.0,
+                    help='Сколько секунд каналы могут расходиться, прежде чем тест упадет')
+    group.addoption('--consistency-json', help='Файл для временного ряда расхождений в JSON')
+    group.addoption('--scale-sizes', type=parse_sizes, default=default_sizes,
+                    help='Размеры парка для бенчмарка масштабирования, например 10,100,1k,10k')
+    group.addoption('--scale-max-links', type=int, default=100,
+                    help='Сколько строк таблицы обходить при поиске ссылок мониторинга на каждом размере')
+    group.addoption('--scale-json', help='Файл для кривых масштабирования в JSON')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: замер производительности, запускается только с --benchmark')
+    config.stash[benchmark_results_key] = {}
+    config.stash[scaling_key] = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip = pytest.mark.skip(reason='бенчмарки запускаются с --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+def run_benchmark(config, operations):
+    if config.getoption('--bench-mode') == 'rate':
+        rate = config.getoption('--bench-rate')
+        return run_fixed_rate(operations, rate, config.getoption('--bench-duration'),
+                              max_workers=max(config.getoption('--bench-concurrency'), int(rate)))
+    return run_closed_loop(operations, config.getoption('--bench-concurrency'), config.getoption('--bench-duration'))
+
+
+def p95_budget(config, endpoint, default=1000.0):
+    """
+        Допустимый p95 для endpoint в миллисекундах.
+    """
+    budgets = parse_endpoint_values(config.getoption('--p95-budget'))
+    return budgets.get(endpoint, budgets.get('*', default))
+
+
+def record_benchmark(config, name, result):
+    config.stash[benchmark_results_key][name] = result
+
+
+def record_scaling(config, stage, size, seconds):
+    """
+        Точка кривой масштабирования: этап stage занял seconds секунд на парке из size устройств.
+    """
+    config.stash[scaling_key].setdefault(stage, {})[size] = seconds
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    curve = config.stash.get(scaling_key, {})
+    if curve:
+        terminalreporter.write_sep('-', 'fleet scaling (ms)')
+        for line in scaling_lines(curve):
+            terminalreporter.write_line(line)
+        superlinear = first_superlinear(curve)
+        if superlinear:
+            terminalreporter.write_line(f"first superlinear: {superlinear['stage']} "
+                                        f"{superlinear['from']} -> {superlinear['to']} devices, "
+                                        f"growth {superlinear['exponent']:.2f}")
+        path = config.getoption('--scale-json')
+        if path:
+            with open(path, 'w') as f:
+                json.dump({'curve': {stage: {str(size): value for size, value in points.items()}
+                                     for stage, points in curve.items()},
+                           'growth': growth(curve), 'first_superlinear': superlinear}, f, indent=2)
+            terminalreporter.write_line(f'scaling curves saved to {path}')
+
+    results = config.stash.get(benchmark_results_key, {})
+    if not results:
+        return
+    terminalreporter.write_sep('-', 'benchmark latency (ms)')
+    for name, result in results.items():
+        for endpoint, histogram in result.histograms.items():
+            summary = histogram.summary()
+            terminalreporter.write_line(
+                f"{name:<20} {endpoint:<8} {result.mode:<6} n={summary['count']:<7} "
+                f"rps={result.throughput(endpoint):8.1f} p50={summary.get('p50_ms', 0):8.2f} "
+                f"p95={summary.get('p95_ms', 0):8.2f} p99={summary.get('p99_ms', 0):8.2f} "
+                f"max={summary.get('max_ms', 0):8.2f} errors={result.errors.get(endpoint, 0)}")
+        for metric, value in result.metrics.items():
+            terminalreporter.write_line(f'{name:<20} {metric} = {value:g}')
+    path = config.getoption('--bench-json')
+    if path:
+        with open(path, 'w') as f:
+            json.dump({name: result.to_dict() for name, result in results.items()}, f, indent=2)
+        terminalreporter.write_line(f'benchmark results saved to {path}')
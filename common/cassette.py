@@ -0,0 +1,228 @@
+"""
+    Запись и воспроизведение трафика платформы.
+
+    RecordingProxy стоит между тестами и платформой (или симулятором), пропускает
+    через себя HTTP-запросы и подписки /start_monitoring и записывает их в кассету:
+    тела ответов HTTP и кадры WebSocket с отметками времени.
+    ReplayServer отдает записанное из памяти - без платформы, сразу или с записанными задержками.
+
+    Кассета - gzip-файл, по одной JSON-записи на строку.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+from typing import List, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+from aiohttp import WSCloseCode, WSMsgType, web
+
+from common.server_thread import ServerThread
+from common.ws_monitor import monitoring_url
+
+hop_by_hop_headers = {'host', 'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'upgrade'}
+
+
+def exchange_key(method: str, path: str, query) -> str:
+    """
+        Ключ запроса для сопоставления при воспроизведении: метод, путь и отсортированные параметры.
+    """
+    return f"{method} {path}?{urlencode(sorted(query.items()))}"
+
+
+def encode_body(body: bytes) -> dict:
+    try:
+        return {'body': body.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'body_b64': base64.b64encode(body).decode('ascii')}
+
+
+def decode_body(record: dict) -> bytes:
+    if 'body_b64' in record:
+        return base64.b64decode(record['body_b64'])
+    return record.get('body', '').encode('utf-8')
+
+
+class Cassette:
+    """
+        Записи обменов в порядке их завершения. http - запрос и ответ, ws - одна подписка
+        со всеми кадрами; t - секунды от начала записи, elapsed / frames[i][0] - от начала обмена.
+    """
+
+    def __init__(self, records: Optional[List[dict]] = None):
+        self.records = records or []
+        self.started = time.monotonic()
+
+    def add(self, record: dict):
+        record['t'] = round(time.monotonic() - self.started, 6)
+        self.records.append(record)
+
+    def save(self, path):
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            for record in self.records:
+                file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    @classmethod
+    def load(cls, path) -> 'Cassette':
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return cls([json.loads(line) for line in file if line.strip()])
+
+
+class RecordingProxy:
+    """
+        Прокси к платформе upstream, записывающий весь трафик в cassette.
+    """
+
+    def __init__(self, upstream: str, cassette: Optional[Cassette] = None):
+        self.upstream = upstream.rstrip('/')
+        self.cassette = cassette or Cassette()
+        self._session = None
+        self._sockets = set()
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/start_monitoring/{address}', self.proxy_monitoring)
+        app.router.add_route('*', '/{tail:.*}', self.proxy_http)
+        app.on_startup.append(self._open_session)
+        app.on_shutdown.append(self._close)
+        return app
+
+    async def _open_session(self, app):
+        self._session = aiohttp.ClientSession(auto_decompress=False)
+
+    async def _close(self, app):
+        for ws in list(self._sockets):
+            await ws.close(code=WSCloseCode.GOING_AWAY)
+        await self._session.close()
+
+    async def proxy_http(self, request):
+        started = time.perf_counter()
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in hop_by_hop_headers}
+        async with self._session.request(request.method, self.upstream + request.path_qs,
+                                         headers=headers, data=await request.read(),
+                                         allow_redirects=False) as upstream:
+            body = await upstream.read()
+            response_headers = {name: value for name, value in upstream.headers.items()
+                                if name.lower() not in hop_by_hop_headers}
+            status = upstream.status
+        record = {'kind': 'http', 'key': exchange_key(request.method, request.path, request.query),
+                  'status': status, 'headers': response_headers,
+                  'elapsed': round(time.perf_counter() - started, 6)}
+        record.update(encode_body(body))
+        self.cassette.add(record)
+        return web.Response(status=status, body=body, headers=response_headers)
+
+    async def proxy_monitoring(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        started = time.perf_counter()
+        frames = []
+        record = {'kind': 'ws', 'key': exchange_key('WS', request.path, request.query), 'frames': frames}
+        try:
+            async with self._session.ws_connect(monitoring_url(self.upstream, request.match_info['address'])) as upstream:
+                async def forward_to_client():
+                    async for message in upstream:
+                        if message.type != WSMsgType.TEXT:
+                            break
+                        frames.append([round(time.perf_counter() - started, 6), message.data])
+                        await ws.send_str(message.data)
+                    await ws.close()
+
+                forwarder = asyncio.ensure_future(forward_to_client())
+                try:
+                    async for message in ws:
+                        if message.type == WSMsgType.TEXT:
+                            await upstream.send_str(message.data)
+                finally:
+                    forwarder.cancel()
+        except (aiohttp.ClientError, ConnectionResetError) as ex:
+            record['error'] = f'{type(ex).__name__}: {ex}'
+        finally:
+            self._sockets.discard(ws)
+            self.cassette.add(record)
+        return ws
+
+    def run_in_thread(self, host='127.0.0.1', port=0):
+        server = ServerThread(self.app, host, port)
+        server.start()
+        return server
+
+
+class ReplayServer:
+    """
+        Отдает записанные обмены. Ответы на одинаковые запросы выдаются в записанном порядке,
+        последний повторяется, если запросов больше, чем в записи. Незаписанный запрос - 404.
+        pacing=True - ответ отдается через записанное время, кадры мониторинга - с записанными интервалами;
+        иначе все без задержек.
+    """
+
+    def __init__(self, cassette: Cassette, pacing: bool = False):
+        self.pacing = pacing
+        self.exchanges = defaultdict(deque)
+        for record in cassette.records:
+            self.exchanges[record['key']].append(record)
+        self.misses = []
+        self._sockets = set()
+
+    def next_record(self, key: str) -> Optional[dict]:
+        queue = self.exchanges.get(key)
+        if not queue:
+            self.misses.append(key)
+            return None
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/start_monitoring/{address}', self.replay_monitoring)
+        app.router.add_route('*', '/{tail:.*}', self.replay_http)
+        app.on_shutdown.append(self._close_sockets)
+        return app
+
+    async def _close_sockets(self, app):
+        for ws in list(self._sockets):
+            await ws.close(code=WSCloseCode.GOING_AWAY)
+
+    async def replay_http(self, request):
+        record = self.next_record(exchange_key(request.method, request.path, request.query))
+        if record is None:
+            return web.Response(status=404, text='Not recorded')
+        if self.pacing:
+            await asyncio.sleep(record['elapsed'])
+        return web.Response(status=record['status'], body=decode_body(record), headers=record['headers'])
+
+    async def replay_monitoring(self, request):
+        record = self.next_record(exchange_key('WS', request.path, request.query))
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if record is None:
+            await ws.close()
+            return ws
+        self._sockets.add(ws)
+        sender = asyncio.ensure_future(self._send_frames(ws, record['frames']))
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            sender.cancel()
+            self._sockets.discard(ws)
+        return ws
+
+    async def _send_frames(self, ws, frames):
+        started = time.perf_counter()
+        for offset, text in frames:
+            if self.pacing:
+                await asyncio.sleep(max(0.0, offset - (time.perf_counter() - started)))
+            try:
+                await ws.send_str(text)
+            except ConnectionResetError:
+                return
+
+    def run_in_thread(self, host='127.0.0.1', port=0):
+        server = ServerThread(self.app, host, port)
+        server.start()
+        return server
@@ -0,0 +1,199 @@
+"""
+    Сверка состояния устройств по трем каналам: GET /devices, кадры мониторинга (WebSocket)
+    и таблица устройств на странице.
+
+    Каждая выборка читает каналы одновременно: один GET, последний кадр каждой подписки
+    и (если передан read_table) одно чтение таблицы. Расхождения считаются по парам каналов:
+    api_ws - duty/freq из API и из кадра, api_table - имя, тип и адрес из API и из таблицы.
+    Для каждой пары и устройства ведется время, сколько каналы уже расходятся (stale_for),
+    это и есть задержка кэша / обновления на платформе.
+
+    Запуск без браузера (API и WebSocket):
+        python -m common.consistency --url http://0.0.0.0:5585 --samples 100 --interval 0.2 -o consistency.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from common.api_client import ApiClient, DEFAULT_PLATFORM_URL
+from common.device_state import state_fields
+from common.stats import summarize
+from common.ws_monitor import Frame, FrameWatcher
+
+pairs = ['api_ws', 'api_table']
+
+
+@dataclass
+class ChannelSnapshot:
+    """
+        Одна выборка. t - начало выборки; api_time / table_time - когда пришел ответ канала;
+        ws - последний кадр каждого устройства по адресу; table - строки таблицы по имени устройства
+        ({'type': ..., 'address': десятичный адрес}), None - таблица не читалась.
+    """
+    t: float
+    api: Dict[str, dict]
+    api_time: float
+    ws: Dict[str, Optional[Frame]]
+    table: Optional[Dict[str, dict]] = None
+    table_time: Optional[float] = None
+
+
+def diverging_fields(snapshot: ChannelSnapshot) -> Dict[str, Dict[str, List[str]]]:
+    """
+        {имя устройства: {пара каналов: [поля, которые расходятся]}}, пустые списки не включаются.
+    """
+    diff = {}
+    for name, device in snapshot.api.items():
+        device_diff = {}
+        frame = snapshot.ws.get(device['address'])
+        data = frame.data if frame is not None else None
+        if data is None:
+            device_diff['api_ws'] = ['frame']
+        else:
+            fields = [f for f in state_fields if data.get(f) != device.get(f)]
+            if fields:
+                device_diff['api_ws'] = fields
+        if snapshot.table is not None:
+            row = snapshot.table.get(name)
+            if row is None:
+                device_diff['api_table'] = ['row']
+            else:
+                fields = []
+                if row.get('type') != device.get('type'):
+                    fields.append('type')
+                if str(row.get('address')) != str(int(device['address'], 16)):
+                    fields.append('address')
+                if fields:
+                    device_diff['api_table'] = fields
+        if device_diff:
+            diff[name] = device_diff
+    return diff
+
+
+@dataclass
+class ConsistencyTracker:
+    """
+        Временной ряд расхождений: для каждой выборки, устройства и пары каналов - расходящиеся поля
+        и stale_for, сколько секунд расхождение длится к моменту выборки (0 - каналы согласованы).
+    """
+    series: List[dict] = field(default_factory=list)
+    _since: Dict[tuple, float] = field(default_factory=dict)
+
+    def add(self, snapshot: ChannelSnapshot) -> List[dict]:
+        diff = diverging_fields(snapshot)
+        records = []
+        checked_pairs = pairs if snapshot.table is not None else ['api_ws']
+        for name in snapshot.api:
+            for pair in checked_pairs:
+                fields = diff.get(name, {}).get(pair, [])
+                key = (name, pair)
+                if fields:
+                    stale_for = snapshot.t - self._since.setdefault(key, snapshot.t)
+                else:
+                    self._since.pop(key, None)
+                    stale_for = 0.0
+                records.append({'t': snapshot.t, 'device': name, 'pair': pair, 'fields': fields,
+                                'stale_for': stale_for})
+        self.series.extend(records)
+        return records
+
+    def summary(self) -> Dict[str, dict]:
+        """
+            По каждой паре каналов: доля выборок с расхождением и перцентили stale_for (секунды).
+        """
+        result = {}
+        for pair in pairs:
+            records = [r for r in self.series if r['pair'] == pair]
+            if not records:
+                continue
+            diverged = [r for r in records if r['fields']]
+            result[pair] = {'samples': len(records), 'diverged': len(diverged),
+                            'diverged_share': len(diverged) / len(records),
+                            'max_stale_for': max(r['stale_for'] for r in records),
+                            'stale_for': summarize(r['stale_for'] for r in diverged)}
+        return result
+
+
+class ConsistencySampler:
+    """
+        Держит подписку мониторинга на каждое устройство и делает выборки всех каналов.
+        read_table() - чтение таблицы со страницы, возвращает {имя: {'type', 'address'}};
+        без него сверяются только API и WebSocket.
+    """
+
+    def __init__(self, api: ApiClient, base_url: str, read_table: Optional[Callable[[], Dict[str, dict]]] = None,
+                 connect_timeout: float = 10):
+        self.api = api
+        self.base_url = base_url
+        self.read_table = read_table
+        self.connect_timeout = connect_timeout
+        self.watchers = {}
+        self.tracker = ConsistencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+    def __enter__(self):
+        for address in self.api.get_devices_addresses().values():
+            self.watchers[address] = FrameWatcher(self.base_url, address, self.connect_timeout).start()
+        return self
+
+    def __exit__(self, *exc):
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self._executor.shutdown()
+
+    def _read_api(self):
+        devices = self.api.get_devices()
+        return {device['name']: device for device in devices}, time.time()
+
+    def _read_table(self):
+        table = self.read_table()
+        return table, time.time()
+
+    def sample(self) -> ChannelSnapshot:
+        started = time.time()
+        api_future = self._executor.submit(self._read_api)
+        table_future = self._executor.submit(self._read_table) if self.read_table is not None else None
+        ws = {address: watcher.latest() for address, watcher in self.watchers.items()}
+        api, api_time = api_future.result()
+        table, table_time = table_future.result() if table_future is not None else (None, None)
+        snapshot = ChannelSnapshot(started, api, api_time, ws, table, table_time)
+        self.tracker.add(snapshot)
+        return snapshot
+
+    def run(self, samples: int, interval: float) -> ConsistencyTracker:
+        for i in range(samples):
+            started = time.monotonic()
+            self.sample()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        return self.tracker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сверка состояния устройств в API и мониторинге')
+    parser.add_argument('--url', default=DEFAULT_PLATFORM_URL, help='адрес платформы')
+    parser.add_argument('--samples', type=int, default=60, help='количество выборок')
+    parser.add_argument('--interval', type=float, default=0.5, help='период выборок, секунды')
+    parser.add_argument('-o', '--output', help='файл для временного ряда в JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    api = ApiClient(args.url)
+    try:
+        with ConsistencySampler(api, args.url) as sampler:
+            tracker = sampler.run(args.samples, args.interval)
+    finally:
+        api.close()
+    text = json.dumps({'platform_url': args.url, 'summary': tracker.summary(), 'series': tracker.series}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
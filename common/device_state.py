@@ -0,0 +1,107 @@
+from typing import Dict, Optional
+
+from common.rules import parse_duty, parse_freq
+
+patch_fields = {
+    'duty1': ('pin_1_pwm_d', parse_duty),
+    'freq1': ('pin_1_pwm_f', parse_freq),
+    'duty2': ('pin_2_pwm_d', parse_duty),
+    'freq2': ('pin_2_pwm_f', parse_freq),
+}
+state_fields = [field for field, _ in patch_fields.values()]
+
+
+class DeviceStateModel:
+    """
+        Ожидаемое состояние парка устройств.
+
+        Список устройств загружается один раз. Каждый PATCH через patch() применяется к модели
+        по правилам валидации (common/rules.py), поэтому для проверки достаточно одного чтения
+        после изменения, а не чтения до и после. После каждого чтения модель синхронизируется
+        с фактическим состоянием, чтобы одно расхождение не ломало следующие тесты.
+
+        shared=True - парк одновременно меняют другие процессы (pytest-xdist): fleet_diff()
+        сверяет только устройства, которые менялись через эту модель.
+    """
+
+    def __init__(self, api, shared=False):
+        self.api = api
+        self.shared = shared
+        self.owned = set()
+        self.expected = {}
+        self.addresses = {}
+        self.actual = {}
+        self.load()
+
+    def load(self):
+        devices = self.api.get_devices()
+        self.expected = {device['address']: dict(device) for device in devices}
+        self.addresses = {device['name']: device['address'] for device in devices}
+        self.actual = {address: dict(device) for address, device in self.expected.items()}
+
+    def address(self, name: str) -> str:
+        return self.addresses[name]
+
+    def expected_state(self, name: str, fresh: bool = False) -> dict:
+        """
+            fresh=True - сначала перечитать устройство: модель загружена один раз за сессию, а между тестами
+            устройство могли менять тесты frontend/, бенчмарки и тесты конкуренции (их порядок зависит
+            от --schedule и -n). Нужно, когда проверка сравнивает с предыдущим значением.
+        """
+        address = self.address(name)
+        if fresh:
+            actual = self.read(name)
+            if actual is not None:
+                self.expected[address] = dict(actual)
+        return dict(self.expected[address])
+
+    def patch(self, name: str, **values):
+        """
+            Отправляет PATCH и, если платформа ответила 200, применяет к модели ожидаемый результат:
+            допустимые значения меняются, недопустимые игнорируются.
+        """
+        address = self.address(name)
+        self.owned.add(name)
+        response = self.api.patch_device(address, **values)
+        if response.status_code == 200:
+            device = self.expected[address]
+            for key, value in values.items():
+                field, parse = patch_fields[key]
+                parsed = parse(value)
+                if parsed is not None:
+                    device[field] = parsed
+        return response
+
+    def read(self, name: Optional[str] = None) -> Optional[dict]:
+        """
+            Одно чтение состояния всего парка. Возвращает фактическое состояние устройства name.
+        """
+        self.actual = {device['address']: device for device in self.api.get_devices()}
+        return self.actual.get(self.address(name)) if name is not None else None
+
+    def fleet_diff(self, exclude: Optional[str] = None) -> Dict[str, dict]:
+        """
+            Расхождения последнего прочитанного состояния с ожидаемым по всему парку:
+            {имя: {поле: (ожидаемое, фактическое)}}. Отсутствующее устройство - {'device': ('present', None)}.
+            После сравнения модель принимает фактическое состояние.
+        """
+        diff = {}
+        for name, address in self.addresses.items():
+            if name == exclude or (self.shared and name not in self.owned):
+                continue
+            expected = self.expected[address]
+            actual = self.actual.get(address)
+            if actual is None:
+                diff[name] = {'device': ('present', None)}
+                continue
+            fields = {field: (expected[field], actual.get(field))
+                      for field in state_fields if expected[field] != actual.get(field)}
+            if fields:
+                diff[name] = fields
+        self.sync()
+        return diff
+
+    def sync(self):
+        for address, device in self.actual.items():
+            if address in self.expected:
+                self.expected[address] = dict(device)
@@ -0,0 +1,39 @@
+"""
+    Ожидаемая длительность тестов по истории производительности (common.perf_history):
+    медиана за последние --schedule-history запусков на той же платформе, для тестов
+    без истории - медиана по остальным. Нужна для порядка запуска и бюджета времени
+    (scheduling_plugin) и для раскладки тестов по процессам xdist (sharding_plugin).
+"""
+
+import statistics
+
+import pytest
+
+from common.perf_history import PerfHistory, history_path
+from common.platform_plugin import platform_identity
+
+durations_key = pytest.StashKey[dict]()
+
+
+def expected_durations(config):
+    """
+        {nodeid: ожидаемая длительность, секунды}. История читается один раз за сессию.
+    """
+    state = config.stash.get(durations_key, None)
+    if state is None:
+        path = history_path(config)
+        durations = {}
+        if path is not None and path.exists():
+            history = PerfHistory(path)
+            try:
+                durations = history.test_durations(config.getoption('--schedule-history'), platform_identity(config))
+            finally:
+                history.close()
+        state = {'durations': durations, 'default': statistics.median(durations.values()) if durations else 0.0}
+        config.stash[durations_key] = state
+    return state['durations']
+
+
+def expected_duration(config, nodeid):
+    durations = expected_durations(config)
+    return durations.get(nodeid, config.stash[durations_key]['default'])
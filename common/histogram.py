@@ -0,0 +1,95 @@
+import math
+
+
+class LatencyHistogram:
+    """
+        Гистограмма задержек в духе HdrHistogram: значения хранятся в микросекундах
+        в лог-линейных корзинах, поэтому относительная погрешность не превышает
+        10^-significant_digits при любом диапазоне значений, а память не зависит от числа замеров.
+    """
+
+    def __init__(self, significant_digits=2):
+        self.significant_digits = significant_digits
+        self._bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_buckets = 1 << self._bits
+        self._half = self._sub_buckets >> 1
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self._bits
+        return self._sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _bounds(self, index):
+        """
+            Диапазон значений [low, high) корзины с номером index.
+        """
+        if index < self._sub_buckets:
+            return index, index + 1
+        shift = (index - self._sub_buckets) // self._half + 1
+        top = (index - self._sub_buckets) % self._half + self._half
+        return top << shift, (top + 1) << shift
+
+    def record(self, seconds):
+        value = max(0, int(round(seconds * 1_000_000)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        """
+            Значение перцентиля p (0-100) в секундах, nan для пустой гистограммы.
+        """
+        if not self.count:
+            return float('nan')
+        # round: 20000 * 99.9 / 100 в float чуть больше 19980, и ceil дал бы следующий ранг
+        target = max(1, math.ceil(round(self.count * p / 100, 9)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                low, high = self._bounds(index)
+                value = min(high - 1, self.max)
+                return max(value, self.min) / 1_000_000
+        return self.max / 1_000_000
+
+    @property
+    def mean(self):
+        return self.total / self.count / 1_000_000 if self.count else float('nan')
+
+    def summary(self, percentiles=(50, 90, 95, 99, 99.9)):
+        """
+            Сводка в миллисекундах.
+        """
+        summary = {'count': self.count}
+        if not self.count:
+            return summary
+        summary['min_ms'] = self.min / 1000
+        summary['mean_ms'] = self.mean * 1000
+        for p in percentiles:
+            summary[f'p{p:g}_ms'] = self.percentile(p) * 1000
+        summary['max_ms'] = self.max / 1000
+        return summary
+
+    def to_dict(self):
+        return {'significant_digits': self.significant_digits, 'unit': 'us',
+                'buckets': {str(self._bounds(index)[0]): count for index, count in sorted(self.counts.items())},
+                'summary': self.summary()}
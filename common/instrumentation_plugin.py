@@ -0,0 +1,341 @@
+"""
+    pytest-плагин инструментирования (--instrument): на что уходит время каждого теста.
+
+    На время сессии оборачиваются:
+    - requests.Session.request - все запросы к API (ApiClient, requests.get в тестах);
+    - aiohttp.ClientSession._request - асинхронные запросы: отчеты /report (report_client, кэш отчетов)
+      и PATCH стресс-теста (patch_stress). Время - до получения заголовков ответа;
+    - websockets.connect и websockets.sync.client.connect - подключения к мониторингу;
+    - WebDriver.execute - каждая команда WebDriver, то есть все вызовы BasePage и поиски по Locators,
+      и Service.start - запуск chromedriver;
+    - time.sleep.
+
+    Каждый вызов относится к категории:
+    server - HTTP и подключение WebSocket (задержка платформы), browser_startup - запуск chromedriver и
+    новой сессии, navigation - get/back/refresh, dom_lookup - поиск элементов, wait - ожидания
+    execute_async_script (MutationObserver) и time.sleep, webdriver - остальные команды.
+    Что не покрыто вызовами, остается в other - код теста и фикстур.
+
+    Учитываются только вызовы из основного потока pytest: фоновые потоки бенчмарков и симулятора
+    работают параллельно и не складываются со временем теста. Вложенные вызовы (sleep внутри
+    Service.start) относятся к внешнему. Асинхронные запросы и подключения идут одновременно
+    в одном потоке, поэтому учитываются все, а перекрытия убирает TestTiming.by_category.
+
+    Результаты - сводка в конце сессии, --instrument-json и --instrument-trace (Chrome trace,
+    открывается в chrome://tracing или Perfetto).
+"""
+
+import functools
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pytest
+
+instrumentation_key = pytest.StashKey['Instrumentation']()
+
+categories = ['server', 'browser_startup', 'navigation', 'dom_lookup', 'wait', 'webdriver', 'other']
+
+webdriver_categories = {
+    'newSession': 'browser_startup',
+    'get': 'navigation', 'goBack': 'navigation', 'goForward': 'navigation', 'refresh': 'navigation',
+    'findElement': 'dom_lookup', 'findElements': 'dom_lookup',
+    'findChildElement': 'dom_lookup', 'findChildElements': 'dom_lookup',
+    'executeAsyncScript': 'wait', 'w3cExecuteScriptAsync': 'wait',
+}
+
+
+@dataclass
+class Call:
+    category: str
+    name: str
+    started: float
+    duration: float
+
+
+@dataclass
+class TestTiming:
+    nodeid: str
+    started: float
+    wall: float = 0.0
+    calls: List[Call] = field(default_factory=list)
+
+    def by_category(self) -> Dict[str, dict]:
+        """
+            Время по категориям. Одновременные вызовы (asyncio.gather подключений к мониторингу)
+            перекрываются, поэтому время категории - длина объединения интервалов, а не сумма.
+        """
+        result = {}
+        end = {}
+        for call in sorted(self.calls, key=lambda call: call.started):
+            entry = result.setdefault(call.category, {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            finished = call.started + call.duration
+            covered_until = max(end.get(call.category, call.started), call.started)
+            entry['seconds'] += max(0.0, finished - covered_until)
+            end[call.category] = max(covered_until, finished)
+        covered = sum(entry['seconds'] for entry in result.values())
+        result['other'] = {'count': 0, 'seconds': max(0.0, self.wall - covered)}
+        return result
+
+    def slowest(self, n: int) -> List[dict]:
+        return [{'category': call.category, 'name': call.name, 'seconds': call.duration}
+                for call in sorted(self.calls, key=lambda call: call.duration, reverse=True)[:n]]
+
+
+class Instrumentation:
+    """
+        Обертки над вызовами и журнал вызовов по тестам. install() / uninstall() ставят и снимают обертки.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.tests: List[TestTiming] = []
+        self.current = None
+        self._main_thread = threading.get_ident()
+        self._local = threading.local()
+        self._patches = []
+        self.worker_results = {}
+
+    def record(self, category, name, started, duration):
+        if self.current is not None:
+            self.current.calls.append(Call(category, name, started - self.origin, duration))
+
+    def _should_record(self):
+        return threading.get_ident() == self._main_thread and not getattr(self._local, 'depth', 0)
+
+    def timed(self, category_of):
+        """
+            Декоратор: category_of(*args, **kwargs) -> (категория, имя вызова).
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self._should_record():
+                    return func(*args, **kwargs)
+                self._local.depth = 1
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    duration = time.perf_counter() - started
+                    self._local.depth = 0
+                    self.record(*category_of(*args, **kwargs), started, duration)
+            return wrapper
+        return decorator
+
+    def patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        self._patches.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    def install(self):
+        import aiohttp
+        import requests
+        import websockets
+        import websockets.sync.client
+        from selenium.webdriver.common.service import Service
+        from selenium.webdriver.remote.webdriver import WebDriver
+
+        import common.ws_monitor
+
+        self.patch(requests.Session, 'request',
+                   self.timed(lambda session, method, url, *args, **kwargs: ('server', f'{method} {url}')))
+        self.patch(WebDriver, 'execute', self.timed(self._webdriver_call))
+        self.patch(Service, 'start', self.timed(lambda service, *args, **kwargs: ('browser_startup', 'chromedriver')))
+        self.patch(time, 'sleep', self.timed(lambda seconds: ('wait', 'time.sleep')))
+
+        sync_connect = self.timed(lambda uri, *args, **kwargs: ('server', f'WS {uri}'))
+        self.patch(websockets.sync.client, 'connect', sync_connect)
+        self.patch(common.ws_monitor, 'connect', sync_connect)
+        self.patch(websockets, 'connect', self._async_connect)
+        self.patch(aiohttp.ClientSession, '_request', self._async_request)
+
+    def _async_connect(self, connect):
+        instrumentation = self
+
+        class TimedConnect(connect):
+            async def __aenter__(self):
+                record = instrumentation._should_record()
+                started = time.perf_counter()
+                try:
+                    return await super().__aenter__()
+                finally:
+                    if record:
+                        instrumentation.record('server', f'WS {self.uri}', started, time.perf_counter() - started)
+
+        return TimedConnect
+
+    def _async_request(self, request):
+        instrumentation = self
+
+        @functools.wraps(request)
+        async def wrapper(session, method, url, *args, **kwargs):
+            record = instrumentation._should_record()
+            started = time.perf_counter()
+            try:
+                return await request(session, method, url, *args, **kwargs)
+            finally:
+                if record:
+                    instrumentation.record('server', f'{method} {url}', started, time.perf_counter() - started)
+
+        return wrapper
+
+    @staticmethod
+    def _webdriver_call(driver, command, params=None):
+        category = webdriver_categories.get(command, 'webdriver')
+        name = command
+        if params and 'value' in params and category == 'dom_lookup':
+            name = f"{command} {params.get('using', '')}={params['value']}"
+        elif params and 'url' in params:
+            name = f"{command} {params['url']}"
+        return category, name
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+
+    def totals(self) -> Dict[str, dict]:
+        totals = {category: {'count': 0, 'seconds': 0.0} for category in categories}
+        for test in self.tests:
+            for category, entry in test.by_category().items():
+                totals[category]['count'] += entry['count']
+                totals[category]['seconds'] += entry['seconds']
+        return totals
+
+    def to_dict(self, slowest: int) -> dict:
+        return {
+            'totals': self.totals(),
+            'tests': {test.nodeid: {'wall': test.wall, 'categories': test.by_category(),
+                                    'slowest': test.slowest(slowest)} for test in self.tests},
+        }
+
+    def chrome_trace(self, pid: int = 1) -> dict:
+        """
+            Формат Trace Event: тест - событие верхнего уровня, вызовы внутри него - вложенные события.
+        """
+        events = []
+        for test in self.tests:
+            events.append({'name': test.nodeid, 'cat': 'test', 'ph': 'X', 'pid': pid, 'tid': 1,
+                           'ts': test.started * 1e6, 'dur': test.wall * 1e6})
+            for call in test.calls:
+                events.append({'name': call.name, 'cat': call.category, 'ph': 'X', 'pid': pid, 'tid': 1,
+                               'ts': call.started * 1e6, 'dur': call.duration * 1e6})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('instrument', 'Инструментирование тестов')
+    group.addoption('--instrument', action='store_true',
+                    help='Замерять вызовы HTTP, WebSocket, WebDriver и time.sleep в каждом тесте')
+    group.addoption('--instrument-slowest', type=int, default=5, help='Сколько самых медленных вызовов хранить на тест')
+    group.addoption('--instrument-json', metavar='PATH', help='Сохранить замеры по тестам в JSON')
+    group.addoption('--instrument-trace', metavar='PATH', help='Сохранить замеры в формате Chrome trace')
+
+
+def pytest_configure(config):
+    if config.getoption('--instrument') or config.getoption('--instrument-json') \
+            or config.getoption('--instrument-trace'):
+        instrumentation = Instrumentation()
+        instrumentation.install()
+        config.stash[instrumentation_key] = instrumentation
+
+
+def pytest_unconfigure(config):
+    instrumentation = config.stash.get(instrumentation_key, None)
+    if instrumentation is not None:
+        instrumentation.uninstall()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    instrumentation = item.config.stash.get(instrumentation_key, None)
+    if instrumentation is None:
+        yield
+        return
+    started = time.perf_counter()
+    instrumentation.current = TestTiming(item.nodeid, started - instrumentation.origin)
+    try:
+        yield
+    finally:
+        instrumentation.current.wall = time.perf_counter() - started
+        instrumentation.tests.append(instrumentation.current)
+        instrumentation.current = None
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+        При запуске с -n тесты идут в процессах xdist: их замеры приходят через workeroutput.
+    """
+    instrumentation = node.config.stash.get(instrumentation_key, None)
+    output = getattr(node, 'workeroutput', {}).get('instrumentation')
+    if instrumentation is not None and output is not None:
+        instrumentation.worker_results[node.gateway.id] = output
+
+
+def _output_path(config, path):
+    """
+        При запуске с -n каждый процесс пишет свой файл: <path>.<gw0>.
+    """
+    worker = getattr(config, 'workerinput', {}).get('workerid')
+    return f'{path}.{worker}' if worker else path
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    instrumentation = config.stash.get(instrumentation_key, None)
+    if instrumentation is None or not instrumentation.tests:
+        return
+    result = instrumentation.to_dict(config.getoption('--instrument-slowest'))
+    if hasattr(config, 'workeroutput'):
+        config.workeroutput['instrumentation'] = result
+    path = config.getoption('--instrument-json')
+    if path:
+        with open(_output_path(config, path), 'w') as f:
+            json.dump(result, f, indent=2)
+    path = config.getoption('--instrument-trace')
+    if path:
+        with open(_output_path(config, path), 'w') as f:
+            json.dump(instrumentation.chrome_trace(), f)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    instrumentation = config.stash.get(instrumentation_key, None)
+    if instrumentation is None:
+        return
+    results = list(instrumentation.worker_results.values())
+    if instrumentation.tests:
+        results.append(instrumentation.to_dict(config.getoption('--instrument-slowest')))
+    if not results:
+        return
+    totals = {category: {'count': 0, 'seconds': 0.0} for category in categories}
+    tests = {}
+    for result in results:
+        for category, entry in result['totals'].items():
+            totals[category]['count'] += entry['count']
+            totals[category]['seconds'] += entry['seconds']
+        tests.update(result['tests'])
+    wall = sum(test['wall'] for test in tests.values())
+
+    terminalreporter.write_sep('-', 'time attribution')
+    for category in categories:
+        entry = totals[category]
+        share = entry['seconds'] / wall * 100 if wall else 0.0
+        terminalreporter.write_line(f"{category:<16} {entry['seconds']:9.2f} s {share:5.1f}%  calls={entry['count']}")
+    terminalreporter.write_line(f"{'total':<16} {wall:9.2f} s")
+
+    for nodeid, test in sorted(tests.items(), key=lambda item: item[1]['wall'], reverse=True)[:5]:
+        parts = ', '.join(f"{category} {entry['seconds']:.2f}" for category, entry in test['categories'].items()
+                          if entry['seconds'] >= 0.005)
+        terminalreporter.write_line(f"{test['wall']:7.2f} s {nodeid} ({parts})")
+        for call in test['slowest'][:3]:
+            terminalreporter.write_line(f"            {call['seconds'] * 1000:8.1f} ms {call['category']:<15} {call['name']}")
+    for option in ('--instrument-json', '--instrument-trace'):
+        path = config.getoption(option)
+        if path:
+            suffix = ' (по файлу на процесс xdist)' if instrumentation.worker_results else ''
+            terminalreporter.write_line(f'{option[2:]}: {path}{suffix}')
@@ -0,0 +1,22 @@
+"""
+    nodeid тестов при запуске с pytest-xdist: при --dist loadgroup xdist дописывает к nodeid
+    суффикс "@<группа>" (он же попадает в отчеты основного процесса и в lastfailed).
+"""
+
+
+def strip_group(nodeid):
+    """
+        nodeid без суффикса "@<группа>". "@" внутри параметров [...] не трогается.
+    """
+    head, _, tail = nodeid.rpartition('@')
+    return head if head and ']' not in tail and '::' not in tail else nodeid
+
+
+def base_nodeid(report):
+    """
+        nodeid отчета о тесте без суффикса группы. Суффикс есть только у отчетов,
+        пришедших от процессов xdist (у них заполнен report.node).
+    """
+    if getattr(report, 'node', None) is not None:
+        return strip_group(report.nodeid)
+    return report.nodeid
@@ -0,0 +1,284 @@
+"""
+    Стресс-тест одновременной записи PATCH /devices.
+
+    concurrency асинхронных писателей отправляют PATCH с duty1/freq1/duty2/freq2 в одно устройство
+    (mode='one') или по кругу во все (mode='many'). Каждый запрос несет свою, нигде больше
+    не повторяющуюся четверку значений, поэтому любое наблюдаемое состояние можно сопоставить с запросом:
+    - torn (разорванная запись) - состояние, которого не отправлял ни один запрос, например duty
+      из одного запроса и freq из другого. Состояния берутся из ответов PATCH, из периодических
+      GET /devices во время нагрузки и из итогового GET;
+    - lost (потерянная запись) - итоговое состояние устройства не может быть результатом последней
+      записи: оно от запроса, который завершился раньше, чем начался другой успешный запрос.
+
+    Ступени concurrency повышаются, пока не появятся ошибки или p95 не превысит бюджет;
+    устойчивая скорость записи - лучшая ступень без ошибок, torn и lost.
+
+    Запуск:  python -m common.patch_stress --url http://0.0.0.0:5585 --mode one --max-concurrency 64 -o stress.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from common.api_client import ApiClient, DEFAULT_PLATFORM_URL
+from common.device_state import state_fields
+from common.histogram import LatencyHistogram
+from common.rules import valid_freqs
+
+State = Tuple[int, int, int, int]
+patch_keys = ['duty1', 'freq1', 'duty2', 'freq2']
+
+
+def state_of(device: dict) -> Optional[State]:
+    try:
+        return tuple(device[f] for f in state_fields)
+    except (KeyError, TypeError):
+        return None
+
+
+def unique_states(seed: int = 0):
+    """
+        Поток разных допустимых четверок (duty1, freq1, duty2, freq2), все 826281 без повторов.
+        Номер k переставляется как (a * k + seed) mod total с a, взаимно простым с total,
+        поэтому от запроса к запросу меняются все четыре поля и смешение полей двух запросов видно.
+    """
+    total = 101 * len(valid_freqs) * 101 * len(valid_freqs)
+    step = 500009
+    for k in itertools.count():
+        n = (step * k + seed) % total
+        n, duty1 = divmod(n, 101)
+        n, freq1 = divmod(n, len(valid_freqs))
+        n, duty2 = divmod(n, 101)
+        yield duty1, valid_freqs[freq1], duty2, valid_freqs[n]
+
+
+@dataclass
+class Write:
+    address: str
+    state: State
+    started: float
+    finished: float = 0.0
+    status: Optional[int] = None
+    response_state: Optional[State] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    duration: float
+    writes: List[Write] = field(default_factory=list)
+    observations: List[Tuple[float, str, State]] = field(default_factory=list)
+    initial: Dict[str, State] = field(default_factory=dict)
+    final: Dict[str, State] = field(default_factory=dict)
+
+    def latency_histogram(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for write in self.writes:
+            if write.status == 200:
+                histogram.record(write.finished - write.started)
+        return histogram
+
+    def analyze(self, samples: int = 10) -> dict:
+        ok = [write for write in self.writes if write.status == 200]
+        errors = [write for write in self.writes if write.status != 200]
+
+        sent = {}
+        for write in self.writes:
+            sent.setdefault(write.address, set()).add(write.state)
+        torn = []
+        observed = [(w.finished, w.address, w.response_state, 'patch') for w in ok if w.response_state is not None]
+        observed += [(t, address, state, 'get') for t, address, state in self.observations]
+        observed += [(None, address, state, 'final') for address, state in self.final.items()]
+        for t, address, state, source in observed:
+            if address not in sent:
+                continue
+            if state not in sent[address] and state != self.initial.get(address):
+                torn.append({'address': address, 'state': state, 'source': source, 't': t})
+
+        lost = []
+        by_address = {}
+        for write in ok:
+            by_address.setdefault(write.address, []).append(write)
+        for address, writes in by_address.items():
+            last_start = max(w.started for w in writes)
+            candidates = {w.state for w in writes if w.finished >= last_start}
+            final = self.final.get(address)
+            if final not in candidates:
+                lost.append({'address': address, 'final': final,
+                             'candidates': len(candidates), 'writes': len(writes)})
+
+        return {
+            'concurrency': self.concurrency,
+            'writes': len(ok),
+            'writes_per_second': len(ok) / self.duration if self.duration else 0.0,
+            'errors': len(errors),
+            'error_samples': [{'address': w.address, 'status': w.status, 'error': w.error} for w in errors[:samples]],
+            'latency': self.latency_histogram().summary(),
+            'torn': len(torn),
+            'torn_samples': torn[:samples],
+            'lost': len(lost),
+            'lost_samples': lost[:samples],
+        }
+
+
+async def _get_states(session, base_url) -> Dict[str, State]:
+    async with session.get(f'{base_url}/devices') as response:
+        return {device['address']: state_of(device) for device in await response.json()}
+
+
+async def run_level(base_url: str, addresses: List[str], concurrency: int, duration: float,
+                    read_interval: float = 0.05, seed: int = 0) -> LevelResult:
+    """
+        Одна ступень: concurrency писателей в течение duration секунд и один читатель GET /devices.
+    """
+    base_url = base_url.rstrip('/')
+    result = LevelResult(concurrency, duration)
+    states = unique_states(seed)
+    targets = itertools.cycle(addresses)
+    connector = aiohttp.TCPConnector(limit=concurrency + 1)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30)) as session:
+        result.initial = await _get_states(session, base_url)
+        deadline = time.monotonic() + duration
+
+        async def writer():
+            while time.monotonic() < deadline:
+                write = Write(next(targets), next(states), time.time())
+                params = dict(zip(patch_keys, write.state), address=write.address)
+                try:
+                    async with session.patch(f'{base_url}/devices', params=params) as response:
+                        write.status = response.status
+                        try:
+                            write.response_state = state_of(await response.json(content_type=None))
+                        except ValueError:
+                            pass
+                except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                    write.error = f'{type(ex).__name__}: {ex}'
+                write.finished = time.time()
+                result.writes.append(write)
+
+        async def reader():
+            while time.monotonic() < deadline:
+                try:
+                    observed = await _get_states(session, base_url)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                    observed = {}
+                now = time.time()
+                result.observations.extend((now, address, state) for address, state in observed.items()
+                                           if address in addresses)
+                await asyncio.sleep(read_interval)
+
+        started = time.monotonic()
+        await asyncio.gather(reader(), *(writer() for _ in range(concurrency)))
+        result.duration = time.monotonic() - started
+        result.final = {address: state for address, state in (await _get_states(session, base_url)).items()
+                        if address in addresses}
+    return result
+
+
+async def read_states(base_url: str) -> Dict[str, State]:
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        return await _get_states(session, base_url.rstrip('/'))
+
+
+async def restore(base_url: str, initial: Dict[str, State]):
+    async with aiohttp.ClientSession() as session:
+        for address, state in initial.items():
+            if state is not None:
+                params = dict(zip(patch_keys, state), address=address)
+                async with session.patch(f'{base_url.rstrip("/")}/devices', params=params):
+                    pass
+
+
+def concurrency_levels(max_concurrency: int) -> List[int]:
+    """
+        Ступени 1, 2, 4, ... меньше max_concurrency и сама max_concurrency.
+    """
+    levels = []
+    concurrency = 1
+    while concurrency < max_concurrency:
+        levels.append(concurrency)
+        concurrency *= 2
+    levels.append(max_concurrency)
+    return levels
+
+
+def run_stress(base_url: str, addresses: List[str], levels: List[int], duration: float,
+               p95_budget_ms: float = 1000.0, log=None, on_level=None) -> dict:
+    """
+        Ступени нагрузки по очереди, пока нет ошибок и p95 укладывается в бюджет.
+        on_level получает LevelResult каждой ступени. Исходное состояние устройств
+        читается до первой ступени и восстанавливается в конце, даже если ступень упала.
+    """
+    report = []
+    initial = asyncio.run(read_states(base_url))
+    try:
+        for concurrency in levels:
+            level = asyncio.run(run_level(base_url, addresses, concurrency, duration))
+            if on_level is not None:
+                on_level(level)
+            summary = level.analyze()
+            report.append(summary)
+            if log is not None:
+                log(summary)
+            if summary['errors'] or summary['latency'].get('p95_ms', 0) > p95_budget_ms:
+                break
+    finally:
+        asyncio.run(restore(base_url, {a: s for a, s in initial.items() if a in addresses}))
+    clean = [level for level in report
+             if not level['errors'] and not level['torn'] and not level['lost']
+             and level['latency'].get('p95_ms', 0) <= p95_budget_ms]
+    best = max(clean, key=lambda level: level['writes_per_second'], default=None)
+    return {
+        'levels': report,
+        'sustained_writes_per_second': best['writes_per_second'] if best else 0.0,
+        'sustained_concurrency': best['concurrency'] if best else None,
+    }
+
+
+def print_level(level):
+    latency = level['latency']
+    print(f"{level['concurrency']:>4} writers | {level['writes_per_second']:8.1f} w/s | "
+          f"p50/p95 {latency.get('p50_ms', float('nan')):7.1f} {latency.get('p95_ms', float('nan')):7.1f} ms | "
+          f"errors {level['errors']:>4} torn {level['torn']:>4} lost {level['lost']:>3}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Стресс-тест одновременных PATCH /devices')
+    parser.add_argument('--url', default=DEFAULT_PLATFORM_URL, help='адрес платформы')
+    parser.add_argument('--mode', choices=['one', 'many'], default='one',
+                        help='one - все писатели в одно устройство, many - по кругу во все')
+    parser.add_argument('--address', action='append', help='адрес устройства (по умолчанию все из /devices)')
+    parser.add_argument('--max-concurrency', type=int, default=32, help='максимум одновременных писателей')
+    parser.add_argument('--duration', type=float, default=5, help='длительность ступени, секунды')
+    parser.add_argument('--p95-budget', type=float, default=1000, help='бюджет p95 в миллисекундах')
+    parser.add_argument('-o', '--output', help='файл для результатов в JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    addresses = args.address
+    if not addresses:
+        client = ApiClient(args.url)
+        addresses = list(client.get_devices_addresses().values())
+        client.close()
+    if args.mode == 'one':
+        addresses = addresses[:1]
+
+    result = run_stress(args.url, addresses, concurrency_levels(args.max_concurrency), args.duration, args.p95_budget, log=print_level)
+    result.update({'platform_url': args.url, 'mode': args.mode, 'addresses': addresses})
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
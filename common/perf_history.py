@@ -0,0 +1,225 @@
+"""
+    История замеров производительности в SQLite и поиск регрессий между запусками.
+
+    Каждый запуск тестов добавляет строку в runs (время, сборка платформы --platform-build, платформа:
+    адрес или 'simulator' / 'replay:<кассета>')
+    и замеры в samples: метрика, значение в секундах и вес (число замеров в корзине гистограммы).
+    Все метрики - длительности, меньше - лучше: задержки endpoint'ов, интервалы между кадрами
+    мониторинга, загрузка страниц, задержки распространения, длительность каждого теста (test:<nodeid>).
+
+    compare сравнивает запуск (по умолчанию последний) со скользящей базой - предыдущими baseline
+    запусками (той же сборки и платформы, если они заданы): метрика - регрессия, если медиана выросла больше чем на min_change, и U-критерий
+    Манна-Уитни отвергает "не медленнее" на уровне alpha. Для метрик с одним значением на запуск
+    (длительность теста) значимость достижима, только если в базе хотя бы 1 / alpha - 1 запусков.
+
+    Запуск:  python -m common.perf_history runs
+             python -m common.perf_history compare --baseline 5 --min-change 0.2
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.stats import mann_whitney_u
+
+default_db = Path('.pytest_cache') / 'd' / 'perf' / 'history.sqlite'
+
+schema = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started REAL NOT NULL,
+        build TEXT,
+        platform_url TEXT
+    );
+    CREATE TABLE IF NOT EXISTS samples (
+        run_id INTEGER NOT NULL REFERENCES runs(id),
+        metric TEXT NOT NULL,
+        value REAL NOT NULL,
+        weight INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE INDEX IF NOT EXISTS samples_metric ON samples (metric, run_id);
+"""
+
+Samples = List[Tuple[float, int]]
+
+
+def history_path(config) -> Optional[Path]:
+    """
+        Файл истории для запуска pytest: --perf-db, иначе history.sqlite в кэше pytest
+        (<rootdir>/.pytest_cache/d/perf). Без кэша pytest (-p no:cacheprovider) и без --perf-db - None:
+        история не пишется и не читается, каталог запуска не засоряется.
+    """
+    if config.getoption('--perf-db'):
+        return Path(config.getoption('--perf-db'))
+    cache = getattr(config, 'cache', None)
+    return cache.mkdir('perf') / 'history.sqlite' if cache is not None else None
+
+
+def weighted_median(samples: Samples) -> float:
+    total = sum(weight for _, weight in samples)
+    if not total:
+        return float('nan')
+    seen = 0
+    for value, weight in sorted(samples):
+        seen += weight
+        if seen * 2 >= total:
+            return value
+    return samples[-1][0]
+
+
+class PerfHistory:
+
+    def __init__(self, path=default_db):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.executescript(schema)
+
+    def close(self):
+        self.db.close()
+
+    def add_run(self, metrics: Dict[str, Iterable], build: Optional[str] = None,
+                platform_url: Optional[str] = None, started: Optional[float] = None) -> int:
+        """
+            metrics - {метрика: [значение или (значение, вес), ...]}. Возвращает id запуска.
+        """
+        with self.db:
+            cursor = self.db.execute('INSERT INTO runs (started, build, platform_url) VALUES (?, ?, ?)',
+                                     (started or time.time(), build, platform_url))
+            run_id = cursor.lastrowid
+            self.db.executemany('INSERT INTO samples (run_id, metric, value, weight) VALUES (?, ?, ?, ?)',
+                                ((run_id, metric, *(value if isinstance(value, (tuple, list)) else (value, 1)))
+                                 for metric, values in metrics.items() for value in values))
+        return run_id
+
+    def runs(self, limit: int = 20) -> List[dict]:
+        rows = self.db.execute('SELECT r.id, r.started, r.build, r.platform_url, COUNT(DISTINCT s.metric) '
+                               'FROM runs r LEFT JOIN samples s ON s.run_id = r.id '
+                               'GROUP BY r.id ORDER BY r.id DESC LIMIT ?', (limit,)).fetchall()
+        return [{'id': row[0], 'started': row[1], 'build': row[2], 'platform_url': row[3], 'metrics': row[4]}
+                for row in rows]
+
+    def samples(self, run_ids: List[int]) -> Dict[str, Samples]:
+        result = {}
+        if not run_ids:
+            return result
+        placeholders = ','.join('?' * len(run_ids))
+        for metric, value, weight in self.db.execute(
+                f'SELECT metric, value, weight FROM samples WHERE run_id IN ({placeholders})', run_ids):
+            result.setdefault(metric, []).append((value, weight))
+        return result
+
+    def test_durations(self, last_runs: int = 10, platform_url: Optional[str] = None) -> Dict[str, float]:
+        """
+            Медианная длительность каждого теста (метрики test:<nodeid>) за последние last_runs запусков
+            (только платформы platform_url, если задана).
+        """
+        query = 'SELECT id FROM runs'
+        params = []
+        if platform_url is not None:
+            query += ' WHERE platform_url = ?'
+            params.append(platform_url)
+        run_ids = [row[0] for row in self.db.execute(query + ' ORDER BY id DESC LIMIT ?', (*params, last_runs))]
+        return {metric[len('test:'):]: weighted_median(samples)
+                for metric, samples in self.samples(run_ids).items() if metric.startswith('test:')}
+
+    def baseline_runs(self, run_id: int, baseline: int, build: Optional[str] = None,
+                      platform_url: Optional[str] = None) -> List[int]:
+        query = 'SELECT id FROM runs WHERE id < ?'
+        params = [run_id]
+        if build is not None:
+            query += ' AND build = ?'
+            params.append(build)
+        if platform_url is not None:
+            query += ' AND platform_url = ?'
+            params.append(platform_url)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(baseline)
+        return [row[0] for row in self.db.execute(query, params)]
+
+    def compare(self, run_id: Optional[int] = None, baseline: int = 5, alpha: float = 0.01,
+                min_change: float = 0.1, baseline_build: Optional[str] = None,
+                baseline_platform: Optional[str] = None) -> dict:
+        """
+            Сравнивает запуск run_id с предыдущими baseline запусками
+            (только сборки baseline_build и платформы baseline_platform, если заданы).
+        """
+        if run_id is None:
+            row = self.db.execute('SELECT MAX(id) FROM runs').fetchone()
+            run_id = row[0]
+        if run_id is None:
+            return {'run': None, 'baseline': [], 'metrics': [], 'regressions': []}
+        baseline_ids = self.baseline_runs(run_id, baseline, baseline_build, baseline_platform)
+        current = self.samples([run_id])
+        base = self.samples(baseline_ids)
+        metrics = []
+        for metric, samples in sorted(current.items()):
+            if metric not in base:
+                continue
+            current_median = weighted_median(samples)
+            base_median = weighted_median(base[metric])
+            change = current_median / base_median - 1 if base_median else float('nan')
+            test = mann_whitney_u(samples, base[metric])
+            metrics.append({'metric': metric, 'median': current_median, 'baseline_median': base_median,
+                            'change': change, 'p': test['p'],
+                            'regression': test['p'] < alpha and change > min_change})
+        return {'run': run_id, 'baseline': baseline_ids, 'metrics': metrics,
+                'regressions': sorted((m for m in metrics if m['regression']), key=lambda m: -m['change'])}
+
+
+def regression_lines(comparison: dict) -> List[str]:
+    lines = []
+    for m in comparison['regressions']:
+        lines.append(f"{m['metric']:<60} {m['baseline_median'] * 1000:10.2f} -> {m['median'] * 1000:10.2f} ms "
+                     f"({m['change'] * 100:+.0f}%, p={m['p']:.2g})")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='История замеров производительности')
+    parser.add_argument('--db', default=str(default_db), help='файл SQLite (по умолчанию %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = commands.add_parser('runs', help='последние запуски')
+    runs_parser.add_argument('--limit', type=int, default=20)
+
+    compare_parser = commands.add_parser('compare', help='регрессии запуска относительно предыдущих')
+    compare_parser.add_argument('--run', type=int, help='id запуска (по умолчанию последний)')
+    compare_parser.add_argument('--baseline', type=int, default=5, help='сколько предыдущих запусков в базе')
+    compare_parser.add_argument('--baseline-build', help='брать в базу только запуски этой сборки')
+    compare_parser.add_argument('--baseline-platform', help="брать в базу только запуски этой платформы "
+                                                            "(адрес, simulator или replay:<кассета>)")
+    compare_parser.add_argument('--alpha', type=float, default=0.01, help='уровень значимости')
+    compare_parser.add_argument('--min-change', type=float, default=0.1,
+                                help='минимальный рост медианы, доля (0.1 - на 10%%)')
+    compare_parser.add_argument('--json', action='store_true', help='вывести все метрики в JSON')
+    args = parser.parse_args(argv)
+
+    history = PerfHistory(args.db)
+    try:
+        if args.command == 'runs':
+            for run in history.runs(args.limit):
+                started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))
+                print(f"{run['id']:>5} {started} build={run['build'] or '-'} metrics={run['metrics']} "
+                      f"{run['platform_url'] or ''}")
+            return 0
+        comparison = history.compare(args.run, args.baseline, args.alpha, args.min_change, args.baseline_build,
+                                     args.baseline_platform)
+    finally:
+        history.close()
+    if args.json:
+        print(json.dumps(comparison, indent=2))
+    else:
+        print(f"run {comparison['run']} vs {comparison['baseline']}: {len(comparison['metrics'])} metrics, "
+              f"{len(comparison['regressions'])} regressions", file=sys.stderr)
+        for line in regression_lines(comparison):
+            print(line)
+    return 1 if comparison['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+    pytest-плагин истории производительности: в конце каждого запуска замеры сохраняются
+    в SQLite (common.perf_history) с ключом - сборкой --platform-build и платформой (platform_identity:
+    адрес платформы, 'simulator' или 'replay:<кассета>'), и --perf-compare сравнивает запуск
+    только с запусками той же сборки и платформы.
+
+    Что сохраняется: гистограммы бенчмарков (record_benchmark), метрики, записанные тестами
+    через record_metric (интервалы кадров мониторинга, загрузки страниц), задержки /report,
+    скачанных в кэш отчетов, и длительность каждого теста (test:<nodeid>).
+    При запуске с -n процессы xdist передают свои замеры основному процессу через workeroutput.
+    Без кэша pytest (-p no:cacheprovider) история пишется только в --perf-db, иначе запуск
+    не сохраняется - об этом предупреждение при старте.
+"""
+
+import pytest
+
+from common.benchmark_plugin import benchmark_results_key
+from common.nodeids import base_nodeid
+from common.perf_history import PerfHistory, history_path, regression_lines
+from common.platform_plugin import platform_identity, platform_key
+
+metrics_key = pytest.StashKey[dict]()
+test_durations_key = pytest.StashKey['DurationRecorder']()
+summary_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('perf_history', 'История производительности')
+    group.addoption('--perf-db', metavar='PATH',
+                    help='Файл SQLite с историей замеров '
+                         '(по умолчанию .pytest_cache/d/perf/history.sqlite в корне проекта)')
+    group.addoption('--no-perf-history', action='store_true', help='Не сохранять замеры этого запуска')
+    group.addoption('--perf-compare', type=int, nargs='?', const=5, metavar='RUNS',
+                    help='В конце сравнить запуск с RUNS предыдущими (по умолчанию 5) и показать регрессии')
+
+
+class DurationRecorder:
+    """
+        Длительность теста - сумма setup, call и teardown; пропущенные тесты не сохраняются.
+        При запуске с -n отчеты процессов приходят и в основной процесс, там и считаем.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.skipped = set()
+
+    def pytest_runtest_logreport(self, report):
+        nodeid = base_nodeid(report)
+        self.durations[nodeid] = self.durations.get(nodeid, 0.0) + report.duration
+        if report.skipped:
+            self.skipped.add(nodeid)
+
+    def metrics(self):
+        return {f'test:{nodeid}': [(duration, 1)] for nodeid, duration in self.durations.items()
+                if nodeid not in self.skipped}
+
+
+def pytest_configure(config):
+    config.stash[metrics_key] = {}
+    if not hasattr(config, 'workerinput'):
+        config.stash[test_durations_key] = DurationRecorder()
+        config.pluginmanager.register(config.stash[test_durations_key], 'perf_test_durations')
+        if not config.getoption('--no-perf-history') and history_path(config) is None:
+            config.issue_config_time_warning(pytest.PytestConfigWarning(
+                'кэш pytest выключен и --perf-db не задан: замеры этого запуска не сохраняются'), stacklevel=2)
+
+
+def record_metric(config, metric, values):
+    """
+        Добавляет к метрике значения в секундах (меньше - лучше) или пары (значение, вес).
+    """
+    config.stash[metrics_key].setdefault(metric, []).extend(values)
+
+
+def collect_metrics(config):
+    """
+        Все замеры процесса: {метрика: [(значение, вес), ...]}.
+    """
+    metrics = {metric: [tuple(value) if isinstance(value, (tuple, list)) else (value, 1) for value in values]
+               for metric, values in config.stash[metrics_key].items()}
+    for name, result in config.stash.get(benchmark_results_key, {}).items():
+        for endpoint, histogram in result.histograms.items():
+            buckets = histogram.to_dict()['buckets']
+            metrics.setdefault(f'bench:{name}.{endpoint}', []).extend(
+                (int(low) / 1_000_000, count) for low, count in buckets.items())
+    reports = config.stash.get(platform_key, {}).get('reports')
+    if reports is not None and reports.latencies:
+        metrics.setdefault('report', []).extend((value, 1) for value in reports.latencies)
+    return metrics
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    output = getattr(node, 'workeroutput', {}).get('perf_metrics')
+    if output:
+        for metric, values in output.items():
+            node.config.stash[metrics_key].setdefault(metric, []).extend(values)
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.getoption('--no-perf-history'):
+        return
+    metrics = collect_metrics(config)
+    if hasattr(config, 'workerinput'):
+        config.workeroutput['perf_metrics'] = {metric: [list(value) for value in values]
+                                               for metric, values in metrics.items()}
+        return
+    metrics.update(config.stash[test_durations_key].metrics())
+    path = history_path(config)
+    if not metrics or path is None:
+        return
+    build = config.getoption('--platform-build')
+    platform = platform_identity(config)
+    history = PerfHistory(path)
+    try:
+        run_id = history.add_run(metrics, build=build, platform_url=platform)
+        compare = config.getoption('--perf-compare')
+        comparison = history.compare(run_id, baseline=compare, baseline_build=build,
+                                     baseline_platform=platform) if compare else None
+    finally:
+        history.close()
+    config.stash[summary_key] = {'run': run_id, 'metrics': len(metrics), 'path': str(path), 'comparison': comparison}
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    summary = config.stash.get(summary_key, None)
+    if summary is None:
+        return
+    comparison = summary['comparison']
+    terminalreporter.write_sep('-', 'perf history')
+    terminalreporter.write_line(f"run {summary['run']}, build {config.getoption('--platform-build') or '-'}, "
+                                f"platform {platform_identity(config)}: "
+                                f"{summary['metrics']} metrics -> {summary['path']}")
+    if comparison is not None:
+        terminalreporter.write_line(f"compared with runs {comparison['baseline']}: "
+                                    f"{len(comparison['regressions'])} regressions")
+        for line in regression_lines(comparison):
+            terminalreporter.write_line(line)
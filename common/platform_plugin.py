@@ -0,0 +1,241 @@
+"""
+    pytest-плагин платформы: адрес платформы (--platform-url или локальный симулятор),
+    общий клиент API и подмена адреса в модулях тестов.
+"""
+
+import shutil
+import tempfile
+
+import pytest
+import requests
+
+from common.api_client import ApiClient, DEFAULT_PLATFORM_URL
+from common.cassette import Cassette, RecordingProxy, ReplayServer
+from common.report_cache import ReportCache
+from common.simulator import PlatformSimulator, parse_endpoint_values
+
+platform_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('platform', 'Платформа')
+    group.addoption('--platform-url', default=DEFAULT_PLATFORM_URL,
+                    help='Адрес платформы (по умолчанию %(default)s)')
+    group.addoption('--api-pool-size', type=int, default=10,
+                    help='Размер пула keep-alive соединений клиента API')
+    group.addoption('--api-retries', type=int, default=3,
+                    help='Количество повторов запроса при сетевой ошибке или ответе 502/503/504')
+    group.addoption('--report-concurrency', type=int, default=20,
+                    help='Сколько запросов /report выполнять одновременно')
+    group.addoption('--platform-build',
+                    help='Сборка прошивки платформы. С ней отчеты /report для тестов UI кэшируются между запусками')
+    group.addoption('--report-cache-size', type=float, default=64,
+                    help='Предельный размер кэша отчетов на диске, МБ')
+
+    group = parser.getgroup('simulator', 'Симулятор платформы')
+    group.addoption('--simulator', action='store_true',
+                    help='Запустить тесты против локального симулятора вместо --platform-url')
+    group.addoption('--sim-devices', type=int, default=5, help='Количество устройств в симуляторе')
+    group.addoption('--sim-latency', action='append', default=[],
+                    help='Задержка ответа в секундах: 0.05 для всех или endpoint=0.05 '
+                         '(devices, patch, report, monitoring, ui)')
+    group.addoption('--sim-jitter', action='append', default=[],
+                    help='Случайная добавка к задержке в секундах, формат как у --sim-latency')
+    group.addoption('--sim-frame-interval', type=float, default=0.5,
+                    help='Период отправки кадров мониторинга в секундах')
+
+    group = parser.getgroup('cassette', 'Запись и воспроизведение трафика')
+    group.addoption('--record-cassette', metavar='PATH',
+                    help='Записать весь трафик к платформе (HTTP и кадры мониторинга) в кассету')
+    group.addoption('--replay-cassette', metavar='PATH',
+                    help='Вместо платформы отдавать ответы из кассеты')
+    group.addoption('--replay-pacing', action='store_true',
+                    help='Воспроизводить с записанными задержками ответов и интервалами кадров')
+
+
+def pytest_configure(config):
+    if config.getoption('--record-cassette') and config.getoption('--replay-cassette'):
+        raise pytest.UsageError('--record-cassette и --replay-cassette нельзя указывать вместе')
+    config.stash[platform_key] = {}
+
+
+def get_platform_url(config):
+    """
+        Адрес платформы для тестов. С --simulator при первом обращении
+        запускает симулятор на свободном порту (он работает до конца сессии).
+        С --record-cassette тесты ходят на платформу через записывающий прокси,
+        с --replay-cassette - на сервер, отдающий ответы из кассеты.
+    """
+    platform = config.stash[platform_key]
+    if 'url' not in platform:
+        workerinput = getattr(config, 'workerinput', {})
+        if 'platform_url' in workerinput:
+            platform['url'] = workerinput['platform_url']
+        elif config.getoption('--replay-cassette'):
+            replay = ReplayServer(Cassette.load(config.getoption('--replay-cassette')),
+                                  pacing=config.getoption('--replay-pacing'))
+            platform['replay'] = replay
+            platform['server'] = replay.run_in_thread()
+            platform['url'] = platform['server'].url
+        else:
+            if config.getoption('--simulator'):
+                simulator = PlatformSimulator(devices=config.getoption('--sim-devices'),
+                                              latency=parse_endpoint_values(config.getoption('--sim-latency')),
+                                              jitter=parse_endpoint_values(config.getoption('--sim-jitter')),
+                                              frame_interval=config.getoption('--sim-frame-interval'))
+                platform['server'] = simulator.run_in_thread()
+                platform['url'] = platform['server'].url
+            else:
+                platform['url'] = config.getoption('--platform-url').rstrip('/')
+            if config.getoption('--record-cassette'):
+                platform['recorder'] = RecordingProxy(platform['url'])
+                platform['proxy'] = platform['recorder'].run_in_thread()
+                platform['url'] = platform['proxy'].url
+    return platform['url']
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+        pytest-xdist: процессы-исполнители работают с той же платформой, что и основной процесс.
+        Иначе с --simulator каждый процесс запустил бы свой симулятор.
+    """
+    node.workerinput['platform_url'] = get_platform_url(node.config)
+
+
+def get_api_client(config):
+    """
+        Общий на всю сессию клиент API с пулом соединений.
+        Доступен и во время сбора тестов, и через фикстуру api.
+    """
+    platform = config.stash[platform_key]
+    if 'api' not in platform:
+        platform['api'] = ApiClient(get_platform_url(config),
+                                    pool_size=config.getoption('--api-pool-size'),
+                                    retries=config.getoption('--api-retries'))
+    return platform['api']
+
+
+def get_collected_devices(config):
+    """
+        Список устройств для параметризации тестов: один GET /devices на всю сессию.
+    """
+    platform = config.stash[platform_key]
+    if 'devices' not in platform:
+        platform['devices'] = get_api_client(config).get_devices()
+    return platform['devices']
+
+
+def collected_device_names(config):
+    """
+        Имена устройств для параметризации тестов. Если платформа недоступна при сборе
+        (например, --collect-only без платформы), вместо имен - один пропускаемый параметр с причиной;
+        ошибка запоминается, чтобы не повторять GET /devices для каждого модуля.
+    """
+    platform = config.stash[platform_key]
+    if 'devices_error' not in platform:
+        try:
+            return [device['name'] for device in get_collected_devices(config)]
+        except requests.RequestException as error:
+            platform['devices_error'] = f'Платформа {get_platform_url(config)} недоступна при сборе тестов: {error}'
+    return [pytest.param(None, id='platform-unavailable', marks=pytest.mark.skip(reason=platform['devices_error']))]
+
+
+def platform_identity(config):
+    """
+        Имя платформы, постоянное между запусками, - для ключей кэшей на диске. У симулятора
+        и воспроизведения кассеты адрес - случайный локальный порт, поэтому для них
+        'simulator' и 'replay:<кассета>'.
+    """
+    if config.getoption('--replay-cassette'):
+        return f"replay:{config.getoption('--replay-cassette')}"
+    if config.getoption('--simulator'):
+        return 'simulator'
+    return config.getoption('--platform-url').rstrip('/')
+
+
+def get_report_cache(config):
+    """
+        Общий для тестов API и UI кэш отчетов (.pytest_cache/d/reports).
+        Без кэша pytest (-p no:cacheprovider) - во временном каталоге на одну сессию.
+    """
+    platform = config.stash[platform_key]
+    if 'reports' not in platform:
+        cache = getattr(config, 'cache', None)
+        if cache is not None:
+            directory = cache.mkdir('reports')
+        else:
+            directory = platform['reports_dir'] = tempfile.mkdtemp(prefix='reports-')
+        platform['reports'] = ReportCache(directory, get_platform_url(config),
+                                          build=config.getoption('--platform-build'),
+                                          max_bytes=int(config.getoption('--report-cache-size') * 1024 * 1024),
+                                          concurrency=config.getoption('--report-concurrency'),
+                                          platform=platform_identity(config))
+    return platform['reports']
+
+
+def pytest_unconfigure(config):
+    platform = config.stash.get(platform_key, {})
+    if 'api' in platform:
+        platform['api'].close()
+    if 'proxy' in platform:
+        platform['proxy'].stop()
+        platform['recorder'].cassette.save(config.getoption('--record-cassette'))
+    if 'server' in platform:
+        platform['server'].stop()
+    if 'reports_dir' in platform:
+        shutil.rmtree(platform['reports_dir'], ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def platform_url(request):
+    return get_platform_url(request.config)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def point_tests_at_platform(request, platform_url):
+    """
+        Модули тестов хранят адрес платформы в переменных api_url / link / url.
+        Подменяем их на адрес из --platform-url или запущенного симулятора.
+    """
+    modules = {getattr(item, 'module', None) for item in request.session.items}
+    for module in modules:
+        for name in ('api_url', 'link', 'url'):
+            if isinstance(getattr(module, name, None), str):
+                setattr(module, name, platform_url)
+
+
+@pytest.fixture(scope="session")
+def api(request):
+    return get_api_client(request.config)
+
+
+@pytest.fixture(scope="session")
+def report_cache(request):
+    return get_report_cache(request.config)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    platform = config.stash.get(platform_key, {})
+    client = platform.get('api')
+    if client is not None:
+        stats = client.connection_stats()
+        terminalreporter.write_sep('-', 'API connections')
+        terminalreporter.write_line(f'requests: {stats.requests}, connections opened: {stats.opened}, '
+                                    f'reused: {stats.reused}')
+    if 'recorder' in platform:
+        terminalreporter.write_sep('-', 'Cassette')
+        terminalreporter.write_line(f"recorded {len(platform['recorder'].cassette.records)} exchanges "
+                                    f"to {config.getoption('--record-cassette')}")
+    if 'replay' in platform:
+        misses = platform['replay'].misses
+        terminalreporter.write_sep('-', 'Cassette')
+        terminalreporter.write_line(f"replayed from {config.getoption('--replay-cassette')}, "
+                                    f"not recorded: {len(misses)} {sorted(set(misses))[:5]}")
+    reports = platform.get('reports')
+    if reports is not None:
+        stats = reports.stats()
+        terminalreporter.write_sep('-', 'Report cache')
+        terminalreporter.write_line(f"build: {reports.build or '-'}, hits: {stats['hits']}, "
+                                    f"fetched: {stats['fetched']}, objects: {stats['objects']}, "
+                                    f"{stats['bytes'] / 1024:.1f} KiB")
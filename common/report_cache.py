@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from common.report_client import RepId, ReportResult, run_fetch_reports
+
+
+@dataclass
+class CachedReport:
+    """
+        Отчет из кэша. Интерфейс как у ReportResult: status, error, text.
+    """
+    address: str
+    rep_id: RepId
+    status: int
+    sha1: str
+    size: int
+    path: Path
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.path.read_bytes().decode('utf-8', errors='replace')
+
+
+class ReportCache:
+    """
+        Кэш тел отчетов /report на диске с адресацией по содержимому.
+
+        Тела хранятся в objects/<sha1>: одинаковые отчеты разных устройств или разных
+        repId занимают место один раз. Объекты вытесняются по давности использования (LRU
+        по mtime файла), пока общий размер больше max_bytes.
+
+        Ключ - (address, repId). Если задана сборка прошивки build, индекс ключей сохраняется
+        в index-<build>-<платформа>.json (platform - постоянное имя платформы, по умолчанию base_url),
+        и следующий запуск на той же платформе и сборке берет отчеты оттуда.
+        Без build индекс живет только в памяти: отчеты скачиваются один раз за сессию
+        и общие для тестов API и UI.
+
+        get_reports(..., fresh=True) не доверяет индексу с диска: отчет запрашивается у API,
+        если в этой сессии его еще не скачивали. Так тесты API проверяют саму платформу,
+        а сохраненный индекс служит только для сравнения в тестах UI.
+    """
+
+    def __init__(self, directory, base_url: str, build: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 * 1024, concurrency: int = 20, platform: Optional[str] = None):
+        self.directory = Path(directory)
+        self.objects = self.directory / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url
+        self.build = build
+        self.platform = platform or base_url
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.hits = 0
+        self.fetched = 0
+        self.latencies = []
+        self.index = self._load_index()
+        self.session_keys = set()
+
+    @property
+    def index_path(self) -> Optional[Path]:
+        if self.build is None:
+            return None
+        safe_build = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in self.build)
+        platform = hashlib.sha1(self.platform.encode()).hexdigest()[:12]
+        return self.directory / f'index-{safe_build}-{platform}.json'
+
+    @staticmethod
+    def key(address: str, rep_id: RepId) -> str:
+        return f'{address}|{rep_id}'
+
+    def _load_index(self) -> Dict[str, dict]:
+        if self.index_path is None or not self.index_path.exists():
+            return {}
+        try:
+            return json.loads(self.index_path.read_text())
+        except ValueError:
+            return {}
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        index = self._load_index()
+        index.update(self.index)
+        with tempfile.NamedTemporaryFile('w', dir=self.directory, delete=False, suffix='.tmp') as file:
+            json.dump(index, file)
+        os.replace(file.name, self.index_path)
+
+    def lookup(self, address: str, rep_id: RepId) -> Optional[CachedReport]:
+        entry = self.index.get(self.key(address, rep_id))
+        if entry is None:
+            return None
+        path = self.objects / entry['sha1']
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            del self.index[self.key(address, rep_id)]
+            return None
+        return CachedReport(address, rep_id, entry['status'], entry['sha1'], entry['size'], path)
+
+    def store(self, result: ReportResult) -> CachedReport:
+        path = self.objects / result.sha1
+        if path.exists():
+            os.utime(path)
+        else:
+            with tempfile.NamedTemporaryFile('wb', dir=self.objects, delete=False, suffix='.tmp') as file:
+                result.body.seek(0)
+                shutil.copyfileobj(result.body, file)
+            os.replace(file.name, path)
+        self.session_keys.add(self.key(result.address, result.rep_id))
+        self.index[self.key(result.address, result.rep_id)] = {'status': result.status, 'sha1': result.sha1,
+                                                               'size': result.size}
+        return CachedReport(result.address, result.rep_id, result.status, result.sha1, result.size, path)
+
+    def get_reports(self, addresses: Iterable[str], rep_ids: Iterable[RepId],
+                    fresh: bool = False) -> Dict[Tuple[str, RepId], object]:
+        """
+            Отчеты для всех пар (address, repId). Отсутствующие в кэше запрашиваются одновременно.
+            fresh=True - запросить и те, что есть только в индексе с диска (скачанные в прошлых запусках).
+            Ошибки запроса не кэшируются: для них возвращается ReportResult с заполненным error.
+        """
+        rep_ids = list(rep_ids)
+        reports = {}
+        missing = {}
+        for address in addresses:
+            for rep_id in rep_ids:
+                if fresh and self.key(address, rep_id) not in self.session_keys:
+                    cached = None
+                else:
+                    cached = self.lookup(address, rep_id)
+                if cached is None:
+                    missing.setdefault(address, []).append(rep_id)
+                else:
+                    self.hits += 1
+                    reports[(address, rep_id)] = cached
+        if missing:
+            # один запрос матрицы на каждый набор repId, обычно он один на всех
+            by_rep_ids = {}
+            for address, ids in missing.items():
+                by_rep_ids.setdefault(tuple(ids), []).append(address)
+            for ids, ids_addresses in by_rep_ids.items():
+                results = run_fetch_reports(self.base_url, ids_addresses, ids, concurrency=self.concurrency)
+                for key, result in results.items():
+                    self.fetched += 1
+                    if result.error:
+                        reports[key] = result
+                        continue
+                    self.latencies.append(result.elapsed)
+                    reports[key] = self.store(result)
+                    result.close()
+            self._save_index()
+            self.evict(keep={report.path for report in reports.values() if isinstance(report, CachedReport)})
+        return reports
+
+    def get_report(self, address: str, rep_id: RepId):
+        return self.get_reports([address], [rep_id])[(address, rep_id)]
+
+    def evict(self, keep=()):
+        """
+            Удаляет давно не использованные объекты, пока общий размер больше max_bytes.
+            Объекты из keep (только что выданные тестам) не удаляются.
+        """
+        objects = [(stat.st_mtime, stat.st_size, path) for path, stat in self._object_stats()]
+        total = sum(size for _, size, _ in objects)
+        for _, size, path in sorted(objects, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _object_stats(self):
+        """
+            (путь, stat) объектов кэша. Каталог общий для процессов xdist: файл, удаленный другим
+            процессом между iterdir() и stat(), пропускается.
+        """
+        result = []
+        for path in self.objects.iterdir():
+            if path.name.endswith('.tmp'):
+                continue
+            try:
+                result.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return result
+
+    def stats(self) -> dict:
+        objects = self._object_stats()
+        return {'hits': self.hits, 'fetched': self.fetched, 'objects': len(objects),
+                'bytes': sum(stat.st_size for _, stat in objects)}
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import aiohttp
+
+RepId = Union[int, str]
+
+
+@dataclass
+class ReportResult:
+    """
+        Ответ /report. Тело не держится в памяти целиком: до spool_size байт оно лежит
+        в SpooledTemporaryFile в памяти, большие отчеты сбрасываются во временный файл.
+    """
+    address: str
+    rep_id: RepId
+    status: Optional[int] = None
+    size: int = 0
+    sha1: Optional[str] = None
+    elapsed: Optional[float] = None
+    error: Optional[str] = None
+    body: Optional[tempfile.SpooledTemporaryFile] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> Optional[str]:
+        if self.body is None:
+            return None
+        self.body.seek(0)
+        return self.body.read().decode('utf-8', errors='replace')
+
+    def close(self):
+        if self.body is not None:
+            self.body.close()
+            self.body = None
+
+
+async def fetch_report(session: aiohttp.ClientSession, base_url: str, address: str, rep_id: RepId,
+                       chunk_size: int = 64 * 1024, spool_size: int = 1024 * 1024) -> ReportResult:
+    """
+        Запрашивает один отчет и читает тело кусками по chunk_size, попутно считая sha1.
+    """
+    result = ReportResult(address, rep_id)
+    started = time.perf_counter()
+    try:
+        async with session.get(f"{base_url.rstrip('/')}/report",
+                               params={'address': address, 'repId': str(rep_id)}) as response:
+            result.status = response.status
+            digest = hashlib.sha1()
+            body = tempfile.SpooledTemporaryFile(max_size=spool_size)
+            async for chunk in response.content.iter_chunked(chunk_size):
+                digest.update(chunk)
+                body.write(chunk)
+                result.size += len(chunk)
+            result.body = body
+            result.sha1 = digest.hexdigest()
+    except Exception as ex:
+        result.error = f'{type(ex).__name__}: {ex}'
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def fetch_reports(base_url: str, addresses: Iterable[str], rep_ids: Iterable[RepId],
+                        concurrency: int = 20, timeout: float = 30) -> Dict[Tuple[str, RepId], ReportResult]:
+    """
+        Запрашивает все отчеты rep_ids для всех устройств addresses одновременно,
+        не более concurrency запросов за раз. Медленная генерация отчетов на платформе
+        перекрывается, и общее время близко ко времени самых медленных запросов, а не к их сумме.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    matrix = [(address, rep_id) for address in addresses for rep_id in rep_ids]
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async def limited(address, rep_id):
+            async with semaphore:
+                return await fetch_report(session, base_url, address, rep_id)
+
+        results = await asyncio.gather(*(limited(address, rep_id) for address, rep_id in matrix))
+    return dict(zip(matrix, results))
+
+
+def run_fetch_reports(base_url: str, addresses: Iterable[str], rep_ids: Iterable[RepId],
+                      concurrency: int = 20, timeout: float = 30) -> Dict[Tuple[str, RepId], ReportResult]:
+    """
+        Синхронная обёртка над fetch_reports для фикстур и скриптов.
+    """
+    return asyncio.run(fetch_reports(base_url, list(addresses), list(rep_ids), concurrency, timeout))
@@ -0,0 +1,120 @@
+"""
+    Нагрузка на REST API в двух режимах:
+    - closed loop: concurrency потоков, каждый отправляет следующий запрос сразу после ответа;
+    - fixed rate: запросы отправляются по расписанию rate в секунду независимо от ответов,
+      задержка считается от запланированного момента отправки (без coordinated omission).
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from common.histogram import LatencyHistogram
+
+
+@dataclass
+class Operation:
+    """
+        Один вид запроса: endpoint - имя для гистограммы, send() - отправка,
+        expected_status - ожидаемый код ответа (None - любой, кроме 5xx).
+    """
+    endpoint: str
+    send: Callable
+    expected_status: Optional[int] = None
+
+
+@dataclass
+class BenchResult:
+    mode: str
+    duration: float = 0.0
+    histograms: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    error_samples: List[str] = field(default_factory=list)
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    def throughput(self, endpoint=None):
+        if not self.duration:
+            return 0.0
+        if endpoint is None:
+            return sum(h.count for h in self.histograms.values()) / self.duration
+        return self.histograms[endpoint].count / self.duration
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'duration': self.duration,
+            'endpoints': {endpoint: {'throughput_rps': self.throughput(endpoint),
+                                     'errors': self.errors.get(endpoint, 0),
+                                     'histogram': histogram.to_dict()}
+                          for endpoint, histogram in self.histograms.items()},
+            'error_samples': self.error_samples,
+            'metrics': self.metrics,
+        }
+
+
+class _Recorder:
+    def __init__(self, result):
+        self.result = result
+        self._lock = threading.Lock()
+
+    def call(self, operation, started):
+        error = None
+        try:
+            response = operation.send()
+            if operation.expected_status is not None and response.status_code != operation.expected_status:
+                error = f'{operation.endpoint}: код ответа {response.status_code}, ожидался {operation.expected_status}'
+            elif response.status_code >= 500:
+                error = f'{operation.endpoint}: код ответа {response.status_code}'
+        except Exception as ex:
+            error = f'{operation.endpoint}: {type(ex).__name__}: {ex}'
+        latency = time.perf_counter() - started
+        with self._lock:
+            histogram = self.result.histograms.setdefault(operation.endpoint, LatencyHistogram())
+            histogram.record(latency)
+            if error is not None:
+                self.result.errors[operation.endpoint] = self.result.errors.get(operation.endpoint, 0) + 1
+                if len(self.result.error_samples) < 20:
+                    self.result.error_samples.append(error)
+
+
+def run_closed_loop(operations: List[Operation], concurrency: int, duration: float) -> BenchResult:
+    result = BenchResult('closed')
+    recorder = _Recorder(result)
+    cycle = itertools.cycle(operations)
+    cycle_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with cycle_lock:
+                operation = next(cycle)
+            recorder.call(operation, time.perf_counter())
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def run_fixed_rate(operations: List[Operation], rate: float, duration: float, max_workers: int = 64) -> BenchResult:
+    result = BenchResult('rate')
+    recorder = _Recorder(result)
+    cycle = itertools.cycle(operations)
+    total = int(rate * duration)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(total):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(recorder.call, next(cycle), scheduled)
+    result.duration = time.perf_counter() - started
+    return result
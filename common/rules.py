@@ -0,0 +1,53 @@
+"""
+    Правила валидации платформы, которые закодированы в тестах:
+    допустимые частоты, диапазон duty 0-100 и номера отчетов 100-400.
+"""
+
+valid_freqs = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+valid_reports = [100, 200, 300, 400]
+invalid_report_id_text = "Invalid type of 'repId' value"
+
+
+def _as_int(value):
+    """
+        Возвращает целое число, если значение записано только цифрами (как его увидит сервер
+        в строке запроса), иначе None. Так '2.5', '-1', 'aa', '²' и 2.5 считаются невалидными.
+        isdigit не подходит: он пропускает надстрочные цифры, которые не разбирает int().
+    """
+    text = str(value)
+    if not (text.isascii() and text.isdecimal()):
+        return None
+    return int(text)
+
+
+def parse_duty(value):
+    """
+        Возвращает duty, если значение допустимо (целое число 0-100), иначе None.
+    """
+    duty = _as_int(value)
+    if duty is None or duty > 100:
+        return None
+    return duty
+
+
+def parse_freq(value):
+    """
+        Возвращает freq, если значение входит в список valid_freqs, иначе None.
+    """
+    freq = _as_int(value)
+    if freq not in valid_freqs:
+        return None
+    return freq
+
+
+def report_status(rep_id):
+    """
+        Ожидаемый код ответа /report: 200 для отчетов 100-400, 404 для остальных чисел,
+        400 для значений, которые не являются целым неотрицательным числом.
+    """
+    report = _as_int(rep_id)
+    if report is None:
+        return 400
+    if report in valid_reports:
+        return 200
+    return 404
@@ -0,0 +1,178 @@
+"""
+    Бенчмарк масштабирования по размеру парка устройств.
+
+    Для каждого размера (по умолчанию 10, 100, 1000, 10000 устройств) поднимается отдельный
+    симулятор платформы с таким парком, и по нему замеряются этапы:
+    - devices - время ответа GET /devices (медиана из samples запросов) и размер ответа в байтах;
+    - ws_setup - время, за которое подписки /start_monitoring на все устройства получили первый кадр
+      (не более ws_concurrency соединений одновременно).
+    Этапы браузера (отрисовка таблицы, поиск ссылок мониторинга) добавляются через extra_stages,
+    их замеряет frontend/scale_test.py.
+
+    Результат - кривая по каждому этапу: значение от размера парка и показатель роста между
+    соседними размерами log(t2 / t1) / log(n2 / n1). 1 - линейный рост, больше 1 - сверхлинейный.
+
+    Запуск:  python -m common.scale_bench --sizes 10,100,1000,10000 -o scale.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from common.histogram import LatencyHistogram
+from common.simulator import PlatformSimulator
+from common.ws_monitor import monitor_devices
+
+default_sizes = [10, 100, 1000, 10000]
+
+
+def parse_sizes(text: str) -> List[int]:
+    """
+        '10,100,1k,10k' -> [10, 100, 1000, 10000]
+    """
+    sizes = []
+    for value in text.split(','):
+        value = value.strip().lower()
+        multiplier = 1000 if value.endswith('k') else 1
+        sizes.append(int(float(value.rstrip('k')) * multiplier))
+    return sorted(sizes)
+
+
+def measure_devices(base_url: str, samples: int = 5) -> dict:
+    histogram = LatencyHistogram()
+    size = 0
+    with requests.Session() as session:
+        for _ in range(samples):
+            started = time.perf_counter()
+            response = session.get(f"{base_url.rstrip('/')}/devices")
+            response.raise_for_status()
+            devices = response.json()
+            histogram.record(time.perf_counter() - started)
+            size = len(response.content)
+    return {'devices': histogram.percentile(50), 'devices_p95': histogram.percentile(95),
+            'devices_bytes': size, 'devices_count': len(devices), 'addresses': [d['address'] for d in devices]}
+
+
+def measure_ws_setup(base_url: str, addresses: List[str], concurrency: int = 50, connect_timeout: float = 10) -> dict:
+    started = time.perf_counter()
+    results = asyncio.run(monitor_devices(base_url, addresses, frames=1, concurrency=concurrency,
+                                          connect_timeout=connect_timeout))
+    elapsed = time.perf_counter() - started
+    connect = LatencyHistogram()
+    errors = 0
+    for result in results.values():
+        if result.error is not None or not result.frames:
+            errors += 1
+        else:
+            connect.record(result.connect_time)
+    return {'ws_setup': elapsed, 'ws_connect_p95': connect.percentile(95) if connect.count else None,
+            'ws_errors': errors}
+
+
+def growth(curve: Dict[str, Dict[int, float]]) -> Dict[str, List[dict]]:
+    """
+        Показатель роста каждого этапа между соседними размерами парка.
+    """
+    result = {}
+    for stage, points in curve.items():
+        sizes = sorted(size for size, value in points.items() if value)
+        result[stage] = [{'from': a, 'to': b,
+                          'exponent': math.log(points[b] / points[a]) / math.log(b / a)}
+                         for a, b in zip(sizes, sizes[1:])]
+    return result
+
+
+def first_superlinear(curve: Dict[str, Dict[int, float]], threshold: float = 1.2) -> Optional[dict]:
+    """
+        Этап, который раньше всех (при наименьшем размере парка) растет быстрее n ** threshold.
+    """
+    found = None
+    for stage, steps in growth(curve).items():
+        for step in steps:
+            if step['exponent'] > threshold:
+                if found is None or step['to'] < found['to']:
+                    found = dict(step, stage=stage)
+                break
+    return found
+
+
+def scaling_lines(curve: Dict[str, Dict[int, float]]) -> List[str]:
+    """
+        Таблица: этапы по строкам, размеры парка по столбцам, время в миллисекундах,
+        в конце строки - показатели роста между соседними размерами.
+    """
+    sizes = sorted({size for points in curve.values() for size in points})
+    exponents = growth(curve)
+    lines = [f"{'stage':<12}" + ''.join(f'{size:>12}' for size in sizes) + '   growth']
+    for stage, points in curve.items():
+        cells = ''.join(f'{points[size] * 1000:>12.1f}' if size in points else f"{'-':>12}" for size in sizes)
+        steps = ' '.join(f"{step['exponent']:.2f}" for step in exponents[stage])
+        lines.append(f'{stage:<12}{cells}   {steps}')
+    return lines
+
+
+def run_scale(sizes: List[int], samples: int = 5, ws_concurrency: int = 50, frame_interval: float = 0.5,
+              extra_stages: Optional[Dict[str, Callable[[str, int], float]]] = None, log=None) -> dict:
+    """
+        Для каждого размера запускает симулятор с таким парком и замеряет этапы.
+        extra_stages - {этап: функция(base_url, size) -> секунды}, вызываются после этапов API.
+    """
+    points = []
+    curve = {'devices': {}, 'ws_setup': {}}
+    for stage in extra_stages or {}:
+        curve[stage] = {}
+    for size in sizes:
+        server = PlatformSimulator(devices=size, frame_interval=frame_interval).run_in_thread()
+        try:
+            point = {'size': size}
+            point.update(measure_devices(server.url, samples))
+            addresses = point.pop('addresses')
+            point.update(measure_ws_setup(server.url, addresses, ws_concurrency))
+            for stage, measure in (extra_stages or {}).items():
+                point[stage] = measure(server.url, size)
+        finally:
+            server.stop()
+        for stage in curve:
+            curve[stage][size] = point[stage]
+        points.append(point)
+        if log is not None:
+            log(point)
+    return {'points': points, 'curve': curve, 'growth': growth(curve), 'first_superlinear': first_superlinear(curve)}
+
+
+def print_point(point):
+    print(f"{point['size']:>6} devices | /devices {point['devices'] * 1000:8.1f} ms {point['devices_bytes']:>9} B | "
+          f"ws_setup {point['ws_setup'] * 1000:9.1f} ms, errors {point['ws_errors']}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк масштабирования по размеру парка устройств')
+    parser.add_argument('--sizes', type=parse_sizes, default=default_sizes,
+                        help='размеры парка через запятую, например 10,100,1k,10k')
+    parser.add_argument('--samples', type=int, default=5, help='запросов GET /devices на размер')
+    parser.add_argument('--ws-concurrency', type=int, default=50, help='одновременных подписок мониторинга')
+    parser.add_argument('--frame-interval', type=float, default=0.5, help='период кадров симулятора, секунды')
+    parser.add_argument('-o', '--output', help='файл для результатов в JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    result = run_scale(args.sizes, args.samples, args.ws_concurrency, args.frame_interval, log=print_point)
+    for line in scaling_lines(result['curve']):
+        print(line, file=sys.stderr)
+    result['curve'] = {stage: {str(size): value for size, value in points.items()}
+                       for stage, points in result['curve'].items()}
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
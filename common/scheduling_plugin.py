@@ -0,0 +1,184 @@
+"""
+    pytest-плагин порядка запуска по истории (--schedule) и бюджета времени (--time-budget).
+
+    Ожидаемая длительность теста - медиана из истории производительности за последние
+    --schedule-history запусков на той же платформе (common.durations).
+    История падений - lastfailed из кэша pytest и номер последнего запуска, в котором тест падал
+    (.pytest_cache, scheduling/failures). Без кэша pytest (-p no:cacheprovider) история падений не ведется.
+
+    --schedule:
+    - сначала модули с упавшими в прошлый раз и недавно падавшими тестами, затем быстрые модули;
+      внутри модуля и класса - так же. Тесты не перемешиваются между модулями и классами,
+      иначе фикстуры scope="module" / "class" создавались бы заново;
+    - при запуске с -n медленные тесты (от --pack-slow секунд) и группы устройств раскладываются
+      по процессам жадным алгоритмом LPT (см. sharding_plugin.pack_groups).
+
+    --time-budget N: тест пропускается, если с начала сессии прошло столько, что он по ожидаемой
+    длительности не успеет закончиться за N секунд. В конце - отчет о покрытии: сколько тестов
+    не запущено по модулям (и в JSON, --budget-report).
+"""
+
+import json
+import time
+from collections import defaultdict
+
+import pytest
+
+from common.durations import expected_duration
+from common.nodeids import base_nodeid, strip_group
+
+schedule_key = pytest.StashKey[dict]()
+run_history_key = pytest.StashKey['RunHistory']()
+budget_reason = 'time budget'
+recent_failure_runs = 5
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('scheduling', 'Порядок запуска и бюджет времени')
+    group.addoption('--schedule', action='store_true',
+                    help='Сначала недавно падавшие и быстрые тесты, медленные - поровну по процессам xdist')
+    group.addoption('--schedule-history', type=int, default=10,
+                    help='По скольким последним запускам считать ожидаемую длительность теста')
+    group.addoption('--pack-slow', type=float, default=1.0,
+                    help='Тесты длиннее стольких секунд раскладываются по процессам xdist заранее')
+    group.addoption('--time-budget', type=float, metavar='SECONDS',
+                    help='Не начинать тесты, которые не успеют закончиться за столько секунд от начала сессии')
+    group.addoption('--budget-report', metavar='PATH', help='Сохранить список не запущенных по бюджету тестов в JSON')
+
+
+def pytest_configure(config):
+    config.stash[schedule_key] = {'started': time.perf_counter()}
+    if not hasattr(config, 'workerinput'):
+        config.stash[run_history_key] = RunHistory(config)
+        config.pluginmanager.register(config.stash[run_history_key], 'scheduling_run_history')
+
+
+def failure_priority(config):
+    """
+        Функция nodeid -> приоритет: 0 - упал в прошлый раз, 1 - падал за последние
+        recent_failure_runs запусков, 2 - остальные. Без кэша pytest у всех тестов приоритет 2.
+    """
+    cache = getattr(config, 'cache', None)
+    if cache is None:
+        return lambda nodeid: 2
+    lastfailed = {strip_group(nodeid) for nodeid in cache.get('cache/lastfailed', {})}
+    failures = cache.get('scheduling/failures', {})
+    current_run = cache.get('scheduling/runs', 0)
+
+    def priority(nodeid):
+        if nodeid in lastfailed:
+            return 0
+        if nodeid in failures and current_run - failures[nodeid] < recent_failure_runs:
+            return 1
+        return 2
+
+    return priority
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption('--schedule'):
+        return
+    priority = failure_priority(config)
+    keys = {}
+    for item in items:
+        nodeid = strip_group(item.nodeid)
+        keys[item] = (priority(nodeid), expected_duration(config, nodeid))
+
+    def parent_of(item, level):
+        node = item
+        while node is not None and not isinstance(node, level):
+            node = node.parent
+        return node
+
+    # ключ узла - лучший приоритет падения его тестов и их суммарная длительность
+    node_keys = defaultdict(lambda: [3, 0.0])
+    for item in items:
+        for node in (parent_of(item, pytest.Module), item.parent):
+            node_key = node_keys[node]
+            node_key[0] = min(node_key[0], keys[item][0])
+            node_key[1] += keys[item][1]
+    items.sort(key=lambda item: (node_keys[parent_of(item, pytest.Module)], node_keys[item.parent], keys[item]))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    budget = item.config.getoption('--time-budget')
+    if budget is None:
+        return
+    elapsed = time.perf_counter() - item.config.stash[schedule_key]['started']
+    expected = expected_duration(item.config, strip_group(item.nodeid))
+    if elapsed + expected > budget:
+        pytest.skip(f'{budget_reason}: {elapsed:.1f} s прошло, тест ожидается {expected:.1f} s, бюджет {budget:g} s')
+
+
+class RunHistory:
+    """
+        Бюджет и история падений считаются в основном процессе: при -n отчеты процессов приходят сюда же.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.seen = set()
+        self.failed = set()
+        self.budget_skipped = {}
+
+    def pytest_runtest_logreport(self, report):
+        nodeid = base_nodeid(report)
+        self.seen.add(nodeid)
+        if report.failed:
+            self.failed.add(nodeid)
+        if report.skipped and isinstance(report.longrepr, tuple) and budget_reason in str(report.longrepr[2]):
+            self.budget_skipped[nodeid] = expected_duration(self.config, nodeid)
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if hasattr(config, 'workerinput'):
+        return
+    run_history = config.stash[run_history_key]
+    cache = getattr(config, 'cache', None)
+    if cache is not None:
+        current_run = cache.get('scheduling/runs', 0) + 1
+        cache.set('scheduling/runs', current_run)
+        if run_history.failed:
+            failures = cache.get('scheduling/failures', {})
+            failures.update({nodeid: current_run for nodeid in run_history.failed})
+            cache.set('scheduling/failures', failures)
+
+    path = config.getoption('--budget-report')
+    if path and config.getoption('--time-budget') is not None:
+        with open(path, 'w') as f:
+            json.dump(budget_report(config), f, indent=2)
+
+
+def budget_report(config):
+    run_history = config.stash[run_history_key]
+    skipped = run_history.budget_skipped
+    by_module = defaultdict(lambda: {'tests': 0, 'skipped': 0})
+    for nodeid in run_history.seen:
+        module = nodeid.split('::', 1)[0]
+        by_module[module]['tests'] += 1
+        by_module[module]['skipped'] += nodeid in skipped
+    total = len(run_history.seen)
+    return {
+        'budget': config.getoption('--time-budget'),
+        'tests': total,
+        'ran': total - len(skipped),
+        'coverage': (total - len(skipped)) / total if total else 1.0,
+        'skipped_expected_seconds': sum(skipped.values()),
+        'modules': dict(by_module),
+        'skipped': sorted(skipped),
+    }
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if config.getoption('--time-budget') is None or hasattr(config, 'workerinput'):
+        return
+    report = budget_report(config)
+    terminalreporter.write_sep('-', 'time budget')
+    terminalreporter.write_line(f"budget {report['budget']:g} s: ran {report['ran']} of {report['tests']} tests "
+                                f"({report['coverage']:.0%}), not started {len(report['skipped'])} "
+                                f"(~{report['skipped_expected_seconds']:.1f} s expected)")
+    for module, counts in sorted(report['modules'].items()):
+        if counts['skipped']:
+            terminalreporter.write_line(f"  {module}: {counts['skipped']} of {counts['tests']} not started")
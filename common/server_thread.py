@@ -0,0 +1,67 @@
+import asyncio
+import socket
+import threading
+
+from aiohttp import web
+
+
+class ServerThread:
+    """
+        Запускает aiohttp-приложение в отдельном потоке со своим event loop.
+        Сокет открывается заранее, поэтому порт 0 означает "любой свободный"
+        и известен сразу после start().
+    """
+
+    def __init__(self, app_factory, host='127.0.0.1', port=0):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+        self._error = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._run, args=(sock,), daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        return self.url
+
+    def _run(self, sock):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._runner = web.AppRunner(self.app_factory(), handle_signals=False)
+            self.loop.run_until_complete(self._runner.setup())
+            self.loop.run_until_complete(web.SockSite(self._runner, sock).start())
+        except Exception as ex:
+            self._error = ex
+            self._started.set()
+            return
+        self._started.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self._runner.cleanup())
+        self.loop.close()
+
+    def call(self, coro, timeout=None):
+        """
+            Выполняет корутину в потоке сервера и возвращает её результат.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        if self.loop is None or not self.loop.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
@@ -0,0 +1,139 @@
+"""
+    pytest-плагин параллельного запуска по устройствам (pytest-xdist).
+
+    Тесты с маркером mutates_device меняют состояние устройства из параметра device
+    (или из параметра, указанного в маркере: mutates_device('mlink')), поэтому все такие тесты одного устройства попадают в одну группу xdist_group
+    и выполняются последовательно в одном процессе. Разные устройства идут параллельно,
+    тесты только на чтение распределяются по процессам свободно.
+
+    С --schedule группы устройств и медленные тесты раскладываются по N корзинам (по числу процессов)
+    с близкой суммарной ожидаемой длительностью, и каждая корзина становится одной группой xdist.
+
+    Запуск: pytest -n 5 (режим --dist loadgroup включается автоматически).
+    В конце сессии выводится загрузка каждого процесса - по ней подбирается N для CI.
+"""
+
+import heapq
+import time
+from collections import defaultdict
+
+import pytest
+
+from common.durations import expected_duration
+from common.nodeids import strip_group
+
+worker_timing_key = pytest.StashKey[dict]()
+
+
+def device_group(device):
+    return f'device-{device}'
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """
+        -n N по умолчанию включает --dist load, при котором тесты одного устройства
+        попали бы в разные процессы. Переключаем на loadgroup до того, как xdist выберет планировщик.
+        Процессы-исполнители разбирают командную строку заново и о переключении узнают из workerinput.
+    """
+    config.addinivalue_line('markers', 'mutates_device(param="device"): тест меняет состояние устройства '
+                                       'из параметра param, при параллельном запуске тесты одного устройства '
+                                       'идут в одном процессе')
+    config.stash[worker_timing_key] = {'started': time.perf_counter(),
+                                       'workers': defaultdict(lambda: {'tests': 0, 'busy': 0.0, 'groups': set()})}
+    if getattr(config.option, 'dist', 'no') == 'load':
+        config.option.dist = 'loadgroup'
+    if is_xdist_worker(config) and config.workerinput.get('dist') == 'loadgroup':
+        config.option.loadgroup = True
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput['dist'] = node.config.option.dist
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    # Маркер должен появиться раньше, чем xdist добавит имя группы к nodeid
+    for item in items:
+        marker = item.get_closest_marker('mutates_device')
+        if marker is None:
+            continue
+        param = marker.args[0] if marker.args else marker.kwargs.get('param', 'device')
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None or param not in callspec.params:
+            continue
+        item.add_marker(pytest.mark.xdist_group(device_group(callspec.params[param])))
+    if is_xdist_worker(config) and config.getoption('--schedule') and config.option.loadgroup:
+        pack_groups(config, items, config.workerinput.get('workercount', 1))
+
+
+def lpt_bins(weights, bins):
+    """
+        Жадный LPT: элементы по убыванию веса, каждый - в наименее загруженную корзину.
+        Возвращает {элемент: номер корзины}.
+    """
+    loads = [(0.0, i) for i in range(bins)]
+    assignment = {}
+    for key, weight in sorted(weights.items(), key=lambda item: (-item[1], str(item[0]))):
+        load, i = heapq.heappop(loads)
+        assignment[key] = i
+        heapq.heappush(loads, (load + weight, i))
+    return assignment
+
+
+def pack_groups(config, items, workers):
+    """
+        Группы устройств и тесты длиннее --pack-slow раскладываются по workers корзинам (lpt_bins).
+        Группа xdist каждого такого теста заменяется на bin-<k>: тесты одного устройства остаются
+        в одной корзине, значит и в одном процессе. Быстрые тесты без группы распределяет xdist.
+    """
+    if workers < 2:
+        return
+    slow = config.getoption('--pack-slow')
+    units = {}
+    weights = defaultdict(float)
+    for item in items:
+        groups = [mark.args[0] if mark.args else mark.kwargs.get('name', 'default')
+                  for mark in item.iter_markers('xdist_group')]
+        duration = expected_duration(config, strip_group(item.nodeid))
+        unit = '_'.join(sorted(groups)) if groups else (item.nodeid if duration >= slow else None)
+        if unit is None:
+            continue
+        units[item] = unit
+        weights[unit] += duration
+    bins = lpt_bins(weights, workers)
+    for item, unit in units.items():
+        item.own_markers = [mark for mark in item.own_markers if mark.name != 'xdist_group']
+        item.add_marker(pytest.mark.xdist_group(f'bin-{bins[unit]}'))
+
+
+def is_xdist_worker(config):
+    return hasattr(config, 'workerinput')
+
+
+def pytest_runtest_logreport(report):
+    """
+        В основном процессе xdist отчеты приходят с атрибутом node - процессом, выполнившим тест.
+    """
+    node = getattr(report, 'node', None)
+    if node is None:
+        return
+    worker = node.config.stash[worker_timing_key]['workers'][node.gateway.id]
+    worker['busy'] += report.duration
+    if report.when == 'call' or (report.when == 'setup' and report.skipped):
+        worker['tests'] += 1
+    if '@' in report.nodeid:
+        worker['groups'].add(report.nodeid.rsplit('@', 1)[1])
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    timing = config.stash.get(worker_timing_key, None)
+    if not timing or not timing['workers']:
+        return
+    wall = time.perf_counter() - timing['started']
+    terminalreporter.write_sep('-', 'xdist workers')
+    for worker_id, worker in sorted(timing['workers'].items()):
+        groups = ', '.join(sorted(worker['groups'])) or '-'
+        terminalreporter.write_line(f"{worker_id}: {worker['tests']} tests, busy {worker['busy']:.1f} s "
+                                    f"({worker['busy'] / wall:.0%} of {wall:.1f} s), groups: {groups}")
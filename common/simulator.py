@@ -0,0 +1,233 @@
+"""
+    Локальный симулятор платформы: REST API (/devices, PATCH /devices, /report),
+    WebSocket мониторинга (/start_monitoring/{address}) и минимальный веб-интерфейс,
+    повторяющий разметку, на которую рассчитаны локаторы frontend/locators.py.
+
+    Запуск отдельно:  python -m common.simulator --port 5585 --devices 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import weakref
+
+from aiohttp import WSCloseCode, web
+
+from common.rules import invalid_report_id_text, parse_duty, parse_freq, report_status, valid_freqs
+from common.server_thread import ServerThread
+
+default_devices = [('Engine', 'Controller'), ('Power', 'Power supply'), ('Transmission', 'Controller'),
+                   ('Brake', 'Actuator'), ('Control', 'Control unit')]
+device_types = ['Controller', 'Actuator', 'Sensor', 'Power supply', 'Control unit']
+endpoints = ['devices', 'patch', 'report', 'monitoring', 'ui']
+ui_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulator_ui.html')
+
+
+def make_fleet(size, seed=0):
+    """
+        Формирует список устройств в формате ответа GET /devices.
+        Первые пять устройств совпадают с all_devices из тестов, остальные - DeviceN.
+    """
+    rnd = random.Random(seed)
+    fleet = []
+    for i in range(size):
+        if i < len(default_devices):
+            name, device_type = default_devices[i]
+        else:
+            name, device_type = f'Device{i + 1}', device_types[i % len(device_types)]
+        fleet.append({
+            'name': name,
+            'type': device_type,
+            'address': f'{0xa000 + i:x}',
+            'pin_1_pwm_d': rnd.randint(0, 100),
+            'pin_1_pwm_f': rnd.choice(valid_freqs),
+            'pin_2_pwm_d': rnd.randint(0, 100),
+            'pin_2_pwm_f': rnd.choice(valid_freqs),
+        })
+    return fleet
+
+
+def monitoring_frame(device):
+    return json.dumps({
+        'address': device['address'],
+        'pin_1_pwm_d': device['pin_1_pwm_d'],
+        'pin_1_pwm_f': device['pin_1_pwm_f'],
+        'pin_2_pwm_d': device['pin_2_pwm_d'],
+        'pin_2_pwm_f': device['pin_2_pwm_f'],
+    })
+
+
+def report_text(device, report, lines=20):
+    header = [f"Report {report}", f"Device: {device['name']} ({device['type']})", f"Address: {device['address']}"]
+    body = [f"{report}.{i:04d} register {i:#06x} = {(i * report) % 65536:#06x}" for i in range(lines)]
+    return '\n'.join(header + body) + '\n'
+
+
+class PlatformSimulator:
+    """
+        Состояние и обработчики симулятора.
+
+        latency и jitter - словари {endpoint: секунды}, где endpoint один из
+        devices, patch, report, monitoring, ui; ключ '*' задаёт значение по умолчанию.
+        К каждому ответу добавляется задержка latency + random(0, jitter).
+    """
+
+    def __init__(self, devices=5, latency=None, jitter=None, frame_interval=0.5, report_lines=20, seed=0):
+        self.fleet = make_fleet(devices, seed)
+        self.by_address = {device['address']: device for device in self.fleet}
+        self.latency = latency or {}
+        self.jitter = jitter or {}
+        self.frame_interval = frame_interval
+        self.report_lines = report_lines
+        self._random = random.Random(seed)
+        self._changed = {}
+        self._sockets = weakref.WeakSet()
+
+    def _delay(self, endpoint):
+        latency = self.latency.get(endpoint, self.latency.get('*', 0))
+        jitter = self.jitter.get(endpoint, self.jitter.get('*', 0))
+        if jitter:
+            latency += self._random.uniform(0, jitter)
+        return asyncio.sleep(latency)
+
+    def _changed_condition(self, address):
+        if address not in self._changed:
+            self._changed[address] = asyncio.Condition()
+        return self._changed[address]
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/devices', self.get_devices)
+        app.router.add_patch('/devices', self.patch_devices)
+        app.router.add_get('/report', self.get_report)
+        app.router.add_get('/start_monitoring/{address}', self.start_monitoring)
+        app.router.add_get('/', self.ui)
+        app.router.add_get('/monitoring/{address}', self.ui)
+        app.router.add_get('/diagnostics/{address}', self.ui)
+        app.on_shutdown.append(self._close_sockets)
+        return app
+
+    async def get_devices(self, request):
+        await self._delay('devices')
+        return web.json_response(self.fleet)
+
+    async def patch_devices(self, request):
+        """
+            Каждое поле проверяется отдельно: невалидное значение игнорируется,
+            остальные применяются. Ответ всегда 200 для известного адреса.
+        """
+        await self._delay('patch')
+        device = self.by_address.get(request.query.get('address'))
+        if device is None:
+            return web.Response(status=404, text='Not found')
+        for pin in (1, 2):
+            if f'duty{pin}' in request.query:
+                duty = parse_duty(request.query[f'duty{pin}'])
+                if duty is not None:
+                    device[f'pin_{pin}_pwm_d'] = duty
+            if f'freq{pin}' in request.query:
+                freq = parse_freq(request.query[f'freq{pin}'])
+                if freq is not None:
+                    device[f'pin_{pin}_pwm_f'] = freq
+        changed = self._changed_condition(device['address'])
+        async with changed:
+            changed.notify_all()
+        return web.json_response(device)
+
+    async def get_report(self, request):
+        await self._delay('report')
+        device = self.by_address.get(request.query.get('address'))
+        if device is None:
+            return web.Response(status=404, text='Not found')
+        rep_id = request.query.get('repId', '')
+        status = report_status(rep_id)
+        if status == 400:
+            return web.Response(status=400, text=invalid_report_id_text)
+        if status == 404:
+            return web.Response(status=404, text='Not found')
+        return web.Response(text=report_text(device, int(rep_id), self.report_lines))
+
+    async def start_monitoring(self, request):
+        """
+            Отправляет состояние устройства сразу после подключения, затем каждые frame_interval
+            секунд и немедленно после каждого PATCH.
+        """
+        await self._delay('monitoring')
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        device = self.by_address.get(request.match_info['address'])
+        if device is None:
+            await ws.send_str('Not found')
+            await ws.close()
+            return ws
+        sender = asyncio.ensure_future(self._send_frames(ws, device))
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            sender.cancel()
+        return ws
+
+    async def _send_frames(self, ws, device):
+        changed = self._changed_condition(device['address'])
+        while not ws.closed:
+            try:
+                await ws.send_str(monitoring_frame(device))
+            except ConnectionResetError:
+                return
+            try:
+                async with changed:
+                    await asyncio.wait_for(changed.wait(), self.frame_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def ui(self, request):
+        await self._delay('ui')
+        return web.FileResponse(ui_path)
+
+    async def _close_sockets(self, app):
+        for ws in list(self._sockets):
+            await ws.close(code=WSCloseCode.GOING_AWAY)
+
+    def run_in_thread(self, host='127.0.0.1', port=0):
+        """
+            Запускает симулятор в фоновом потоке. Возвращает ServerThread, у которого есть url и stop().
+        """
+        server = ServerThread(self.app, host, port)
+        server.start()
+        return server
+
+
+def parse_endpoint_values(values):
+    """
+        Разбирает значения вида ['0.05', 'report=0.5'] в словарь {'*': 0.05, 'report': 0.5}.
+    """
+    result = {}
+    for value in values or []:
+        endpoint, _, seconds = value.rpartition('=')
+        endpoint = endpoint or '*'
+        if endpoint != '*' and endpoint not in endpoints:
+            raise ValueError(f'Неизвестный endpoint {endpoint}, допустимые: {endpoints}')
+        result[endpoint] = float(seconds)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Симулятор платформы')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5585)
+    parser.add_argument('--devices', type=int, default=5)
+    parser.add_argument('--latency', action='append', help='секунды или endpoint=секунды')
+    parser.add_argument('--jitter', action='append', help='секунды или endpoint=секунды')
+    parser.add_argument('--frame-interval', type=float, default=0.5)
+    args = parser.parse_args()
+    simulator = PlatformSimulator(args.devices, parse_endpoint_values(args.latency),
+                                  parse_endpoint_values(args.jitter), args.frame_interval)
+    web.run_app(simulator.app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
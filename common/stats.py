@@ -0,0 +1,71 @@
+import math
+from typing import Dict, Iterable, List, Sequence
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """
+        Перцентиль p (0-100) с линейной интерполяцией между соседними значениями.
+        Для пустой выборки возвращает nan.
+    """
+    data = sorted(values)
+    if not data:
+        return float('nan')
+    rank = (len(data) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(data) - 1)
+    return data[low] + (data[high] - data[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float], percentiles: List[float] = (50, 95, 99)) -> Dict[str, float]:
+    """
+        Краткая сводка по выборке: count, min, mean, max и перцентили в виде p50, p95, p99.
+    """
+    data = sorted(values)
+    summary = {'count': len(data)}
+    if not data:
+        return summary
+    summary['min'] = data[0]
+    summary['mean'] = sum(data) / len(data)
+    summary['max'] = data[-1]
+    for p in percentiles:
+        summary[f'p{p:g}'] = percentile(data, p)
+    return summary
+
+
+def mann_whitney_u(a: Iterable, b: Iterable) -> Dict[str, float]:
+    """
+        Односторонний U-критерий Манна-Уитни: значения выборки a больше значений b.
+        Элементы выборок - числа или пары (значение, вес): так корзины гистограммы задержек
+        передаются без разворачивания в отдельные замеры. Нормальное приближение с поправкой
+        на связанные ранги и на непрерывность. Возвращает u, z и p (nan, если выборка пуста).
+    """
+    def weighted(values):
+        return [value if isinstance(value, (tuple, list)) else (value, 1) for value in values]
+
+    a, b = weighted(a), weighted(b)
+    n1 = sum(weight for _, weight in a)
+    n2 = sum(weight for _, weight in b)
+    if not n1 or not n2:
+        return {'u': float('nan'), 'z': float('nan'), 'p': float('nan')}
+    totals = {}
+    in_a = {}
+    for value, weight in a:
+        totals[value] = totals.get(value, 0) + weight
+        in_a[value] = in_a.get(value, 0) + weight
+    for value, weight in b:
+        totals[value] = totals.get(value, 0) + weight
+    rank_sum = 0.0
+    ties = 0.0
+    seen = 0
+    for value in sorted(totals):
+        count = totals[value]
+        rank_sum += in_a.get(value, 0) * (seen + (count + 1) / 2)
+        ties += count ** 3 - count
+        seen += count
+    n = n1 + n2
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return {'u': u, 'z': 0.0, 'p': 1.0}
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return {'u': u, 'z': z, 'p': 0.5 * math.erfc(z / math.sqrt(2))}
@@ -0,0 +1,71 @@
+import pytest
+
+from common.api_client import ApiClient
+from common.cassette import Cassette, RecordingProxy, ReplayServer
+from common.simulator import PlatformSimulator
+from common.ws_monitor import run_monitoring
+
+
+@pytest.fixture
+def simulator():
+    server = PlatformSimulator(devices=2, frame_interval=0.05).run_in_thread()
+    yield server
+    server.stop()
+
+
+def traffic(url):
+    """
+        Один и тот же набор обменов для записи и воспроизведения: чтение, изменение, повторное чтение,
+        отчет и подписка на мониторинг. Возвращает то, что увидели тесты.
+    """
+    client = ApiClient(url, retries=0)
+    try:
+        devices = client.get_devices()
+        address = devices[0]['address']
+        patch = client.patch_device(address, duty1=42, freq1=devices[0]['pin_1_pwm_f'])
+        after = client.get_devices()
+        report = client.get_report(address, 100)
+        seen = {'devices': devices, 'patch': patch.status_code, 'after': after,
+                'report': (report.status_code, report.text)}
+    finally:
+        client.close()
+    monitoring = run_monitoring(url, [address], frames=2)[address]
+    seen['frames'] = [frame.text for frame in monitoring.frames]
+    seen['monitoring_error'] = monitoring.error
+    return seen
+
+
+def test_record_and_replay(tmp_path, simulator):
+    """
+        Запись через RecordingProxy и воспроизведение ReplayServer дают тестам те же ответы:
+        одинаковые запросы (GET /devices до и после PATCH) отдаются в записанном порядке, кадры мониторинга -
+        те же. Запрос, которого нет в кассете, - 404 и попадает в misses.
+    """
+    proxy = RecordingProxy(simulator.url)
+    proxy_server = proxy.run_in_thread()
+    try:
+        recorded = traffic(proxy_server.url)
+    finally:
+        proxy_server.stop()
+    path = tmp_path / 'cassette.jsonl.gz'
+    proxy.cassette.save(path)
+
+    cassette = Cassette.load(path)
+    assert {record['kind'] for record in cassette.records} == {'http', 'ws'}
+    replay = ReplayServer(cassette)
+    replay_server = replay.run_in_thread()
+    try:
+        replayed = traffic(replay_server.url)
+        assert replayed == recorded
+        assert recorded['after'] != recorded['devices'], 'PATCH не изменил состояние - порядок ответов не проверен'
+        assert replay.misses == []
+
+        client = ApiClient(replay_server.url, retries=0)
+        try:
+            missing = client.get_report(recorded['devices'][0]['address'], 200)
+        finally:
+            client.close()
+        assert missing.status_code == 404
+        assert len(replay.misses) == 1 and 'repId=200' in replay.misses[0]
+    finally:
+        replay_server.stop()
@@ -0,0 +1,165 @@
+import pytest
+
+from common.durations import durations_key
+from common.scheduling_plugin import pytest_collection_modifyitems
+from common.sharding_plugin import lpt_bins, pack_groups
+
+pytest_plugins = ['pytester']
+
+
+class FakeCache:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default):
+        return self.values.get(key, default)
+
+
+class FakeConfig:
+    """
+        Только то, что читают scheduling_plugin и sharding_plugin: опции, stash с ожидаемыми
+        длительностями (вместо истории производительности) и, при необходимости, кэш pytest.
+    """
+
+    def __init__(self, durations, cache=None, **options):
+        self.stash = pytest.Stash()
+        self.stash[durations_key] = {'durations': durations, 'default': 0.0}
+        self.options = {'--schedule': True, '--pack-slow': 1.0, **options}
+        if cache is not None:
+            self.cache = FakeCache(cache)
+
+    def getoption(self, name):
+        return self.options[name]
+
+
+def collect(pytester, **modules):
+    pytester.makepyfile(**modules)
+    items, _ = pytester.inline_genitems()
+    return items
+
+
+def loads(weights, assignment, bins):
+    result = [0.0] * bins
+    for key, weight in weights.items():
+        result[assignment[key]] += weight
+    return result
+
+
+def test_lpt_bins():
+    weights = {'a': 5, 'b': 4, 'c': 3, 'd': 3, 'e': 1}
+    assignment = lpt_bins(weights, 2)
+    assert assignment == {'a': 0, 'b': 1, 'c': 1, 'd': 0, 'e': 1}
+    assert loads(weights, assignment, 2) == [8, 8]
+
+
+def test_lpt_bins_more_bins_than_items():
+    assignment = lpt_bins({'a': 2, 'b': 1}, 4)
+    assert assignment['a'] != assignment['b']
+
+
+def test_lpt_bins_ties_are_deterministic():
+    weights = {name: 1.0 for name in 'dcba'}
+    assert lpt_bins(weights, 2) == lpt_bins(dict(reversed(weights.items())), 2) == {'a': 0, 'b': 1, 'c': 0, 'd': 1}
+
+
+packing_module = """
+    import pytest
+
+    @pytest.mark.xdist_group('dev1')
+    def test_dev1_a(): pass
+
+    @pytest.mark.xdist_group('dev1')
+    def test_dev1_b(): pass
+
+    @pytest.mark.xdist_group('dev2')
+    def test_dev2(): pass
+
+    def test_slow(): pass
+
+    def test_fast(): pass
+"""
+
+packing_durations = {
+    'test_packing.py::test_dev1_a': 1.0,
+    'test_packing.py::test_dev1_b': 1.0,
+    'test_packing.py::test_dev2': 3.0,
+    'test_packing.py::test_slow': 2.0,
+    'test_packing.py::test_fast': 0.1,
+}
+
+
+def groups_of(items):
+    return {item.name: [mark.args[0] for mark in item.iter_markers('xdist_group')] for item in items}
+
+
+def test_pack_groups(pytester):
+    items = collect(pytester, test_packing=packing_module)
+    pack_groups(FakeConfig(packing_durations), items, 2)
+    groups = groups_of(items)
+    # dev2 (3 s) - в корзину 0, dev1 (2 s) и test_slow (2 s) - в корзину 1
+    assert groups == {'test_dev1_a': ['bin-1'], 'test_dev1_b': ['bin-1'], 'test_dev2': ['bin-0'],
+                      'test_slow': ['bin-1'], 'test_fast': []}
+
+
+def test_pack_groups_single_worker(pytester):
+    items = collect(pytester, test_packing=packing_module)
+    pack_groups(FakeConfig(packing_durations), items, 1)
+    assert groups_of(items)['test_dev1_a'] == ['dev1']
+    assert groups_of(items)['test_slow'] == []
+
+
+ordering_modules = {
+    'test_slow_module': """
+        def test_module_level(): pass
+
+        class TestSlow:
+            def test_long(self): pass
+
+            def test_short(self): pass
+    """,
+    'test_fast_module': """
+        def test_one(): pass
+
+        def test_two(): pass
+    """,
+}
+
+ordering_durations = {
+    'test_slow_module.py::test_module_level': 0.5,
+    'test_slow_module.py::TestSlow::test_long': 5.0,
+    'test_slow_module.py::TestSlow::test_short': 1.0,
+    'test_fast_module.py::test_one': 1.0,
+    'test_fast_module.py::test_two': 0.5,
+}
+
+
+def test_schedule_keeps_modules_and_classes_together(pytester):
+    items = collect(pytester, **ordering_modules)
+    pytest_collection_modifyitems(FakeConfig(ordering_durations), items)
+    assert [item.nodeid for item in items] == [
+        'test_fast_module.py::test_two',
+        'test_fast_module.py::test_one',
+        'test_slow_module.py::TestSlow::test_short',
+        'test_slow_module.py::TestSlow::test_long',
+        'test_slow_module.py::test_module_level',
+    ]
+
+
+def test_schedule_failed_module_first(pytester):
+    items = collect(pytester, **ordering_modules)
+    cache = {'cache/lastfailed': {'test_slow_module.py::TestSlow::test_long': True}}
+    pytest_collection_modifyitems(FakeConfig(ordering_durations, cache=cache), items)
+    assert [item.nodeid for item in items] == [
+        'test_slow_module.py::TestSlow::test_long',
+        'test_slow_module.py::TestSlow::test_short',
+        'test_slow_module.py::test_module_level',
+        'test_fast_module.py::test_two',
+        'test_fast_module.py::test_one',
+    ]
+
+
+def test_schedule_disabled_keeps_collection_order(pytester):
+    items = collect(pytester, **ordering_modules)
+    collected = [item.nodeid for item in items]
+    pytest_collection_modifyitems(FakeConfig(ordering_durations, **{'--schedule': False}), items)
+    assert [item.nodeid for item in items] == collected
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from common.stats import mann_whitney_u, percentile, summarize
+
+
+def normal_sf(z):
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([4, 1, 3, 2], 0) == 1
+    assert percentile([4, 1, 3, 2], 100) == 4
+    assert math.isnan(percentile([], 50))
+
+
+def test_summarize():
+    summary = summarize([3, 1, 2])
+    assert summary['count'] == 3 and summary['min'] == 1 and summary['max'] == 3
+    assert summary['mean'] == 2 and summary['p50'] == 2
+    assert summarize([]) == {'count': 0}
+
+
+def test_mwu_without_ties():
+    """
+        a = [4, 5, 6], b = [1, 2, 3]: ранги a - 4, 5, 6, R = 15, U = 15 - 3 * 4 / 2 = 9.
+        Дисперсия 3 * 3 / 12 * 7 = 5.25, z = (9 - 4.5 - 0.5) / sqrt(5.25).
+    """
+    result = mann_whitney_u([4, 5, 6], [1, 2, 3])
+    assert result['u'] == 9
+    assert result['z'] == pytest.approx(4 / math.sqrt(5.25))
+    assert result['p'] == pytest.approx(0.04043, abs=1e-4)
+
+    reverse = mann_whitney_u([1, 2, 3], [4, 5, 6])
+    assert reverse['u'] == 0
+    assert reverse['p'] == pytest.approx(normal_sf(-5 / math.sqrt(5.25)))
+    assert reverse['p'] > 0.95
+
+
+def test_mwu_with_ties():
+    """
+        a = [1, 2, 2], b = [2, 3]: у значения 2 три связанных ранга 2, 3, 4 (средний 3),
+        R = 1 + 3 + 3 = 7, U = 7 - 6 = 1. Поправка на связи: sum(t^3 - t) = 24,
+        дисперсия 3 * 2 / 12 * (6 - 24 / 20) = 2.4, z = (1 - 3 - 0.5) / sqrt(2.4).
+    """
+    result = mann_whitney_u([1, 2, 2], [2, 3])
+    assert result['u'] == 1
+    assert result['z'] == pytest.approx(-2.5 / math.sqrt(2.4))
+    assert result['p'] == pytest.approx(0.9467, abs=1e-4)
+
+
+def test_mwu_weights_equal_expanded_samples():
+    weighted = mann_whitney_u([(1, 2), (3, 1), (5, 3)], [(2, 2), (4, 1)])
+    expanded = mann_whitney_u([1, 1, 3, 5, 5, 5], [2, 2, 4])
+    assert weighted == pytest.approx(expanded)
+
+
+def test_mwu_degenerate_samples():
+    assert math.isnan(mann_whitney_u([], [1, 2])['p'])
+    assert mann_whitney_u([1, 1], [1, 1])['p'] == 1.0
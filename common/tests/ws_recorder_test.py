@@ -0,0 +1,37 @@
+import pytest
+
+from common.ws_recorder import MonitoringRecorder, check_recording, load_recording
+
+
+def test_out_of_dtype_values(tmp_path):
+    """
+        Значения, не помещающиеся в колонки duty (int16) и freq (int32), не ломают запись,
+        а попадают в проверку диапазона.
+    """
+    recorder = MonitoringRecorder(tmp_path)
+    recorder.append(1.0, 'addr', 1, 40000, 10)
+    recorder.append(1.0, 'addr', 2, 50, 2 ** 40)
+    recorder.append(1.5, 'addr', 1, 50, 10)
+    recorder.close()
+    result = check_recording(load_recording(tmp_path))
+    assert result['rows'] == 3
+    assert result['out_of_range'] == 2, result['out_of_range_samples']
+
+
+def test_gaps_and_drift(tmp_path):
+    """
+        Интервалы считаются по устройству: кадры двух устройств вперемешку, у второго - пауза 3 с.
+    """
+    recorder = MonitoringRecorder(tmp_path, capacity=2)
+    for i in range(5):
+        recorder.append(i * 0.5, 'a', 1, 10, 10)
+        recorder.append(i * 0.5, 'a', 2, 10, 10)
+    for t in (0.1, 0.6, 3.6):
+        recorder.append(t, 'b', 1, 10, 10)
+    recorder.close()
+    result = check_recording(load_recording(tmp_path), max_gap=2.0, interval=0.5)
+    assert result['frames_per_device'] == {'a': 5, 'b': 3}
+    assert result['gaps'] == 1 and result['gap_samples'][0]['address'] == 'b'
+    assert result['mean_interval']['a'] == pytest.approx(0.5)
+    assert list(result['drift']) == ['b']
+    assert result['out_of_range'] == 0
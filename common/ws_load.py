@@ -0,0 +1,136 @@
+"""
+    Нагрузочный тест мониторинга: сколько одновременных подписчиков /start_monitoring/{address}
+    выдерживает платформа, прежде чем падает частота кадров.
+
+    На каждой ступени открывается n подписчиков на каждое устройство (n = 1..K),
+    все кадры получают отметку времени. По ступени считаются перцентили интервалов между кадрами,
+    кадров в секунду на соединение и времени установки соединения.
+
+    Запуск:  python -m common.ws_load --url http://0.0.0.0:5585 --max-subscribers 20 --duration 10 -o ws_load.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from common.api_client import ApiClient, DEFAULT_PLATFORM_URL
+from common.stats import summarize
+from common.ws_monitor import monitor_address
+
+
+def ramp_levels(max_subscribers, step=1):
+    levels = list(range(1, max_subscribers + 1, step))
+    if levels[-1] != max_subscribers:
+        levels.append(max_subscribers)
+    return levels
+
+
+def level_report(subscribers, results, duration):
+    """
+        Сводка по одной ступени нагрузки. Интервалы между кадрами и время соединения - в миллисекундах.
+    """
+    gaps = []
+    fps = []
+    connect_times = []
+    errors = []
+    for result in results:
+        if result.error is not None:
+            errors.append({'address': result.address, 'error': result.error})
+            continue
+        connect_times.append(result.connect_time * 1000)
+        received = [frame.received for frame in result.frames]
+        gaps.extend((b - a) * 1000 for a, b in zip(received, received[1:]))
+        if len(received) > 1 and received[-1] > received[0]:
+            fps.append((len(received) - 1) / (received[-1] - received[0]))
+        else:
+            fps.append(0.0)
+    frames_total = sum(len(result.frames) for result in results)
+    return {
+        'subscribers_per_device': subscribers,
+        'connections': len(results),
+        'errors': len(errors),
+        'error_samples': errors[:10],
+        'frames_total': frames_total,
+        'frames_per_second_total': frames_total / duration if duration else None,
+        'inter_frame_gap_ms': summarize(gaps),
+        'fps_per_connection': summarize(fps, percentiles=[5, 50, 95]),
+        'connect_time_ms': summarize(connect_times),
+    }
+
+
+async def run_level(base_url, addresses, subscribers, duration, connect_timeout):
+    tasks = [monitor_address(base_url, address, frames=None, duration=duration, connect_timeout=connect_timeout)
+             for address in addresses for _ in range(subscribers)]
+    return await asyncio.gather(*tasks)
+
+
+async def run_load(base_url, addresses, levels, duration, pause=1.0, connect_timeout=10, log=None):
+    report = []
+    for subscribers in levels:
+        results = await run_level(base_url, addresses, subscribers, duration, connect_timeout)
+        level = level_report(subscribers, results, duration)
+        report.append(level)
+        if log is not None:
+            log(level)
+        await asyncio.sleep(pause)
+    return report
+
+
+def print_level(level):
+    gap = level['inter_frame_gap_ms']
+    fps = level['fps_per_connection']
+    connect = level['connect_time_ms']
+    print(f"{level['subscribers_per_device']:>4} x dev | conn {level['connections']:>5} err {level['errors']:>4} | "
+          f"gap p50/p95/p99 {gap.get('p50', float('nan')):8.1f} {gap.get('p95', float('nan')):8.1f} "
+          f"{gap.get('p99', float('nan')):8.1f} ms | fps p50 {fps.get('p50', float('nan')):6.2f} | "
+          f"connect p95 {connect.get('p95', float('nan')):7.1f} ms", file=sys.stderr)
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'нужно целое число не меньше 1, получено {value}')
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный тест мониторинга по WebSocket')
+    parser.add_argument('--url', default=DEFAULT_PLATFORM_URL, help='адрес платформы')
+    parser.add_argument('--address', action='append', help='адрес устройства (по умолчанию все из /devices)')
+    parser.add_argument('--max-subscribers', type=positive_int, default=10, help='K - максимум подписчиков на устройство')
+    parser.add_argument('--step', type=positive_int, default=1, help='шаг увеличения числа подписчиков')
+    parser.add_argument('--duration', type=float, default=10, help='длительность ступени, секунды')
+    parser.add_argument('--pause', type=float, default=1, help='пауза между ступенями, секунды')
+    parser.add_argument('--connect-timeout', type=float, default=10)
+    parser.add_argument('-o', '--output', help='файл для результатов в JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    addresses = args.address
+    if not addresses:
+        client = ApiClient(args.url)
+        addresses = list(client.get_devices_addresses().values())
+        client.close()
+
+    levels = ramp_levels(args.max_subscribers, args.step)
+    started = time.time()
+    report = asyncio.run(run_load(args.url, addresses, levels, args.duration, args.pause,
+                                  args.connect_timeout, log=print_level))
+    result = {
+        'platform_url': args.url,
+        'started': started,
+        'addresses': addresses,
+        'duration': args.duration,
+        'levels': report,
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
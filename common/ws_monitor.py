@@ -0,0 +1,178 @@
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import websockets
+from websockets.sync.client import connect
+
+
+@dataclass
+class Frame:
+    received: float
+    text: str
+
+    @property
+    def data(self) -> Optional[dict]:
+        """
+            Кадр мониторинга в виде словаря, либо None, если сервер прислал не JSON (например, "Not found").
+        """
+        try:
+            data = json.loads(self.text)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+@dataclass
+class MonitoringResult:
+    address: str
+    url: str
+    connect_time: Optional[float] = None
+    frames: List[Frame] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def monitoring_url(base_url: str, address: str) -> str:
+    """
+        http://host:port -> ws://host:port/start_monitoring/{address}
+    """
+    if base_url.startswith('https://'):
+        base_url = 'wss://' + base_url[len('https://'):]
+    elif base_url.startswith('http://'):
+        base_url = 'ws://' + base_url[len('http://'):]
+    return f"{base_url.rstrip('/')}/start_monitoring/{address}"
+
+
+async def monitor_address(base_url: str, address: str, frames: Optional[int] = 1,
+                          duration: Optional[float] = None, connect_timeout: float = 10,
+                          on_frame=None) -> MonitoringResult:
+    """
+        Подписывается на мониторинг одного устройства и читает кадры,
+        пока не получит frames кадров или не пройдёт duration секунд (что наступит раньше).
+        on_frame(address, frame) вызывается для каждого кадра сразу после получения.
+    """
+    result = MonitoringResult(address, monitoring_url(base_url, address))
+    started = time.perf_counter()
+    try:
+        async with websockets.connect(result.url, open_timeout=connect_timeout) as ws:
+            result.connect_time = time.perf_counter() - started
+            deadline = None if duration is None else time.monotonic() + duration
+            while frames is None or len(result.frames) < frames:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    text = await asyncio.wait_for(ws.recv(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                frame = Frame(time.time(), text if isinstance(text, str) else text.decode())
+                result.frames.append(frame)
+                if on_frame is not None:
+                    on_frame(address, frame)
+    except Exception as ex:
+        result.error = f'{type(ex).__name__}: {ex}'
+    return result
+
+
+async def monitor_devices(base_url: str, addresses: Iterable[str], frames: Optional[int] = 1,
+                          duration: Optional[float] = None, concurrency: int = 50,
+                          connect_timeout: float = 10, on_frame=None) -> Dict[str, MonitoringResult]:
+    """
+        Подписывается на мониторинг всех устройств одновременно,
+        не более concurrency открытых соединений за раз.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(address):
+        async with semaphore:
+            return await monitor_address(base_url, address, frames, duration, connect_timeout, on_frame)
+
+    addresses = list(addresses)
+    results = await asyncio.gather(*(limited(address) for address in addresses))
+    return dict(zip(addresses, results))
+
+
+def run_monitoring(base_url: str, addresses: Iterable[str], frames: Optional[int] = 1,
+                   duration: Optional[float] = None, concurrency: int = 50,
+                   connect_timeout: float = 10, on_frame=None) -> Dict[str, MonitoringResult]:
+    """
+        Синхронная обёртка над monitor_devices для фикстур и скриптов.
+    """
+    return asyncio.run(monitor_devices(base_url, addresses, frames, duration, concurrency, connect_timeout, on_frame))
+
+
+class FrameWatcher:
+    """
+        Подписка на мониторинг одного устройства в фоновом потоке для синхронных тестов.
+        Все кадры сохраняются с отметкой времени получения (time.time()),
+        wait_for() ждет первый кадр не раньше since, удовлетворяющий условию.
+    """
+
+    def __init__(self, base_url: str, address: str, connect_timeout: float = 10):
+        self.address = address
+        self.url = monitoring_url(base_url, address)
+        self.connect_timeout = connect_timeout
+        self.frames: List[Frame] = []
+        self.error: Optional[str] = None
+        self._condition = threading.Condition()
+        self._connected = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'FrameWatcher':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._connected.wait(self.connect_timeout)
+        return self
+
+    def _run(self):
+        try:
+            with connect(self.url, open_timeout=self.connect_timeout) as ws:
+                self._connected.set()
+                while not self._stopped.is_set():
+                    try:
+                        text = ws.recv(timeout=0.2)
+                    except TimeoutError:
+                        continue
+                    frame = Frame(time.time(), text if isinstance(text, str) else text.decode())
+                    with self._condition:
+                        self.frames.append(frame)
+                        self._condition.notify_all()
+        except Exception as ex:
+            self.error = f'{type(ex).__name__}: {ex}'
+        finally:
+            self._connected.set()
+            with self._condition:
+                self._condition.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        with self._condition:
+            return self.frames[-1] if self.frames else None
+
+    def wait_for(self, predicate, since: float = 0.0, timeout: float = 5) -> Optional[Frame]:
+        deadline = time.monotonic() + timeout
+        checked = 0
+        with self._condition:
+            while True:
+                for frame in self.frames[checked:]:
+                    if frame.received >= since and predicate(frame):
+                        return frame
+                checked = len(self.frames)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.error is not None or self._stopped.is_set():
+                    return None
+                self._condition.wait(remaining)
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,216 @@
+"""
+    Запись потоков мониторинга в колонки NumPy на диске и векторные проверки записи.
+
+    Каждый кадр /start_monitoring раскладывается на две строки (pin 1 и pin 2) в колонках
+    t (float64, unix-время получения), address (uint16, номер адреса в списке addresses из meta.json),
+    pin (uint8), duty (int16) и freq (int32). Колонки - файлы, отображенные в память (np.memmap),
+    растут удвоением и пишутся только в конец, поэтому многочасовая запись не держится в памяти.
+    Нечисловые duty/freq и целые, не помещающиеся в тип колонки, записываются как -1
+    и попадают в проверку диапазона.
+
+    Запуск:  python -m common.ws_recorder record --url http://0.0.0.0:5585 --duration 3600 -o soak
+             python -m common.ws_recorder check soak --interval 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from common.api_client import ApiClient, DEFAULT_PLATFORM_URL
+from common.rules import valid_freqs
+from common.ws_monitor import Frame, monitor_devices
+
+columns = {'t': np.float64, 'address': np.uint16, 'pin': np.uint8, 'duty': np.int16, 'freq': np.int32}
+missing_value = -1
+
+
+def _as_value(value, dtype) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        return missing_value
+    limits = np.iinfo(dtype)
+    return value if limits.min <= value <= limits.max else missing_value
+
+
+class MonitoringRecorder:
+    """
+        Колонки записи в каталоге directory. append_frame() подходит как on_frame для ws_monitor.
+        close() обрезает файлы до фактического числа строк и сохраняет meta.json.
+    """
+
+    def __init__(self, directory, capacity: int = 1 << 16):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self.bad_frames = 0
+        self.addresses = {}
+        self.capacity = 0
+        self.arrays = {}
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name, dtype in columns.items():
+            if name in self.arrays:
+                self.arrays[name].flush()
+                del self.arrays[name]
+            path = self.directory / f'{name}.bin'
+            with open(path, 'ab') as file:
+                file.truncate(capacity * np.dtype(dtype).itemsize)
+            self.arrays[name] = np.memmap(path, dtype=dtype, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+
+    def address_id(self, address: str) -> int:
+        if address not in self.addresses:
+            self.addresses[address] = len(self.addresses)
+        return self.addresses[address]
+
+    def append(self, t: float, address: str, pin: int, duty, freq):
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        i = self.count
+        self.arrays['t'][i] = t
+        self.arrays['address'][i] = self.address_id(address)
+        self.arrays['pin'][i] = pin
+        self.arrays['duty'][i] = _as_value(duty, columns['duty'])
+        self.arrays['freq'][i] = _as_value(freq, columns['freq'])
+        self.count += 1
+
+    def append_frame(self, address: str, frame: Frame):
+        data = frame.data
+        if data is None:
+            self.bad_frames += 1
+            return
+        for pin in (1, 2):
+            self.append(frame.received, address, pin, data.get(f'pin_{pin}_pwm_d'), data.get(f'pin_{pin}_pwm_f'))
+
+    def close(self):
+        for name, dtype in columns.items():
+            self.arrays[name].flush()
+        self.arrays = {}
+        for name, dtype in columns.items():
+            with open(self.directory / f'{name}.bin', 'r+b') as file:
+                file.truncate(self.count * np.dtype(dtype).itemsize)
+        meta = {'rows': self.count, 'bad_frames': self.bad_frames,
+                'columns': {name: np.dtype(dtype).str for name, dtype in columns.items()},
+                'addresses': sorted(self.addresses, key=self.addresses.get)}
+        (self.directory / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+
+def load_recording(directory) -> Dict[str, object]:
+    """
+        Открывает запись только для чтения. Колонки - np.memmap, данные читаются с диска по мере обращения.
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / 'meta.json').read_text())
+    recording = {'meta': meta}
+    for name, dtype in meta['columns'].items():
+        recording[name] = (np.memmap(directory / f'{name}.bin', dtype=np.dtype(dtype), mode='r', shape=(meta['rows'],))
+                           if meta['rows'] else np.empty(0, dtype=np.dtype(dtype)))
+    return recording
+
+
+def check_recording(recording, max_gap: float = 5.0, interval: Optional[float] = None,
+                    drift_tolerance: float = 0.2, samples: int = 10) -> dict:
+    """
+        Проверки всей записи без цикла по кадрам:
+        out_of_range - duty вне 0..100 или freq не из valid_freqs;
+        gaps - паузы между кадрами одного устройства больше max_gap секунд;
+        drift - устройства, у которых средний интервал между кадрами отличается от interval
+        больше чем на drift_tolerance (доля), если interval задан.
+    """
+    t, address, pin = recording['t'], recording['address'], recording['pin']
+    duty, freq = recording['duty'], recording['freq']
+    names = recording['meta']['addresses']
+
+    bad = (duty < 0) | (duty > 100) | ~np.isin(freq, valid_freqs)
+    bad_rows = np.flatnonzero(bad)
+
+    # интервалы считаем по строкам pin 1: одна строка на кадр. Строки пишутся в порядке получения,
+    # поэтому устойчивая сортировка по адресу оставляет кадры каждого устройства упорядоченными по времени
+    frames = np.flatnonzero(pin == 1)
+    order = frames[np.argsort(address[frames], kind='stable')]
+    frame_t = t[order]
+    frame_address = address[order]
+    same_device = frame_address[1:] == frame_address[:-1]
+    dt = np.diff(frame_t)[same_device]
+    dt_address = frame_address[1:][same_device]
+    gap_rows = np.flatnonzero(dt > max_gap)
+
+    frame_counts = np.bincount(frame_address, minlength=len(names))
+    interval_sums = np.bincount(dt_address, weights=dt, minlength=len(names))
+    interval_counts = np.bincount(dt_address, minlength=len(names))
+    mean_interval = np.divide(interval_sums, interval_counts, out=np.full(len(names), np.nan),
+                              where=interval_counts > 0)
+
+    drift = {}
+    if interval is not None:
+        relative = mean_interval / interval - 1
+        for i in np.flatnonzero(np.abs(relative) > drift_tolerance):
+            drift[names[i]] = {'mean_interval': float(mean_interval[i]), 'drift': float(relative[i])}
+
+    return {
+        'rows': int(len(t)),
+        'frames': int(len(frames)),
+        'bad_frames': recording['meta'].get('bad_frames', 0),
+        'out_of_range': int(len(bad_rows)),
+        'out_of_range_samples': [{'address': names[address[i]], 't': float(t[i]), 'pin': int(pin[i]),
+                                  'duty': int(duty[i]), 'freq': int(freq[i])} for i in bad_rows[:samples]],
+        'gaps': int(len(gap_rows)),
+        'gap_samples': [{'address': names[dt_address[i]], 'gap': float(dt[i])} for i in gap_rows[:samples]],
+        'max_gap': float(dt.max()) if len(dt) else None,
+        'frames_per_device': {names[i]: int(count) for i, count in enumerate(frame_counts)},
+        'mean_interval': {names[i]: (None if np.isnan(value) else float(value))
+                          for i, value in enumerate(mean_interval)},
+        'drift': drift,
+    }
+
+
+def record(base_url, addresses, directory, duration, concurrency=50, connect_timeout=10) -> MonitoringRecorder:
+    recorder = MonitoringRecorder(directory)
+    try:
+        asyncio.run(monitor_devices(base_url, addresses, frames=None, duration=duration, concurrency=concurrency,
+                                    connect_timeout=connect_timeout, on_frame=recorder.append_frame))
+    finally:
+        recorder.close()
+    return recorder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Запись и проверка потоков мониторинга')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='записать мониторинг всех устройств')
+    record_parser.add_argument('--url', default=DEFAULT_PLATFORM_URL, help='адрес платформы')
+    record_parser.add_argument('--address', action='append', help='адрес устройства (по умолчанию все из /devices)')
+    record_parser.add_argument('--duration', type=float, default=60, help='длительность записи, секунды')
+    record_parser.add_argument('--concurrency', type=int, default=50)
+    record_parser.add_argument('-o', '--output', required=True, help='каталог записи')
+
+    check_parser = commands.add_parser('check', help='проверить запись')
+    check_parser.add_argument('directory', help='каталог записи')
+    check_parser.add_argument('--max-gap', type=float, default=5.0, help='допустимая пауза между кадрами, секунды')
+    check_parser.add_argument('--interval', type=float, help='ожидаемый интервал между кадрами, секунды')
+    check_parser.add_argument('--drift-tolerance', type=float, default=0.2, help='допустимое отклонение интервала')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        addresses = args.address
+        if not addresses:
+            client = ApiClient(args.url)
+            addresses = list(client.get_devices_addresses().values())
+            client.close()
+        recorder = record(args.url, addresses, args.output, args.duration, args.concurrency)
+        print(f'{recorder.count} rows, {recorder.bad_frames} bad frames -> {args.output}', file=sys.stderr)
+        return 0
+
+    result = check_recording(load_recording(args.directory), args.max_gap, args.interval, args.drift_tolerance)
+    print(json.dumps(result, indent=2))
+    return 1 if result['out_of_range'] or result['gaps'] or result['drift'] or result['bad_frames'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+pytest_plugins = ['common.platform_plugin', 'common.benchmark_plugin', 'common.sharding_plugin',
+                  'common.instrumentation_plugin', 'common.perf_history_plugin',
+                  'common.scheduling_plugin']
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('monitoring', 'Мониторинг по WebSocket')
+    group.addoption('--ws-frames', type=int, default=1,
+                    help='Сколько кадров читать с каждого устройства (0 - без ограничения, до --ws-duration)')
+    group.addoption('--ws-duration', type=float, default=None,
+                    help='Сколько секунд держать поток открытым')
+    group.addoption('--ws-concurrency', type=int, default=50,
+                    help='Максимум одновременно открытых подписок')
+    group.addoption('--ws-record', metavar='DIR',
+                    help='Сохранить кадры мониторинга в колонки NumPy (см. python -m common.ws_recorder check)')
+    group.addoption('--ws-max-gap', type=float, default=5.0,
+                    help='Допустимая пауза между кадрами одного устройства, секунды')
+    group.addoption('--ws-interval', type=float, default=None,
+                    help='Ожидаемый интервал между кадрами, секунды (с --simulator по умолчанию --sim-frame-interval)')
+
+    group = parser.getgroup('browser', 'Браузер')
+    group.addoption('--browser-max-uses', type=int, default=50,
+                    help='Через сколько тестов перезапускать браузер из пула')
+    group.addoption('--browser-profile', choices=['default', 'headless', 'lean'], default='default',
+                    help='Профиль запуска Chrome: default - как есть, headless - без окна (для -n и CI), '
+                         'lean - без окна, eager-загрузка, без картинок и шрифтов, с готовым профилем')
+    group.addoption('--browser-profile-samples', type=int, default=3,
+                    help='Сколько запусков браузера на профиль в бенчмарке профилей')
@@ -1,17 +1,271 @@
-from selenium.common.exceptions import NoSuchElementException
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from locators import Locators
+
+table_snapshot_script = """
+    var table = document.querySelector(arguments[0]);
+    if (!table) {
+        return null;
+    }
+    var text = function (node) { return node ? node.innerText.trim() : null; };
+    var rows = table.querySelectorAll(arguments[1]);
+    return Array.prototype.map.call(rows, function (row) {
+        return {
+            cells: Array.prototype.map.call(row.querySelectorAll('td'), text),
+            address: text(row.querySelector('td > article.ant-typography')),
+            buttons: Array.prototype.map.call(row.querySelectorAll('td > button'), text)
+        };
+    });
+"""
+
+wait_script = """
+    var how = arguments[0], what = arguments[1], condition = arguments[2], expected = arguments[3];
+    var timeout = arguments[4], done = arguments[arguments.length - 1];
+    var find = function () {
+        if (how === 'xpath') {
+            return document.evaluate(what, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(what);
+    };
+    var textOf = function (node) { return node ? (node.innerText || node.textContent || '').trim() : null; };
+    var initial = textOf(find());
+    var check = function () {
+        var node = find();
+        var text = textOf(node);
+        var ok = {
+            'present': node !== null,
+            'absent': node === null,
+            'equals': node !== null && text === expected,
+            'not_equals': node !== null && text !== expected,
+            'nonempty': node !== null && text.length > 0,
+            'changed': node !== null && text !== initial
+        }[condition];
+        return ok ? {ok: true, element: node, text: text} : null;
+    };
+    var result = check();
+    if (result) {
+        done(result);
+        return;
+    }
+    var finished = false;
+    var finish = function (value) {
+        if (finished) {
+            return;
+        }
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(value);
+    };
+    var observer = new MutationObserver(function () {
+        var value = check();
+        if (value) {
+            finish(value);
+        }
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+    var timer = setTimeout(function () {
+        var node = find();
+        finish({ok: false, element: node, text: textOf(node)});
+    }, timeout);
+"""
+
+text_recorder_script = """
+    var how = arguments[0], what = arguments[1], key = arguments[2];
+    var find = function () {
+        if (how === 'xpath') {
+            return document.evaluate(what, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(what);
+    };
+    var textOf = function (node) { return node ? (node.innerText || node.textContent || '').trim() : null; };
+    var now = function () { return (performance.timeOrigin + performance.now()) / 1000; };
+    window.__textChanges = window.__textChanges || {};
+    if (window.__textChanges[key]) {
+        window.__textChanges[key].observer.disconnect();
+    }
+    var record = {changes: [{t: now(), text: textOf(find())}]};
+    record.observer = new MutationObserver(function () {
+        var text = textOf(find());
+        if (text !== record.changes[record.changes.length - 1].text) {
+            record.changes.push({t: now(), text: text});
+        }
+    });
+    record.observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    window.__textChanges[key] = record;
+"""
+
+# длительности BasePage.open() за сессию, сохраняются в историю производительности как page_load
+page_load_times = []
+
+text_changes_script = """
+    var record = (window.__textChanges || {})[arguments[0]];
+    return record ? record.changes : null;
+"""
+
+
+@dataclass
+class TableRow:
+    """
+        Строка таблицы устройств. index - номер строки, начиная с 1 (как в //tr[i]).
+    """
+    index: int
+    cells: List[str]
+    address: str
+    buttons: List[str] = field(default_factory=list)
+
+    @property
+    def name(self):
+        return self.cells[0] if self.cells else None
+
+    @property
+    def type(self):
+        return self.cells[1] if len(self.cells) > 1 else None
+
+    def has_button(self, text):
+        return any(text in button for button in self.buttons)
+
 
 class BasePage():
+    """
+        Ожидания построены на MutationObserver, внедренном через execute_async_script:
+        ожидание завершается в момент изменения DOM, без опроса по таймеру.
+        Неявное ожидание (implicitly_wait) выключено, поэтому is_element_present
+        для отсутствующего элемента возвращает False сразу, а не через timeout секунд.
+    """
+
+    script_timeout = 60
+
     def __init__(self, browser, url, timeout=3):
         self.browser = browser
         self.url = url
-        self.browser.implicitly_wait(timeout)
+        self.timeout = timeout
+        self.browser.implicitly_wait(0)
+        self.browser.set_script_timeout(self.script_timeout)
 
     def open(self):
+        started = time.perf_counter()
         self.browser.get(self.url)
+        page_load_times.append(time.perf_counter() - started)
+
+    def back_to_table(self, table_url):
+        """
+            Возврат к таблице устройств через history.back() (без перезагрузки, если переход был внутри SPA).
+            Если таблица так и не появилась, страница открывается заново.
+        """
+        if self.browser.current_url != table_url:
+            self.browser.back()
+        if not self.wait_for_element(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE):
+            self.browser.get(table_url)
+
+    def learn_links(self, button, header, limit=None):
+        """
+            Карта переходов: один проход по таблице устройств. Для каждой строки нажимаем кнопку button
+            ('Monitoring' или 'Diagnostics'), ждем заголовок header (локатор), запоминаем current_url
+            и возвращаемся к таблице через историю. Таблица загружается один раз, а не на каждую строку.
+            Если таблица уже открыта, она не загружается повторно. limit - обойти только первые limit строк.
+            Возвращает (ссылки {имя устройства: url}, номера строк, где кнопки нет или она не ведет на страницу).
+        """
+        if not self.is_element_present(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE):
+            self.open()
+        table_url = self.browser.current_url
+        rows = self.get_table_snapshot() or []
+        links = {}
+        failed = []
+        for row in rows[:limit]:
+            if not row.has_button(button):
+                failed.append(row.index)
+                continue
+            self.find(By.XPATH, f"//tr[{row.index}]/td/button/span[contains(text(), '{button}')]").click()
+            if self.wait_for_element(*header):
+                links[row.name] = self.browser.current_url
+            else:
+                failed.append(row.index)
+            self.back_to_table(table_url)
+        return links, failed
 
     def is_element_present(self, how, what):
         try:
             self.browser.find_element(how, what)
         except (NoSuchElementException):
             return False
-        return True
\ No newline at end of file
+        return True
+
+    def _wait(self, how, what, condition, expected=None, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout + 1 > self.script_timeout:
+            self.browser.set_script_timeout(timeout + 1)
+        return self.browser.execute_async_script(wait_script, how, what, condition, expected, int(timeout * 1000))
+
+    def wait_for_element(self, how, what, timeout=None):
+        """
+            Ждет появления элемента. Возвращает элемент, либо None, если за timeout секунд он не появился.
+        """
+        result = self._wait(how, what, 'present', timeout=timeout)
+        return result['element'] if result['ok'] else None
+
+    def wait_for_absence(self, how, what, timeout=None):
+        return self._wait(how, what, 'absent', timeout=timeout)['ok']
+
+    def wait_for_text(self, how, what, condition, expected=None, timeout=None):
+        """
+            Ждет, пока текст элемента будет удовлетворять условию, и возвращает этот текст.
+            condition: equals / not_equals (с expected), nonempty, changed (отличается от текста в момент вызова).
+            Если условие не выполнилось за timeout секунд, выбрасывает TimeoutException.
+        """
+        result = self._wait(how, what, condition, expected, timeout)
+        if not result['ok']:
+            raise TimeoutException(f"Текст элемента {what} не выполнил условие {condition} {expected!r}, "
+                                   f"текущее значение: {result['text']!r}")
+        return result['text']
+
+    def record_text_changes(self, how, what, key=None):
+        """
+            Вешает на страницу MutationObserver, который запоминает каждое изменение текста элемента
+            с отметкой времени браузера в секундах unix-времени (performance.timeOrigin + performance.now()).
+            Отметка ставится в момент изменения DOM, а не в момент опроса из теста.
+        """
+        self.browser.execute_script(text_recorder_script, how, what, key or what)
+
+    def get_text_changes(self, key):
+        """
+            Изменения, записанные record_text_changes: список {'t': секунды, 'text': текст}.
+        """
+        return self.browser.execute_script(text_changes_script, key) or []
+
+    def find(self, how, what, timeout=None):
+        """
+            find_element с ожиданием появления элемента.
+        """
+        element = self.wait_for_element(how, what, timeout)
+        if element is None:
+            raise NoSuchElementException(f'Элемент {what} не появился на странице')
+        return element
+
+    def get_table_snapshot(self):
+        """
+            Считывает всю таблицу устройств одним execute_script: текст ячеек, адрес и кнопки каждой строки.
+            Вместо find_elements + .text для каждой ячейки (один HTTP-запрос к WebDriver на ячейку)
+            получается один запрос на всю таблицу, сколько бы в ней ни было строк.
+            Возвращает список TableRow, либо None, если таблицы на странице нет.
+        """
+        self.wait_for_element(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE)
+        rows = self.browser.execute_script(table_snapshot_script, Locators.DEVICE_TABLE[1],
+                                           Locators.AT_LEAST_ONE_DEVICE_IN_TABLE[1])
+        if rows is None:
+            return None
+        return [TableRow(i + 1, row['cells'], row['address'], row['buttons']) for i, row in enumerate(rows)]
+
+
+def prepare_data(browser, platform_link, limit=None):
+    """
+        Метод за один проход по таблице переходит на страницу мониторинга каждого устройства и сохраняет ссылку.
+        limit - обойти только первые limit строк таблицы.
+        Возвращает словарь: имя устройства -> ссылка.
+    """
+    return BasePage(browser, platform_link).learn_links('Monitoring', Locators.HEADER_MONITORING, limit)[0]
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+from selenium import webdriver
+
+from common.histogram import LatencyHistogram
+
+blocked_url_patterns = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+                        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+
+lean_arguments = ['--disable-extensions', '--disable-gpu', '--disable-dev-shm-usage', '--no-first-run',
+                  '--no-default-browser-check', '--disable-background-networking', '--disable-sync',
+                  '--disable-component-update', '--disable-default-apps', '--mute-audio',
+                  '--blink-settings=imagesEnabled=false']
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """
+        Набор настроек запуска Chrome.
+        page_load_strategy: normal - get() ждет загрузки всех ресурсов, eager - только DOMContentLoaded.
+        block_resources - картинки и шрифты блокируются через CDP (Network.setBlockedURLs).
+        lean - выключены расширения, GPU, фоновые сетевые запросы и прочее, что не нужно тестам.
+        prewarmed - каталог профиля копируется из заранее подготовленного шаблона,
+        и Chrome не тратит время на создание нового профиля при каждом запуске.
+    """
+    name: str
+    headless: bool = False
+    page_load_strategy: str = 'normal'
+    block_resources: bool = False
+    lean: bool = False
+    prewarmed: bool = False
+
+
+profiles = {
+    'default': BrowserProfile('default'),
+    'headless': BrowserProfile('headless', headless=True),
+    'lean': BrowserProfile('lean', headless=True, page_load_strategy='eager', block_resources=True,
+                           lean=True, prewarmed=True),
+}
+
+
+class BrowserFactory:
+    """
+        Создает Chrome по профилю. Экземпляр вызывается без аргументов, поэтому подходит как factory для BrowserPool.
+        Время запуска каждого браузера (вместе с копированием профиля) попадает в гистограмму startup.
+
+        Для профилей с prewarmed шаблон профиля создается в template_dir/template при первом запуске
+        (Chrome один раз открывается и закрывается), затем каждый браузер получает свою копию шаблона:
+        один user-data-dir нельзя использовать из нескольких Chrome одновременно.
+        Без template_dir шаблон живет во временном каталоге. Копии и временный шаблон удаляются в close().
+    """
+
+    def __init__(self, profile: BrowserProfile = profiles['default'], template_dir=None):
+        self.profile = profile
+        self.template_dir = template_dir
+        self.startup = LatencyHistogram()
+        self._profile_dirs = []
+
+    def options(self, user_data_dir=None):
+        options = webdriver.ChromeOptions()
+        options.page_load_strategy = self.profile.page_load_strategy
+        if self.profile.headless:
+            options.add_argument('--headless=new')
+            options.add_argument('--window-size=1920,1080')
+        if self.profile.lean:
+            for argument in lean_arguments:
+                options.add_argument(argument)
+        if user_data_dir is not None:
+            options.add_argument(f'--user-data-dir={user_data_dir}')
+        return options
+
+    def prewarm(self):
+        """
+            Готовит шаблон профиля: запускает Chrome с пустым каталогом и закрывает его.
+            Шаблон собирается во временном каталоге рядом и переносится на место через os.replace,
+            поэтому процессы xdist с общим template_dir не видят наполовину готовый шаблон.
+            Если другой процесс успел первым, его шаблон остается, а свой удаляется.
+        """
+        if self.template_dir is None:
+            self.template_dir = tempfile.mkdtemp(prefix='chrome-template-')
+            self._profile_dirs.append(self.template_dir)
+        template = os.path.join(self.template_dir, 'template')
+        if os.path.exists(os.path.join(template, 'Default')):
+            return
+        building = tempfile.mkdtemp(prefix='building-', dir=self.template_dir)
+        try:
+            browser = webdriver.Chrome(options=self.options(building))
+            try:
+                browser.get('about:blank')
+            finally:
+                browser.quit()
+            os.replace(building, template)
+        except OSError:
+            if not os.path.exists(os.path.join(template, 'Default')):
+                raise
+        finally:
+            shutil.rmtree(building, ignore_errors=True)
+
+    def _profile_copy(self):
+        profile_dir = tempfile.mkdtemp(prefix='chrome-profile-')
+        shutil.copytree(os.path.join(self.template_dir, 'template'), profile_dir, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('Singleton*', 'lockfile'))
+        self._profile_dirs.append(profile_dir)
+        return profile_dir
+
+    def __call__(self):
+        if self.profile.prewarmed:
+            self.prewarm()
+        started = time.perf_counter()
+        user_data_dir = self._profile_copy() if self.profile.prewarmed else None
+        browser = webdriver.Chrome(options=self.options(user_data_dir))
+        if self.profile.block_resources:
+            browser.execute_cdp_cmd('Network.enable', {})
+            browser.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns})
+        self.startup.record(time.perf_counter() - started)
+        return browser
+
+    def close(self):
+        for profile_dir in self._profile_dirs:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        self._profile_dirs = []
+
+
+def browser_factory(config, profile=None):
+    """
+        Фабрика браузеров по профилю (по умолчанию --browser-profile).
+        Шаблон профиля для prewarmed хранится в .pytest_cache и переживает запуски;
+        без кэша pytest (-p no:cacheprovider) он создается во временном каталоге на одну сессию.
+    """
+    profile = profiles[profile or config.getoption('--browser-profile')]
+    cache = getattr(config, 'cache', None)
+    template_dir = None
+    if profile.prewarmed and cache is not None:
+        template_dir = str(cache.mkdir(f'chrome-profile-{profile.name}'))
+    return BrowserFactory(profile, template_dir)
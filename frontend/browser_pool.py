@@ -0,0 +1,74 @@
+from selenium.common.exceptions import WebDriverException
+
+from browser_factory import BrowserFactory
+
+reset_storage_script = """
+    try { window.localStorage.clear(); } catch (e) {}
+    try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+class BrowserPool:
+    """
+        Пул запущенных браузеров. Тест берет браузер через acquire() и возвращает через release().
+
+        Между тестами браузер сбрасывается (cookies, localStorage, sessionStorage, about:blank),
+        это на порядок быстрее, чем запуск нового Chrome. После max_uses тестов, а также если
+        сессия упала и сброс не удался, браузер закрывается и при следующем acquire() создается новый.
+    """
+
+    def __init__(self, factory=None, max_uses=50, max_idle=2):
+        self.factory = factory or BrowserFactory()
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.idle = []
+        self.uses = {}
+        self.started = 0
+        self.recycled = 0
+
+    def acquire(self):
+        if self.idle:
+            return self.idle.pop()
+        browser = self.factory()
+        self.started += 1
+        self.uses[browser] = 0
+        return browser
+
+    def release(self, browser, broken=False):
+        self.uses[browser] = self.uses.get(browser, 0) + 1
+        if broken or self.uses[browser] >= self.max_uses or len(self.idle) >= self.max_idle:
+            self.discard(browser)
+            return
+        try:
+            self.reset(browser)
+        except WebDriverException:
+            self.discard(browser)
+            return
+        self.idle.append(browser)
+
+    @staticmethod
+    def reset(browser):
+        """
+            Сбрасывает состояние между тестами. Хранилище очищается на текущей странице
+            (оно привязано к origin), поэтому сначала скрипт, потом about:blank.
+        """
+        browser.delete_all_cookies()
+        browser.execute_script(reset_storage_script)
+        browser.get('about:blank')
+
+    def discard(self, browser):
+        self.uses.pop(browser, None)
+        self.recycled += 1
+        try:
+            browser.quit()
+        except WebDriverException:
+            pass
+
+    def close(self):
+        while self.idle:
+            browser = self.idle.pop()
+            self.uses.pop(browser, None)
+            try:
+                browser.quit()
+            except WebDriverException:
+                pass
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from base_page import BasePage
+from browser_factory import browser_factory, profiles
+from common.benchmark_plugin import record_benchmark
+from common.histogram import LatencyHistogram
+from common.rest_bench import BenchResult
+from locators import Locators
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize('profile', list(profiles))
+def test_browser_profile(request, platform_url, profile):
+    """
+        Для каждого профиля --browser-profile-samples раз запускаем новый Chrome без пула и замеряем
+        startup - от запуска до готовности сессии WebDriver и first_row - от get() главной страницы
+        до появления первой строки таблицы устройств. Результаты - в сводке как browser[<профиль>],
+        по ним видно, окупается ли профиль lean.
+    """
+    config = request.config
+    factory = browser_factory(config, profile)
+    first_row = LatencyHistogram()
+    started = time.perf_counter()
+    try:
+        for _ in range(config.getoption('--browser-profile-samples')):
+            browser = factory()
+            try:
+                page = BasePage(browser, platform_url, timeout=10)
+                opened = time.perf_counter()
+                page.open()
+                row = page.wait_for_element(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE)
+                first_row.record(time.perf_counter() - opened)
+            finally:
+                browser.quit()
+            assert row is not None, f'{profile}: таблица устройств не появилась за 10 секунд'
+    finally:
+        factory.close()
+    record_benchmark(config, f'browser[{profile}]',
+                     BenchResult('startup', time.perf_counter() - started,
+                                 histograms={'startup': factory.startup, 'first_row': first_row}))
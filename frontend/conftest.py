@@ -0,0 +1,86 @@
+import hashlib
+import json
+
+import pytest
+
+from base_page import BasePage, page_load_times
+from browser_factory import browser_factory
+from browser_pool import BrowserPool
+from common.perf_history_plugin import record_metric
+from common.platform_plugin import get_collected_devices, platform_identity
+from locators import Locators
+
+
+@pytest.fixture(scope="session")
+def browser_pool(request):
+    """
+        Общий пул браузеров для всех тестов frontend/, профиль из --browser-profile.
+        При запуске с -n у каждого процесса свой пул, то есть свои экземпляры Chrome.
+    """
+    config = request.config
+    factory = browser_factory(config)
+    pool = BrowserPool(factory=factory, max_uses=config.getoption('--browser-max-uses'))
+    yield pool
+    pool.close()
+    factory.close()
+    record_metric(config, 'page_load', page_load_times)
+
+
+@pytest.fixture
+def browser(browser_pool):
+    browser = browser_pool.acquire()
+    yield browser
+    browser_pool.release(browser)
+
+
+def devices_fingerprint(devices):
+    """
+        Отпечаток списка устройств: имена, типы и адреса (без текущих duty/freq).
+    """
+    fleet = sorted((device['name'], device['type'], device['address']) for device in devices)
+    return hashlib.sha1(json.dumps(fleet).encode()).hexdigest()
+
+
+device_pages = {'Monitoring': Locators.HEADER_MONITORING, 'Diagnostics': Locators.HEADER_DIAGNOCTIC}
+
+
+@pytest.fixture(scope="session")
+def device_links(request, platform_url, browser_pool):
+    """
+        Карта переходов: ссылки на страницы мониторинга и диагностики каждого устройства,
+        {'Monitoring': {имя: url}, 'Diagnostics': {имя: url}}. Ссылки узнаются один раз за сессию
+        кликами по кнопкам таблицы (BasePage.learn_links) и кэшируются на диске (.pytest_cache),
+        ключ - платформа (platform_identity) и отпечаток списка устройств. Сбросить кэш: pytest --cache-clear.
+        В кэше ссылки хранятся без адреса платформы: у симулятора порт меняется от запуска к запуску.
+        Без кэша pytest (-p no:cacheprovider) ссылки живут только в этой сессии.
+        Тесты дальше переходят на страницы устройств напрямую, без главной страницы.
+    """
+    config = request.config
+    fingerprint = devices_fingerprint(get_collected_devices(config))
+    key = 'device_links/' + hashlib.sha1(f'{platform_identity(config)} {fingerprint}'.encode()).hexdigest()
+    cache = getattr(config, 'cache', None)
+    paths = cache.get(key, None) if cache is not None else None
+    if paths is None:
+        browser = browser_pool.acquire()
+        try:
+            page = BasePage(browser, platform_url)
+            links = {button: page.learn_links(button, header)[0] for button, header in device_pages.items()}
+        finally:
+            browser_pool.release(browser)
+        paths = {button: {name: link[len(platform_url):] if link.startswith(platform_url) else link
+                          for name, link in page_links.items()}
+                 for button, page_links in links.items()}
+        if cache is not None:
+            cache.set(key, paths)
+    return {button: {name: path if '://' in path else platform_url + path for name, path in page_links.items()}
+            for button, page_links in paths.items()}
+
+
+@pytest.fixture(scope="session")
+def monitoring_links(device_links):
+    return device_links['Monitoring']
+
+
+@pytest.fixture(scope="session")
+def diagnostics_links(device_links):
+    return device_links['Diagnostics']
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from base_page import BasePage
+from common.consistency import ConsistencySampler
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_channels_consistency(request, browser, api, platform_url):
+    """
+        Одновременно читаем состояние устройств из GET /devices, из последних кадров мониторинга
+        и из таблицы на основной странице (одним execute_script) --consistency-samples раз.
+        Страница открывается один раз: канал "table" - живая таблица, а не заново загруженная страница.
+        Каналы могут расходиться на время обновления, но не дольше --max-staleness секунд.
+        Временной ряд расхождений сохраняется в --consistency-json.
+    """
+    page = BasePage(browser, platform_url)
+    page.open()
+
+    def read_table():
+        return {row.name: {'type': row.type, 'address': row.address} for row in page.get_table_snapshot() or []}
+
+    config = request.config
+    with ConsistencySampler(api, platform_url, read_table) as sampler:
+        tracker = sampler.run(config.getoption('--consistency-samples'), config.getoption('--consistency-interval'))
+
+    summary = tracker.summary()
+    path = config.getoption('--consistency-json')
+    if path:
+        with open(path, 'w') as f:
+            json.dump({'summary': summary, 'series': tracker.series}, f, indent=2)
+
+    max_staleness = config.getoption('--max-staleness')
+    stale = [record for record in tracker.series if record['stale_for'] > max_staleness]
+    assert len(stale) == 0, f'Каналы расходятся дольше {max_staleness} с: {stale[:5]}, сводка: {summary}'
@@ -1,6 +1,5 @@
 import pytest
-import requests
-from selenium import webdriver
+
 from base_page import BasePage
 from locators import Locators
 
@@ -8,15 +7,8 @@ link = "http://0.0.0.0:5585"
 
 
 @pytest.fixture(scope="class")
-def browser():
-    browser = webdriver.Chrome()
-    yield browser
-    browser.quit()
-
-
-@pytest.fixture(scope="class")
-def available_devices():
-    return requests.get(link + '/devices').json()
+def available_devices(api):
+    return api.get_devices()
 
 
 class TestDeviceTable:
@@ -30,8 +22,8 @@ class TestDeviceTable:
         """
         page = BasePage(browser, link)
         page.open()
-        assert page.is_element_present(*Locators.DEVICE_TABLE)
-        assert page.is_element_present(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE)
+        assert page.wait_for_element(*Locators.DEVICE_TABLE)
+        assert page.wait_for_element(*Locators.AT_LEAST_ONE_DEVICE_IN_TABLE)
 
     def test_device_is_displayed(self, browser, available_devices):
         """
@@ -44,12 +36,12 @@ class TestDeviceTable:
 
         page = BasePage(browser, link)
         page.open()
-        assert page.is_element_present(*Locators.DEVICE_TABLE)
-        devices = browser.find_elements_by_xpath(Locators.DEVICE_NAME)
+        assert page.wait_for_element(*Locators.DEVICE_TABLE)
+        rows = page.get_table_snapshot()
         devices_names = []
         missing_names = []
-        for device in devices:
-            devices_names.append(device.text)
+        for row in rows:
+            devices_names.append(row.name)
         for ad in available_devices:
             if ad['name'] not in devices_names:
                 missing_names.append(ad['name'])
@@ -59,7 +51,7 @@ class TestDeviceTable:
             unique_devices = set()
             for device in devices_names:
                 unique_devices.add(device)
-            if len(devices) > len(unique_devices):
+            if len(devices_names) > len(unique_devices):
                 raise AssertionError('В таблице есть повторяющиеся имена устройств')
 
     def test_device_has_right_name(self, browser, available_devices):
@@ -73,20 +65,17 @@ class TestDeviceTable:
 
         page = BasePage(browser, link)
         page.open()
-        assert page.is_element_present(*Locators.DEVICE_TABLE)
-        devices_names = browser.find_elements_by_xpath(Locators.DEVICE_NAME)
+        assert page.wait_for_element(*Locators.DEVICE_TABLE)
+        rows = page.get_table_snapshot()
 
         right_list = []
         for r in available_devices:
             right_list.append(r['name'])
 
         wrong_list = []
-        i = 1
-        for dname in devices_names:
-            name = dname.text
-            if name not in right_list:
-                wrong_list.append(i)
-            i += 1
+        for row in rows:
+            if row.name not in right_list:
+                wrong_list.append(row.index)
 
         if len(wrong_list) > 0:
             raise AssertionError(f"Неизвестное имя (либо имя отсутствует) в строках: {wrong_list}")
@@ -103,21 +92,17 @@ class TestDeviceTable:
 
         page = BasePage(browser, link)
         page.open()
-        assert page.is_element_present(*Locators.DEVICE_TABLE)
-        devices_types = browser.find_elements_by_xpath(Locators.DEVICE_TYPE)
-        devices_names = browser.find_elements_by_xpath(Locators.DEVICE_NAME)
+        assert page.wait_for_element(*Locators.DEVICE_TABLE)
+        rows = page.get_table_snapshot()
 
         right_list = {}
         for r in available_devices:
             right_list[r['name']] = r['type']
 
         wrong_list = []
-        i = 0
-        for dname in devices_names:
-            name = dname.text
-            if right_list[name] != devices_types[i].text:
-                wrong_list.append(name)
-            i += 1
+        for row in rows:
+            if right_list[row.name] != row.type:
+                wrong_list.append(row.name)
 
         if len(wrong_list) > 0:
             raise AssertionError(f"Неверно указан тип для устройств: {wrong_list}")
@@ -142,9 +127,8 @@ class TestDeviceTable:
 
         page = BasePage(browser, link)
         page.open()
-        assert page.is_element_present(*Locators.DEVICE_TABLE)
-        devices_addresses = browser.find_elements_by_xpath(Locators.DEVICE_ADDRESS)
-        devices_names = browser.find_elements_by_xpath(Locators.DEVICE_NAME)
+        assert page.wait_for_element(*Locators.DEVICE_TABLE)
+        rows = page.get_table_snapshot()
 
         right_list = {}
         for r in available_devices:
@@ -152,13 +136,10 @@ class TestDeviceTable:
             right_list[r['name']] = addr_10
 
         wrong_list = []
-        i = 0
-        for dname in devices_names:
-            name = dname.text
-            if int(right_list[name]) != int(devices_addresses[i].text):
-                wrong_list.append(f"Устройство {name}: указан неверный адрес {devices_addresses[i].text}, "
-                                  f"верный - {right_list[name]}.")
-            i += 1
+        for row in rows:
+            if int(right_list[row.name]) != int(row.address):
+                wrong_list.append(f"Устройство {row.name}: указан неверный адрес {row.address}, "
+                                  f"верный - {right_list[row.name]}.")
 
         if len(wrong_list) > 0:
             raise AssertionError(f"{wrong_list}")
@@ -173,17 +154,12 @@ class TestDeviceTable:
         page = BasePage(browser, link)
         page.open()
 
-        devices = browser.find_elements_by_xpath(Locators.TABLE_ROWS)
-        buttons = browser.find_elements_by_xpath(Locators.BUTTONS_MONITORING)
+        devices = page.get_table_snapshot()
+        buttons = [row for row in devices if row.has_button('Monitoring')]
         assert len(devices) == len(buttons), "Кнопка 'Monitoring' отображается не для всех устройств"
 
-        disabled_buttons = []
-
-        for i in range(len(buttons)):
-            page.open()
-            browser.find_element_by_xpath(f"//tr[{i+1}]/td/button/span[contains(text(), 'Monitoring')]").click()
-            if not page.is_element_present(*Locators.HEADER_MONITORING):
-                disabled_buttons.append(i+1)
+        # один проход: после каждой страницы возвращаемся к таблице через историю, без перезагрузки
+        _, disabled_buttons = page.learn_links('Monitoring', Locators.HEADER_MONITORING)
         if len(disabled_buttons) > 0:
             raise AssertionError(f"Кнопки 'Monitoring' в строках: {disabled_buttons} НЕ ведут на страницу Мониторинга")
 
@@ -196,16 +172,10 @@ class TestDeviceTable:
         page = BasePage(browser, link)
         page.open()
 
-        devices = browser.find_elements_by_xpath(Locators.TABLE_ROWS)
-        buttons = browser.find_elements_by_xpath(Locators.BUTTONS_DIAGNOSTIC)
+        devices = page.get_table_snapshot()
+        buttons = [row for row in devices if row.has_button('Diagnostics')]
         assert len(devices) == len(buttons), "Кнопка 'Diagnostics' отображается не для всех устройств"
 
-        disabled_buttons = []
-
-        for i in range(len(buttons)):
-            page.open()
-            browser.find_element_by_xpath(f"//tr[{i+1}]/td/button/span[contains(text(), 'Diagnostics')]").click()
-            if not page.is_element_present(*Locators.HEADER_DIAGNOCTIC):
-                disabled_buttons.append(i+1)
+        _, disabled_buttons = page.learn_links('Diagnostics', Locators.HEADER_DIAGNOCTIC)
         if len(disabled_buttons) > 0:
             raise AssertionError(f"Кнопки 'Diagnostics' в строках: {disabled_buttons} НЕ ведут на страницу с отчетами")
@@ -1,64 +1,69 @@
 import pytest
-from selenium import webdriver
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 
 from base_page import BasePage
+from common.platform_plugin import collected_device_names, get_collected_devices
 from locators import Locators
 
-link = "http://0.0.0.0:5585"
 reports = [100, 200, 300, 400]
 
-@pytest.fixture(scope="class")
-def browser():
-    browser = webdriver.Chrome()
-    yield browser
-    browser.quit()
+
+def pytest_generate_tests(metafunc):
+    """
+        Отдельный тест на каждое устройство из GET /devices: при запуске с -n
+        устройства проверяются параллельно в разных браузерах.
+    """
+    if 'device' in metafunc.fixturenames:
+        metafunc.parametrize('device', collected_device_names(metafunc.config))
+
+
+@pytest.fixture
+def dlink(device, diagnostics_links):
+    if device not in diagnostics_links:
+        pytest.skip(f'Страница диагностики устройства {device} недоступна с основной страницы')
+    return diagnostics_links[device]
+
 
 class TestDiagnostic():
 
     @pytest.mark.parametrize('report', reports)
-    def test_open_report(self, browser, report):
+    def test_open_report(self, request, browser, report_cache, dlink, device, report):
         """
-            По очереди переходим на страницу диагностики для каждого устойства.
-            В выпадающем окне выбираем отчет и загружаем. Проверяем, что появился какой-то текст.
-            Формат отчета за отсутствием требований пока не проверяем.
-
-            Повторяем тест для всех видов отчета (100, 200, 300, 400), согласно требованиям.
+            Переходим на страницу диагностики устройства по ссылке из карты переходов (device_links):
+            кнопка Diagnostics в таблице проверяется отдельно, в device_table_test,
+            поэтому устройство без ссылки пропускается.
+            В выпадающем окне выбираем отчет и загружаем. Проверяем, что отображается тот же текст,
+            что отдает API (/report) - тело берется из общего с тестами API кэша отчетов.
 
-            В качестве улучшения, я бы разделила тесты для разных устройств.
+            Повторяем тест для всех устройств и всех видов отчета (100, 200, 300, 400), согласно требованиям.
         """
 
         report_select_xpath = f"//div[@label='{report}']"
 
-        page = BasePage(browser, link)
+        page = BasePage(browser, dlink)
         page.open()
 
-        buttons = browser.find_elements_by_xpath(Locators.BUTTONS_DIAGNOSTIC)
-
-        for i in range(len(buttons)):
-            page.open()
-            browser.find_element_by_xpath(f"//tr[{i+1}]/td/button/span[contains(text(), 'Diagnostics')]").click()
-
-            select = browser.find_element_by_xpath(Locators.SELECT_REPORT_FIELD)
-            select.click()
-
-            try:
-                WebDriverWait(browser, 5).until(EC.element_to_be_clickable((By.XPATH, report_select_xpath)))
-                report_select = browser.find_element_by_xpath(report_select_xpath)
-                report_select.click()
-            except TimeoutException:
-                raise TimeoutException(f'Отсутствует возможность выбора отчета {report}')
-
-            assert len(browser.find_element_by_xpath(Locators.REPORT).text) == 0, \
-                "На странице присутствует текст до нажатия кнопки 'Load report'"
-            button = browser.find_element_by_xpath(Locators.LOAD_REPORT_BUTTON)
-            button.click()
-
-            try:
-                WebDriverWait(browser, 5).until(lambda wd: len(wd.find_element_by_xpath(Locators.REPORT).text) > 0)
-            except TimeoutException:
-                raise TimeoutException(f'В течение 5 секунд отчет {report} не отобразился')
-
+        select = page.find(By.XPATH, Locators.SELECT_REPORT_FIELD)
+        select.click()
+
+        report_select = page.wait_for_element(By.XPATH, report_select_xpath, timeout=5)
+        if report_select is None:
+            raise TimeoutException(f'Отсутствует возможность выбора отчета {report}')
+        report_select.click()
+
+        assert len(page.find(By.XPATH, Locators.REPORT).text) == 0, \
+            "На странице присутствует текст до нажатия кнопки 'Load report'"
+        button = page.find(By.XPATH, Locators.LOAD_REPORT_BUTTON)
+        button.click()
+
+        try:
+            text = page.wait_for_text(By.XPATH, Locators.REPORT, 'nonempty', timeout=5)
+        except TimeoutException:
+            raise TimeoutException(f'В течение 5 секунд отчет {report} устройства {device} не отобразился')
+
+        addresses = {d['name']: d['address'] for d in get_collected_devices(request.config)}
+        expected = report_cache.get_report(addresses[device], report)
+        assert expected.error is None, f'Отчет {report} устройства {device} не получен по API: {expected.error}'
+        assert text == expected.text.strip(), f'Отчет {report} устройства {device} на странице ' \
+                                              f'не совпадает с ответом API (sha1 {expected.sha1})'
@@ -23,7 +23,7 @@ class Locators:
     FREQ_FIELD_PIN_2 = "//div[@class='ant-row']/div[2]//div[@class='ant-select-selector']"
     FREQ_FIELD_PIN_3 = "//div[@class='ant-row']/div[3]//div[@class='ant-select-selector']"
     FREQ_VALUE_PIN_2 = "//div[@class='ant-row']/div[2]//div[@class='ant-row']/div[3]/article"
-    FREQ_VALUE_PIN_3 = "//div[@class='ant-row']/div[2]//div[@class='ant-row']/div[3]/article"
+    FREQ_VALUE_PIN_3 = "//div[@class='ant-row']/div[3]//div[@class='ant-row']/div[3]/article"
 
     SELECT_REPORT_FIELD = "//input"
     LOAD_REPORT_BUTTON = "//button"
@@ -1,56 +1,75 @@
-import time
 import pytest
-from selenium import webdriver
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver import ActionChains
+from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.wait import WebDriverWait
 
 from base_page import BasePage
+from common.platform_plugin import collected_device_names
 from locators import Locators
 
-link = "http://0.0.0.0:5585"
 valid_freq_values = [1, 2, 5, 10, 20, 50, 100, 200, 500]
 
 
-def prepare_data():
+def pytest_generate_tests(metafunc):
     """
-        Метод по очереди пытается перейти на страницу мониторинга для каждого устойства и сохраняет ссылку.
-        Возвращает список ссылок.
+        Тесты мониторинга параметризуются именами устройств из GET /devices - это один запрос
+        без браузера. Ссылки на страницы мониторинга ищутся только при запуске первого такого теста.
     """
+    if 'mlink' in metafunc.fixturenames:
+        metafunc.parametrize('mlink', collected_device_names(metafunc.config), indirect=True)
 
-    driver = webdriver.Chrome()
-    page = BasePage(driver, link)
-    page.open()
-    buttons = driver.find_elements_by_xpath(Locators.BUTTONS_MONITORING)
-    monitoring_links = []
-    for i in range(len(buttons)):
-        driver.get(link)
-        driver.find_element_by_xpath(f"//tr[{i + 1}]/td/button/span[contains(text(), 'Monitoring')]").click()
-        if page.is_element_present(*Locators.HEADER_MONITORING):
-            monitoring_links.append(driver.current_url)
-    driver.quit()
-    return monitoring_links
 
+def select_freq(browser, page, pin, freq):
+    """
+        Выбирает freq в выпадающем списке пина и нажимает кнопку сохранения.
+    """
+    page.find(By.XPATH, getattr(Locators, f'FREQ_FIELD_PIN_{pin}')).click()
+    try:
+        freq_select = page.find(By.XPATH, f"//div[@label='{freq}']")
+        ActionChains(browser).move_to_element(freq_select).perform()
+        freq_select.click()
+    except NoSuchElementException:
+        raise TimeoutException(f'Не получилось нажать на значение {freq}')
+    page.find(By.XPATH, getattr(Locators, f'SAVE_BTN_PIN_{pin}')).click()
 
-@pytest.fixture(scope="function")
-def browser():
-    browser = webdriver.Chrome()
-    yield browser
-    browser.quit()
 
+def switch_from_freq(browser, page, pin, freq):
+    """
+        Если freq уже сохранена, сохранение того же значения ничего не меняет на странице,
+        и сломанное сохранение не отличить от рабочего. Поэтому сначала сохраняем другое значение
+        и ждем, пока оно появится. Возвращает текущее значение на странице.
+    """
+    value = getattr(Locators, f'FREQ_VALUE_PIN_{pin}')
+    try:
+        current_freq = page.wait_for_text(By.XPATH, value, 'not_equals', "Hz")
+    except TimeoutException:
+        raise TimeoutException(f'Отсутствует текущее значение частоты (freq, Hz).')
+    if current_freq != f'{freq}Hz':
+        return current_freq
+    other = valid_freq_values[1] if freq == valid_freq_values[0] else valid_freq_values[0]
+    select_freq(browser, page, pin, other)
+    try:
+        return page.wait_for_text(By.XPATH, value, 'equals', f'{other}Hz')
+    except TimeoutException:
+        raise TimeoutException(f'Pin {pin}: промежуточное значение frequency {other}Hz не сохранилось')
+
+
+@pytest.fixture
+def mlink(request, monitoring_links):
+    if request.param not in monitoring_links:
+        pytest.skip(f'Страница мониторинга устройства {request.param} недоступна с основной страницы')
+    return monitoring_links[request.param]
 
-class TestMonitoring:
 
-    monitoring_links = prepare_data()
+class TestMonitoring:
 
-    @pytest.mark.parametrize('mlink', monitoring_links)
     @pytest.mark.parametrize('pin', [2, 3])
     def test_pins_duty(self, browser, mlink, pin):
         """
             Проверяем наличие и корректность параметра duty для pin 2 и pin 3 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
-            В качестве параметров передаём список ссылок для каждого устройства
+            В качестве параметров передаём список устройств (ссылки на их страницы мониторинга)
             и номер пина (2 и 3).
 
             Параметр должен быть числом с указанием единицы измерения % (диапазон значений 0-100)
@@ -61,23 +80,21 @@ class TestMonitoring:
 
         duty_xpath = f"//div[{pin}]//div[contains(@class, 'ant-card-body')]//div[1]/article"
         try:
-            WebDriverWait(browser, 10).until(lambda wd: wd.find_element_by_xpath(duty_xpath).text != "%")
+            pin_duty = page.wait_for_text(By.XPATH, duty_xpath, 'not_equals', "%", timeout=10)
         except TimeoutException:
             raise TimeoutException(f'В течение 10 секунд для Pin {pin} значение duty(%) не появилось!')
-        pin_duty = browser.find_element_by_xpath(duty_xpath)
         try:
-            value = int(pin_duty.text[:-1])
+            value = int(pin_duty[:-1])
         except ValueError:
             raise ValueError(f'Некорректное значение duty для Pin {pin}')
         assert value in range(0, 101), f'Значение duty ({value}) для Pin {pin} не лежит в диапазоне (0,100)%'
 
-    @pytest.mark.parametrize('mlink', monitoring_links)
     @pytest.mark.parametrize('pin', [2, 3])
     def test_pins_freq(self, browser, mlink, pin):
         """
             Проверяем параметр frequency для pin 2 и pin 3 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
-            В качестве параметров передаём список ссылок для каждого устройства
+            В качестве параметров передаём список устройств (ссылки на их страницы мониторинга)
             и номер пина (2 и 3)
         """
 
@@ -86,47 +103,46 @@ class TestMonitoring:
 
         freq_xpath = f"//div[@class='ant-row']/div[{pin}]//div[@class='ant-row']/div[3]/article"
         try:
-            WebDriverWait(browser, 10).until(lambda wd: wd.find_element_by_xpath(freq_xpath).text != "Hz")
+            pin_freq = page.wait_for_text(By.XPATH, freq_xpath, 'not_equals', "Hz", timeout=10)
         except TimeoutException:
             raise TimeoutException(f'В течение 10 секунд для Pin {pin} значение frequency(Hz) не появилось!')
-        pin_freq = browser.find_element_by_xpath(freq_xpath)
-        value = pin_freq.text[:-2]
+        value = pin_freq[:-2]
         try:
             value = int(value)
         except ValueError:
-            raise ValueError(f'{pin_freq.text} - некорректное значение frequency для Pin {pin}. '
+            raise ValueError(f'{pin_freq} - некорректное значение frequency для Pin {pin}. '
                              f'Допустимые значения: 1, 2, 5, 10, 20, 50, 100, 200, 500')
         assert value in valid_freq_values, f'{value} - некорректное значение frequency для Pin {pin}. ' \
                                            f'Допустимые значения: 1, 2, 5, 10, 20, 50, 100, 200, 500'
 
+    @pytest.mark.mutates_device('mlink')
     @pytest.mark.parametrize(['value', 'positive'], [[100, True], [50, True], [0, True], [-1, False],
                                                      [101, False], ['2.5', False], ['aa', False], ['-', False]])
-    @pytest.mark.parametrize('link', monitoring_links)
-    def test_change_duty_pin2(self, browser, link, value, positive):
+    def test_change_duty_pin2(self, browser, mlink, value, positive):
         """
             Проверяем возможность изменить duty для pin 2 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
             В качестве параметров передаём:
-            1. список ссылок для каждого устройства
+            1. список устройств (ссылки на их страницы мониторинга)
             2. список пар: значение duty + булевый параметр 'positive' (является ли это значение допустимым)
             Параметр duty должен измениться в случае, если значение находится в диапазоне (0; 100)
         """
 
-        page = BasePage(browser, link)
+        page = BasePage(browser, mlink)
         page.open()
 
-        duty_field = browser.find_element_by_xpath(Locators.DUTY_FIELD_PIN_2)
+        duty_field = page.find(By.XPATH, Locators.DUTY_FIELD_PIN_2)
         duty_value = duty_field.get_attribute("value")
 
         for i in range(len(duty_value)):
             duty_field.send_keys(Keys.BACK_SPACE)
 
         duty_field.send_keys(value)
-        button = browser.find_element_by_xpath(Locators.SAVE_BTN_PIN_2)
+        button = page.find(By.XPATH, Locators.SAVE_BTN_PIN_2)
         button.click()
 
         try:
-            WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.DUTY_VALUE_PIN_2).text == str(value) + '%')
+            page.wait_for_text(By.XPATH, Locators.DUTY_VALUE_PIN_2, 'equals', str(value) + '%', timeout=3)
             success = True
         except TimeoutException:
             success = False
@@ -134,135 +150,98 @@ class TestMonitoring:
         assert success == positive, f'Pin 2: Неправильное поведение при значении duty={value}'
 
 
+    @pytest.mark.mutates_device('mlink')
     @pytest.mark.parametrize(['value', 'positive'], [[100, True], [50, True], [0, True], [-1, False],
                                                      [101, False], ['2.5', False], ['aa', False], ['-', False]])
-    @pytest.mark.parametrize('link', monitoring_links)
-    def test_change_duty_pin3(self, browser, link, value, positive):
+    def test_change_duty_pin3(self, browser, mlink, value, positive):
         """
             Проверяем возможность изменить duty для pin 3 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
             В качестве параметров передаём:
-            1. список ссылок для каждого устройства
+            1. список устройств (ссылки на их страницы мониторинга)
             2. список пар: значение duty + булевый параметр 'positive' (является ли это значение допустимым)
             Параметр duty должен измениться в случае, если значение находится в диапазоне (0; 100)
         """
 
-        page = BasePage(browser, link)
+        page = BasePage(browser, mlink)
         page.open()
 
-        duty_field = browser.find_element_by_xpath(Locators.DUTY_FIELD_PIN_3)
+        duty_field = page.find(By.XPATH, Locators.DUTY_FIELD_PIN_3)
         duty_value = duty_field.get_attribute("value")
 
         for i in range(len(duty_value)):
             duty_field.send_keys(Keys.BACK_SPACE)
 
         duty_field.send_keys(value)
-        button = browser.find_element_by_xpath(Locators.SAVE_BTN_PIN_3)
+        button = page.find(By.XPATH, Locators.SAVE_BTN_PIN_3)
         button.click()
 
         try:
-            WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.DUTY_VALUE_PIN_3).text == str(value) + '%')
+            page.wait_for_text(By.XPATH, Locators.DUTY_VALUE_PIN_3, 'equals', str(value) + '%', timeout=3)
             success = True
         except TimeoutException:
             success = False
 
         assert success == positive, f'Pin 3: Неправильное поведение при значении duty={value}'
 
-    @pytest.mark.parametrize('link', monitoring_links)
+    @pytest.mark.mutates_device('mlink')
     @pytest.mark.parametrize('freq', [1, 2, 5, 10, 20, 50, 100, 200, 500])
-    def test_change_freq_pin2(self, browser, link, freq):
+    def test_change_freq_pin2(self, browser, mlink, freq):
         """
             Проверяем возможность изменить frequency для pin 2 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
             В качестве параметров передаём:
-            1. список ссылок для каждого устройства
+            1. список устройств (ссылки на их страницы мониторинга)
             2. список значений frequency, которые должны быть доступны для выбора в выпадающем списке.
         """
 
-        page = BasePage(browser, link)
+        page = BasePage(browser, mlink)
         page.open()
 
-        try:
-            WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2).text != "Hz")
-            current_freq = browser.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2).text
-            freq_field = browser.find_element_by_xpath(Locators.FREQ_FIELD_PIN_2)
-            freq_field.click()
-        except TimeoutException:
-            raise TimeoutException(f'Отсутствует текущее значение частоты (freq, Hz).')
+        current_freq = switch_from_freq(browser, page, 2, freq)
+        select_freq(browser, page, 2, freq)
 
         try:
-            ActionChains(browser).move_to_element(browser.find_element_by_xpath(f"//div[@label='{freq}']")).perform()
-            freq_select = browser.find_elements_by_xpath(f"//div[@label='{freq}']")[0]
-            freq_select.click()
+            pin_freq = page.wait_for_text(By.XPATH, Locators.FREQ_VALUE_PIN_2, 'not_equals', current_freq)
         except TimeoutException:
-            raise TimeoutException(f'Не получилось нажать на значение {freq}')
-
-        button = browser.find_element_by_xpath(Locators.SAVE_BTN_PIN_2)
-        button.click()
+            raise TimeoutException(f'В течение 3 секунд для Pin 2 значение frequency(Hz) не появилось!')
 
-        if freq != current_freq:
-            try:
-                WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2).text != current_freq)
-            except TimeoutException:
-                raise TimeoutException(f'В течение 3 секунд для Pin 2 значение frequency(Hz) не появилось!')
-        else:
-            time.sleep(1)    # по-хорошему это другой кейс, и надо это значение перепроверить еще раз, пока так
-
-        pin_freq = browser.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2).text
         value = pin_freq[:-2]  # отрезаем единицу измерения Hz
         try:
             value = int(value)
         except ValueError:
-            raise ValueError(f'{pin_freq.text} - некорректное значение frequency для Pin 2. '
+            raise ValueError(f'{pin_freq} - некорректное значение frequency для Pin 2. '
                              f'Допустимые значения: 1, 2, 5, 10, 20, 50, 100, 200, 500')
         assert value == freq, f'Значение Freq должно быть равно {freq}, а не {value}., ' \
                               f'pin_freq = {pin_freq} current_freq = {current_freq} '
 
 
-    @pytest.mark.parametrize('link', monitoring_links)
+    @pytest.mark.mutates_device('mlink')
     @pytest.mark.parametrize('freq', [1, 2, 5, 10, 20, 50, 100, 200, 500])
-    def test_change_freq_pin3(self, browser, link, freq):
+    def test_change_freq_pin3(self, browser, mlink, freq):
         """
             Проверяем возможность изменить frequency для pin 3 для каждого устройства,
             на страницу мониторинга которого можно зайти с основной страницы.
             В качестве параметров передаём:
-            1. список ссылок для каждого устройства
+            1. список устройств (ссылки на их страницы мониторинга)
             2. список значений frequency, которые должны быть доступны для выбора в выпадающем списке.
         """
 
-        page = BasePage(browser, link)
+        page = BasePage(browser, mlink)
         page.open()
 
-        try:
-            WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.FREQ_VALUE_PIN_3).text != "Hz")
-            current_freq = browser.find_element_by_xpath(Locators.FREQ_VALUE_PIN_3).text
-            freq_field = browser.find_element_by_xpath(Locators.FREQ_FIELD_PIN_3)
-            freq_field.click()
-        except TimeoutException:
-            raise TimeoutException(f'Отсутствует текущее значение частоты (freq, Hz).')
+        current_freq = switch_from_freq(browser, page, 3, freq)
+        select_freq(browser, page, 3, freq)
 
         try:
-            ActionChains(browser).move_to_element(browser.find_element_by_xpath(f"//div[@label='{freq}']")).perform()
-            freq_select = browser.find_element_by_xpath(f"//div[@label='{freq}']")
-            freq_select.click()
+            pin_freq = page.wait_for_text(By.XPATH, Locators.FREQ_VALUE_PIN_3, 'not_equals', current_freq)
         except TimeoutException:
-            raise TimeoutException(f'Не получилось нажать на значение {freq}')
+            raise TimeoutException(f'В течение 3 секунд для Pin 3 значение frequency(Hz) не обновилось!')
 
-        button = browser.find_element_by_xpath(Locators.SAVE_BTN_PIN_3)
-        button.click()
-
-        if freq != current_freq:
-            try:
-                WebDriverWait(browser, 3).until(lambda wd: wd.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2).text != current_freq)
-            except TimeoutException:
-                raise TimeoutException(f'В течение 3 секунд для Pin 2 значение frequency(Hz) не обновилось!')
-        else:
-            time.sleep(1)    # по-хорошему это другой кейс, и надо это значение перепроверить еще раз, пока так
-        pin_freq = browser.find_element_by_xpath(Locators.FREQ_VALUE_PIN_2)
-        value = pin_freq.text[:-2]  # отрезаем единицу измерения Hz
+        value = pin_freq[:-2]  # отрезаем единицу измерения Hz
         try:
             value = int(value)
         except ValueError:
-            raise ValueError(f'{pin_freq.text} - некорректное значение frequency для Pin 2. '
+            raise ValueError(f'{pin_freq} - некорректное значение frequency для Pin 3. '
                              f'Допустимые значения: 1, 2, 5, 10, 20, 50, 100, 200, 500')
         assert value == freq, f'Значение Freq должна быть равно {freq}, а не {value}'
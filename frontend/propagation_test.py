@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from base_page import BasePage
+from common.benchmark_plugin import p95_budget, record_benchmark
+from common.histogram import LatencyHistogram
+from common.platform_plugin import collected_device_names
+from common.rest_bench import BenchResult
+from common.ws_monitor import FrameWatcher
+from locators import Locators
+
+pytestmark = pytest.mark.benchmark
+
+hops = ['api', 'ws', 'dom', 'ws_dom']
+
+
+def pytest_generate_tests(metafunc):
+    if 'device' in metafunc.fixturenames:
+        metafunc.parametrize('device', collected_device_names(metafunc.config))
+
+
+@pytest.fixture(scope="module")
+def propagation(request):
+    """
+        Гистограммы задержек по всем устройствам. Попадают в сводку и --bench-json как 'propagation':
+        api - PATCH до ответа, ws - PATCH до кадра мониторинга с новым значением,
+        dom - PATCH до изменения значения на странице, ws_dom - кадр до изменения на странице.
+    """
+    started = time.perf_counter()
+    result = BenchResult('e2e', histograms={hop: LatencyHistogram() for hop in hops})
+    yield result
+    result.duration = time.perf_counter() - started
+    record_benchmark(request.config, 'propagation', result)
+
+
+def duty_sequence(previous, samples):
+    """
+        samples разных значений duty, каждое отличается от предыдущего.
+    """
+    values = []
+    for i in range(samples):
+        previous = (previous + 37) % 101
+        values.append(previous)
+    return values
+
+
+@pytest.mark.mutates_device
+def test_propagation_latency(request, browser, api, platform_url, monitoring_links, propagation, device):
+    """
+        Меняем duty pin 2 через PATCH /devices и отмечаем время, когда новое значение пришло
+        в кадре мониторинга и когда оно появилось на странице мониторинга.
+        Время появления на странице ставит MutationObserver в браузере, поэтому в задержку
+        не входит время обращения теста к WebDriver. Браузер и тест работают на одной машине,
+        так что время браузера и time.time() сравнимы.
+    """
+    if device not in monitoring_links:
+        pytest.skip(f'Страница мониторинга устройства {device} недоступна с основной страницы')
+    current = {d['name']: d for d in api.get_devices()}[device]
+
+    page = BasePage(browser, monitoring_links[device])
+    page.open()
+    page.wait_for_text(By.XPATH, Locators.DUTY_VALUE_PIN_2, 'not_equals', '%', timeout=10)
+    page.record_text_changes(By.XPATH, Locators.DUTY_VALUE_PIN_2, 'duty')
+
+    lost = []
+    with FrameWatcher(platform_url, current['address']) as watcher:
+        assert watcher.error is None, f'Не удалось подписаться на мониторинг {device}: {watcher.error}'
+        for duty in duty_sequence(current['pin_1_pwm_d'], request.config.getoption('--e2e-samples')):
+            sent = time.time()
+            response = api.patch_device(current['address'], duty1=duty, freq1=current['pin_1_pwm_f'])
+            answered = time.time()
+            assert response.status_code == 200
+            propagation.histograms['api'].record(answered - sent)
+
+            frame = watcher.wait_for(lambda f: f.data is not None and f.data.get('pin_1_pwm_d') == duty,
+                                     since=sent)
+            try:
+                page.wait_for_text(By.XPATH, Locators.DUTY_VALUE_PIN_2, 'equals', f'{duty}%', timeout=5)
+            except TimeoutException:
+                lost.append(duty)
+                continue
+            shown = [change['t'] for change in page.get_text_changes('duty') if change['text'] == f'{duty}%']
+            if not shown:
+                # значение на странице есть, но MutationObserver его не видел (например, узел перерисован)
+                lost.append(duty)
+                continue
+            shown = shown[-1]
+            propagation.histograms['dom'].record(max(0.0, shown - sent))
+            if frame is not None:
+                propagation.histograms['ws'].record(frame.received - sent)
+                propagation.histograms['ws_dom'].record(max(0.0, shown - frame.received))
+
+    assert len(lost) == 0, f'{device}: значения duty {lost} не появились на странице за 5 секунд ' \
+                           f'или их появление не заметил MutationObserver'
+    p95 = propagation.histograms['dom'].percentile(95) * 1000
+    budget = p95_budget(request.config, 'dom')
+    assert p95 <= budget, f'p95 задержки PATCH -> страница = {p95:.1f} мс, бюджет {budget:.1f} мс'
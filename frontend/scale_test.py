@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from base_page import BasePage, prepare_data
+from common.benchmark_plugin import record_scaling
+from common.simulator import PlatformSimulator
+
+pytestmark = pytest.mark.benchmark
+
+
+def pytest_generate_tests(metafunc):
+    if 'fleet_size' in metafunc.fixturenames:
+        metafunc.parametrize('fleet_size', metafunc.config.getoption('--scale-sizes'))
+
+
+@pytest.fixture
+def fleet_url(request, fleet_size):
+    """
+        Отдельный симулятор с парком из fleet_size устройств на время теста.
+    """
+    server = PlatformSimulator(devices=fleet_size,
+                               frame_interval=request.config.getoption('--sim-frame-interval')).run_in_thread()
+    yield server.url
+    server.stop()
+
+
+def test_table_scale(request, browser, fleet_url, fleet_size):
+    """
+        Отрисовка таблицы устройств: от открытия страницы до снимка всей таблицы через get_table_snapshot.
+        Поиск ссылок мониторинга (prepare_data): если парк не больше --scale-max-links, обходится вся таблица
+        (этап links); иначе - первые --scale-max-links строк (этап links_first_<N>), и в кривую попадает
+        измеренное время обхода этих N строк: его рост показывает, как дорожает каждая строка в большой таблице.
+        Кривые попадают в сводку "fleet scaling" вместе с этапами API из backend/benchmark_test.py.
+    """
+    config = request.config
+    page = BasePage(browser, fleet_url, timeout=60)
+    started = time.perf_counter()
+    page.open()
+    rows = page.get_table_snapshot()
+    record_scaling(config, 'table', fleet_size, time.perf_counter() - started)
+    assert rows is not None and len(rows) == fleet_size, \
+        f'В таблице {0 if rows is None else len(rows)} строк, в парке {fleet_size} устройств'
+
+    max_links = config.getoption('--scale-max-links')
+    walked = min(fleet_size, max_links)
+    started = time.perf_counter()
+    links = prepare_data(browser, fleet_url, limit=walked)
+    stage = 'links' if walked == fleet_size else f'links_first_{max_links}'
+    record_scaling(config, stage, fleet_size, time.perf_counter() - started)
+    assert len(links) == walked, f'Найдено {len(links)} ссылок мониторинга из {walked}'